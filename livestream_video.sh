@@ -33,8 +33,11 @@
 
 # Default URL to use if none is provided
 readonly URL_DEFAULT="https://cbsn-mia.cbsnstream.cbsnews.com/out/v1/ac174b7938264d24ae27e56f6584bca0/master.m3u8"
-# Temporary file to store used port numbers for multi-instance support
+# Temporary file to store used port numbers for multi-instance support (fallback without Python)
 readonly TEMP_FILE="/tmp/used_ports-livestream_video.txt"
+# Optional Python helper (shared registries), next to this script
+readonly SCRIPT_DIR=$(cd "$(dirname "$0")" && pwd)
+readonly P4W_CLI="$SCRIPT_DIR/playlist4whisper_cli.py"
 
 # --- Default Parameter Values ---
 
@@ -60,10 +63,25 @@ TRANS_LANGUAGE="en"     # Default translation language
 GEMINI_TRANS_MODEL=""   # Use Google's Gemini for translation with the specified model
 GEMINI_CONTEXT_LEVEL=2  # Context level for Gemini translation (0-3)
 SUBTITLES=""            # Generate subtitles flag
+ASSUME_YES=""           # Answer "yes" to overwrite prompts (unattended batch runs)
 AUDIO_SOURCE=""         # Audio source (pulse:index or avfoundation:index)
 AUDIO_INDEX="0"         # Default audio index
 WHISPER_EXECUTABLE=""   # Path to the Whisper executable
 VAD_SPLIT=""            # Enable VAD-based silence splitting for audio chunks
+LIVE_ENGINE=""          # Transcribe live streams with playlist4whisper_live.py (one decoder, audio kept in memory)
+ADAPTIVE_STEP_MIN=""    # Bounds of the step when it follows the speed of transcription (--adaptive-step)
+ADAPTIVE_STEP_MAX=""
+CATCH_UP_LAG=""         # Seconds behind live at which a live session starts catching up (--catch-up), empty = never
+PIN_LANGUAGE=""         # With --language auto, chunks that must agree before the live engine pins the language
+OVERLAP_S=""            # Seconds each chunk of the live engine repeats of the one before
+PROVISIONAL_S=""        # Seconds of new audio per provisional transcription of the live engine
+SHARED_CAPTURE=""       # Share the capture of the stream with the other sessions on it (--shared-capture)
+SHARED_CAPTURE_SOURCE="" # Socket of that capture for the live engine, while subscribed
+WHISPER_THREADS=4       # Whisper threads, replaced by the budget of the resource governor
+SESSION_SLOT=""         # Set once the session has asked the resource governor for a slot
+WHISPER_SERVER=""       # Keep the model loaded in a whisper.cpp server instead of one process per chunk
+WHISPER_SERVER_PORT=""  # Loopback port of that server, empty while chunks use the executable
+WHISPER_SERVER_PID=""
 VAD_EXECUTABLE=""       # Path to the whisper-vad-speech-segments executable
 VAD_MODEL_PATH=""       # Path to the Silero VAD model file
 VAD_CUT_MARKER=""       # Marker shown at start of text when chunk is NOT cut by VAD (fixed-time cut)
@@ -252,7 +270,7 @@ check_requirements() {
 # Prints usage instructions and exits.
 usage() {
     cat <<EOF
-Usage: $0 stream_url [or /path/media_file or pulse:index or avfoundation:index] [--step step_s] [--model model] [--language language] [--executable exe_path] [--translate] [--vad] [--subtitles] [--timeshift] [--segments segments (2<n<99)] [--segment_time minutes (1<minutes<99)] [--sync seconds (0 <= seconds <= (Step - 3))] --trans trans_language [output_text speak] [--gemini-trans [gemini_model]] [--gemini-level [0-3]] [player player_options]
+Usage: $0 stream_url [or /path/media_file or pulse:index or avfoundation:index] [--step step_s] [--adaptive-step min_s max_s] [--model model] [--language language] [--executable exe_path] [--translate] [--vad] [--server] [--live-engine] [--catch-up [seconds]] [--pin-language [chunks]] [--overlap [seconds]] [--provisional [seconds]] [--shared-capture] [--subtitles] [--yes] [--timeshift] [--segments segments (2<n<99)] [--segment_time minutes (1<minutes<99)] [--sync seconds (0 <= seconds <= (Step - 3))] --trans trans_language [output_text speak] [--gemini-trans [gemini_model]] [--gemini-level [0-3]] [player player_options]
 
 Example:
   $0 https://cbsn-mia.cbsnstream.cbsnews.com/out/v1/ac174b7938264d24ae27e56f6584bca0/master.m3u8 --step 8 --model base --language auto --translate --timeshift --segments 4 --segment_time 10 --trans es both speak
@@ -285,6 +303,10 @@ Help:
 
   --step          Size of sound parts for AI inference (seconds).
 
+  --adaptive-step Let the step change between min_s and max_s seconds with the speed of transcription:
+                  longer when whisper falls behind live, shorter when it has time to spare. Each change
+                  is logged. Not with --timeshift.
+
   --model         Whisper Models: $(echo ${MODELS[@]})
                   with suffixes: $(echo ${SUFFIXES[@]})
 
@@ -294,8 +316,43 @@ Help:
 
   --translate     Automatic English translation using Whisper AI (English only).
 
+  --server        Live transcription through whisper.cpp's whisper-server: the model is loaded once
+                  for the session instead of once per chunk. whisper.cpp executables only; falls
+                  back to one process per chunk if whisper-server is not found or fails to start.
+
+  --live-engine   Live transcription by playlist4whisper_live.py (Python 3): one ffmpeg decodes the
+                  capture once into memory and chunks are cut from there, instead of running ffmpeg
+                  on the growing capture file for every chunk. whisper.cpp executables only;
+                  not with --timeshift.
+
+  --catch-up      When transcription falls more than [seconds] behind live (default: 3 steps), catch up
+                  instead of letting the subtitles drift minutes late. With --live-engine: first a faster
+                  (quantized) model, then merging the waiting audio into one longer chunk, then dropping
+                  the oldest audio; without it, the oldest audio is dropped. Every gap is flagged in the
+                  transcript. Not with --timeshift.
+
+  --pin-language  With --language auto and --live-engine: once [chunks] chunks in a row (default 3) are
+                  detected in the same language, pass that language to whisper instead of detecting it
+                  again for every chunk. Detection comes back after 3 chunks transcribed with low confidence.
+
+  --overlap       With --live-engine: each chunk also transcribes the last [seconds] (default 1) of the one
+                  before, so words cut at the boundary are heard whole; the repeated words are removed
+                  before translation and display. Must be shorter than the step.
+
+  --provisional   With --live-engine: show provisional text of every [seconds] (default 2) of new audio,
+                  transcribed with a faster (e.g. quantized) model while the chunk is still captured,
+                  until the final text of the chunk replaces it.
+
+  --shared-capture
+                  With --live-engine and raw quality, or --timeshift: share one capture of the stream
+                  with the other sessions on the same URL (other tabs or users), decoded once and fanned
+                  out to each (with --timeshift, its segment files too), instead of capturing it again.
+                  It stops when the last session on it ends.
+
   --subtitles     Generate subtitles (.srt) from audio/video, with language, Whisper AI translation, and online translation.
 
+  --yes           Overwrite existing subtitle files without asking (for unattended batch jobs).
+
   --vad           Enable VAD (Voice Activity Detection) to find silences near the step boundary and cut audio
                   chunks there instead of at fixed intervals. Prevents cutting words mid-speech.
                   Uses whisper.cpp's built-in Silero VAD model (auto-downloaded on first use).
@@ -339,10 +396,7 @@ vlc_check() {
         echo
         pkill -f "^ffmpeg.*${MYPID}.*$"
         pkill -f "^${WHISPER_EXECUTABLE}.*${MYPID}.*$"
-        # Remove the used port from the temporary file
-        if [ -f "$TEMP_FILE" ]; then
-            awk -v myport="$MYPORT" '$0 !~ myport' "$TEMP_FILE" > temp_file.tmp && mv temp_file.tmp "$TEMP_FILE"
-        fi
+        release_port
         echo
         echo "${ICON_OK} VLC closed. Timeshift finished ${ICON_OK}"
         echo
@@ -350,31 +404,51 @@ vlc_check() {
     fi
 }
 
+# Runs playlist4whisper_cli.py if it and Python 3 are available; returns 127 otherwise.
+p4w_cli() {
+    if [ -f "$P4W_CLI" ] && command -v "${PYTHON:-python3}" >/dev/null 2>&1; then
+        "${PYTHON:-python3}" "$P4W_CLI" "$@"
+    else
+        return 127
+    fi
+}
+
 # Gets a unique, unused port number for loopback communication.
+# Uses the lock-protected port registry of playlist4whisper_cli.py (PID ownership, real bind()
+# check, ports of dead sessions reclaimed). Without Python, falls back to the text file,
+# which also records the owner PID so stale entries can be dropped.
+# Arguments: <owner_pid>
 get_unique_port() {
   local min=1024
   local max=65535
   local random_port
-  local max_ports=$((max - min + 1))
+  local owner
+
+    if random_port=$(p4w_cli port allocate --pid "$1" 2>/dev/null) && [[ "$random_port" =~ ^[0-9]+$ ]]; then
+        echo "$random_port"
+        return
+    fi
 
     # Create the temporary file if it doesn't exist
     if ! [ -f "$TEMP_FILE" ]; then
         touch "$TEMP_FILE"
     fi
 
-    # Check if the temporary file exceeds the maximum number of ports
-    if [ "$(wc -l < "$TEMP_FILE")" -ge "$max_ports" ]; then
-        echo "${ICON_ERROR} Error: Maximum number of ports ($max_ports) reached!"
-        exit 1
-    fi
+    # Reclaim ports of sessions that are no longer running
+    while read -r random_port owner; do
+        if [[ -z "$owner" ]] || kill -0 "$owner" 2>/dev/null; then
+            echo "$random_port $owner"
+        fi
+    done < "$TEMP_FILE" > "${TEMP_FILE}.$$" && cat "${TEMP_FILE}.$$" > "$TEMP_FILE"
+    rm -f "${TEMP_FILE}.$$"
 
     while true; do
         # Generate a random port number between 1024 and 65535
         random_port=$((RANDOM % (max - min + 1) + min))
 
-        # Check if the random port is already in use
-        if ! grep -q "$random_port" "$TEMP_FILE"; then
-            echo "$random_port" >> "$TEMP_FILE"
+        # Skip ports registered by another session or with something already listening
+        if ! grep -q "^${random_port}\( \|$\)" "$TEMP_FILE" && ! (echo > "/dev/tcp/127.0.0.1/${random_port}") 2>/dev/null; then
+            echo "$random_port $1" >> "$TEMP_FILE"
             break
         fi
     done
@@ -383,6 +457,145 @@ get_unique_port() {
     echo "$random_port"
 }
 
+# Releases the loopback port of this session, or the port given.
+release_port() {
+    local port="${1:-$MYPORT}"
+    [[ -z "$port" ]] && return
+    p4w_cli port release --port "$port" >/dev/null 2>&1
+    # Remove the used port from the temporary file
+    if [ -f "$TEMP_FILE" ]; then
+        grep -v "^${port}\( \|$\)" "$TEMP_FILE" > "${TEMP_FILE}.$$"
+        cat "${TEMP_FILE}.$$" > "$TEMP_FILE"
+        rm -f "${TEMP_FILE}.$$"
+    fi
+}
+
+
+# Asks the shared resource governor (playlist4whisper_cli.py session) for permission to start
+# transcribing and for a thread budget. Waits while it answers "queue" and exits on "reject".
+# Without Python the session starts with the default WHISPER_THREADS. The number of sessions
+# defaults to one per core; LIVESTREAM_MAX_SESSIONS overrides it. Models calibrated with
+# "playlist4whisper_cli.py benchmark threads" get no more threads than they can use.
+acquire_session_slot() {
+    local kind="live"
+    local reply decision reason
+    local announced=""
+
+    [[ $SUBTITLES == "subtitles" ]] && kind="subtitles"
+    SESSION_SLOT="requested"
+    while true; do
+        reply=$(p4w_cli session admit --pid "$MYPID" --model "$MODEL" --kind "$kind" --executable "$WHISPER_EXECUTABLE" --max-sessions "${LIVESTREAM_MAX_SESSIONS:-0}" 2>/dev/null)
+        decision=${reply%% *}
+        reason=${reply#* }
+        reason=${reason#* }
+        case "$decision" in
+            admit)
+                WHISPER_THREADS=$(echo "$reply" | awk '{print $2}')
+                echo "[+] Resource governor: $WHISPER_THREADS whisper threads ($reason)."
+                echo ""
+                return
+                ;;
+            queue)
+                if [[ "$announced" != "$reason" ]]; then
+                    echo "${ICON_WARN} Waiting for a free transcription slot: $reason (press Ctrl+C to cancel)."
+                    announced="$reason"
+                fi
+                sleep 5
+                ;;
+            reject)
+                echo ""; echo "${ICON_ERROR} Error: $reason ${ICON_ERROR}"; echo ""
+                release_port
+                exit 1
+                ;;
+            *)
+                return
+                ;;
+        esac
+    done
+}
+
+# Leaves the resource governor so the other sessions get the freed cores.
+release_session() {
+    if [[ -n "$SESSION_SLOT" ]]; then
+        p4w_cli session release --pid "$MYPID" >/dev/null 2>&1
+        SESSION_SLOT=""
+    fi
+}
+
+# Runs on exit: leaves the resource governor and stops the whisper server of the session.
+session_cleanup() {
+    release_session
+    stop_whisper_server
+    release_shared_capture
+}
+
+# Leaves the shared capture of the stream; the last session on it stops it.
+release_shared_capture() {
+    if [[ -n "$SHARED_CAPTURE_SOURCE" ]]; then
+        p4w_cli capture unsubscribe --pid "$MYPID" >/dev/null 2>&1
+        SHARED_CAPTURE_SOURCE=""
+    fi
+}
+
+# Starts whisper.cpp's whisper-server with the model loaded once for the whole session, on a
+# loopback port of its own. process_audio_chunk then posts each chunk to it instead of starting
+# the whisper executable, which loads the model again for every chunk. The thread count is fixed
+# when the server starts. Returns 1 if there is no server or it does not come up; the session
+# then keeps one process per chunk.
+start_whisper_server() {
+    local server_exe=""
+    local exe waited=0
+
+    for exe in ./build/bin/whisper-server ./server whisper-server; do
+        if [[ -x "$(command -v "$exe")" ]]; then
+            server_exe="$exe"
+            break
+        fi
+    done
+    if [[ -z "$server_exe" ]] || ! command -v curl >/dev/null 2>&1; then
+        echo "${ICON_WARN} whisper-server or curl not found, transcribing each chunk with ${WHISPER_EXECUTABLE}."
+        return 1
+    fi
+
+    WHISPER_SERVER_PORT=$(get_unique_port "$MYPID")
+    "$server_exe" -m ./models/ggml-${MODEL}.bin -t ${WHISPER_THREADS} --host 127.0.0.1 --port ${WHISPER_SERVER_PORT} \
+        > /tmp/whisper-server_${MYPID}.log 2>&1 &
+    WHISPER_SERVER_PID=$!
+
+    printf "[+] Loading model '${MODEL}' into whisper-server (port ${WHISPER_SERVER_PORT})...\n"
+    until curl --silent --output /dev/null "http://127.0.0.1:${WHISPER_SERVER_PORT}/"; do
+        if ! kill -0 "$WHISPER_SERVER_PID" 2>/dev/null || [ $waited -ge 1200 ]; then
+            echo "${ICON_WARN} whisper-server did not start (see /tmp/whisper-server_${MYPID}.log), transcribing each chunk with ${WHISPER_EXECUTABLE}."
+            stop_whisper_server
+            return 1
+        fi
+        sleep 0.1
+        waited=$((waited + 1))
+    done
+    echo ""
+}
+
+# Stops the whisper server of the session, if any, and frees its port.
+stop_whisper_server() {
+    if [[ -n "$WHISPER_SERVER_PID" ]]; then
+        kill "$WHISPER_SERVER_PID" 2>/dev/null
+        WHISPER_SERVER_PID=""
+    fi
+    if [[ -n "$WHISPER_SERVER_PORT" ]]; then
+        release_port "$WHISPER_SERVER_PORT"
+        WHISPER_SERVER_PORT=""
+    fi
+}
+
+# Re-reads the thread budget, which changes when other sessions start or finish.
+refresh_thread_budget() {
+    local budget_file="/tmp/livestream_video-threads_${MYPID}"
+    local budget
+    if [[ -f "$budget_file" ]]; then
+        budget=$(< "$budget_file")
+        [[ "$budget" =~ ^[0-9]+$ ]] && WHISPER_THREADS=$budget
+    fi
+}
 
 # Finds the best silence-based cut point near a target time using Silero VAD.
 # Extracts an audio window BEFORE the target (target - window .. target),
@@ -503,44 +716,58 @@ process_audio_chunk() {
         return
     fi
 
+    refresh_thread_budget
+
     # The processing pipe is designed to be robust across whisper.cpp versions
-    if [[ "$WHISPER_EXECUTABLE" == "./build/bin/whisper-cli" ]] || [[ "$WHISPER_EXECUTABLE" == "./main" ]] || [[ "$WHISPER_EXECUTABLE" == "whisper-cpp" ]]; then
-        "$WHISPER_EXECUTABLE" -l ${LANGUAGE} ${TRANSLATE} -t 4 -m ./models/ggml-${MODEL}.bin -f "$wav_file" 2> /tmp/whisper-live_${MYPID}-err.err | tr '\r' '\n' | grep '^\[' | sed 's/^\[.*\] *//' | paste -s -d ' ' - | tr -d '<>^*_' | tee /tmp/output-whisper-live_${MYPID}.txt >/dev/null
+    if [[ -n "$WHISPER_SERVER_PORT" ]]; then
+        # The model is already loaded in whisper-server; the "text" response has one line per segment
+        curl --silent --show-error --max-time $((STEP_S * 10)) \
+            -F file=@"$wav_file" -F response_format=text -F temperature=0.0 -F language=${LANGUAGE} \
+            $([[ "$TRANSLATE" == "--translate" ]] && echo "-F translate=true") \
+            "http://127.0.0.1:${WHISPER_SERVER_PORT}/inference" 2> /tmp/whisper-live_${MYPID}-err.err | tr '\r' '\n' | sed 's/^ *//' | paste -s -d ' ' - | tr -d '<>^*_' | tee /tmp/output-whisper-live_${MYPID}.txt >/dev/null
+        err=$?
+    elif [[ "$WHISPER_EXECUTABLE" == "./build/bin/whisper-cli" ]] || [[ "$WHISPER_EXECUTABLE" == "./main" ]] || [[ "$WHISPER_EXECUTABLE" == "whisper-cpp" ]]; then
+        "$WHISPER_EXECUTABLE" -l ${LANGUAGE} ${TRANSLATE} -t ${WHISPER_THREADS} -m ./models/ggml-${MODEL}.bin -f "$wav_file" 2> /tmp/whisper-live_${MYPID}-err.err | tr '\r' '\n' | grep '^\[' | sed 's/^\[.*\] *//' | paste -s -d ' ' - | tr -d '<>^*_' | tee /tmp/output-whisper-live_${MYPID}.txt >/dev/null
         err=$?
     elif [[ "$WHISPER_EXECUTABLE" == "pwcpp" ]]; then
         if [[ "$TRANSLATE" == "--translate" ]]; then
-            pwcpp --language ${LANGUAGE} --translate translate --n_threads 4 -m ./models/ggml-${MODEL}.bin "$wav_file" 2> /tmp/whisper-live_${MYPID}-err.err | tr '\r' '\n' | grep '^\[' | sed 's/^\[.*\] *//' | paste -s -d ' ' - | tr -d '<>^*_' | tee /tmp/output-whisper-live_${MYPID}.txt >/dev/null
+            pwcpp --language ${LANGUAGE} --translate translate --n_threads ${WHISPER_THREADS} -m ./models/ggml-${MODEL}.bin "$wav_file" 2> /tmp/whisper-live_${MYPID}-err.err | tr '\r' '\n' | grep '^\[' | sed 's/^\[.*\] *//' | paste -s -d ' ' - | tr -d '<>^*_' | tee /tmp/output-whisper-live_${MYPID}.txt >/dev/null
             err=$?
         else
-            pwcpp --language ${LANGUAGE} --n_threads 4 -m ./models/ggml-${MODEL}.bin "$wav_file" 2> /tmp/whisper-live_${MYPID}-err.err | tr '\r' '\n' | grep '^\[' | sed 's/^\[.*\] *//' | paste -s -d ' ' - | tr -d '<>^*_' | tee /tmp/output-whisper-live_${MYPID}.txt >/dev/null
+            pwcpp --language ${LANGUAGE} --n_threads ${WHISPER_THREADS} -m ./models/ggml-${MODEL}.bin "$wav_file" 2> /tmp/whisper-live_${MYPID}-err.err | tr '\r' '\n' | grep '^\[' | sed 's/^\[.*\] *//' | paste -s -d ' ' - | tr -d '<>^*_' | tee /tmp/output-whisper-live_${MYPID}.txt >/dev/null
             err=$?
         fi
     elif [[ "$WHISPER_EXECUTABLE" == "whisper" ]]; then
         if [[ "$TRANSLATE" == "--translate" ]]; then
             if [[ "$LANGUAGE" == "auto" ]]; then
-                whisper --temperature 0 --beam_size 8 --best_of 4 --initial_prompt "" --threads 4 --model ${MODEL} --task translate --model_dir ./models --output_dir /tmp --output_format txt "$wav_file" 2> /tmp/whisper-live_${MYPID}-err.err | tail -n 1 | tr -d '<>^*_' | tee /tmp/aout-whisper-live_${MYPID}.txt >/dev/null
+                whisper --temperature 0 --beam_size 8 --best_of 4 --initial_prompt "" --threads ${WHISPER_THREADS} --model ${MODEL} --task translate --model_dir ./models --output_dir /tmp --output_format txt "$wav_file" 2> /tmp/whisper-live_${MYPID}-err.err | tail -n 1 | tr -d '<>^*_' | tee /tmp/aout-whisper-live_${MYPID}.txt >/dev/null
                 err=$?
             else
-                whisper --temperature 0 --beam_size 8 --best_of 4 --initial_prompt "" --threads 4 --model ${MODEL} --task translate --model_dir ./models --output_dir /tmp --output_format txt "$wav_file" 2> /tmp/whisper-live_${MYPID}-err.err | tail -n 1 | tr -d '<>^*_' | tee /tmp/aout-whisper-live_${MYPID}.txt >/dev/null
+                whisper --temperature 0 --beam_size 8 --best_of 4 --initial_prompt "" --threads ${WHISPER_THREADS} --model ${MODEL} --task translate --model_dir ./models --output_dir /tmp --output_format txt "$wav_file" 2> /tmp/whisper-live_${MYPID}-err.err | tail -n 1 | tr -d '<>^*_' | tee /tmp/aout-whisper-live_${MYPID}.txt >/dev/null
                 err=$?
             fi
         else
             if [[ "$LANGUAGE" == "auto" ]]; then
-                  whisper --temperature 0 --beam_size 8 --best_of 4 --initial_prompt "" --threads 4 --model ${MODEL} --model_dir ./models --output_dir /tmp --output_format txt "$wav_file" 2> /tmp/whisper-live_${MYPID}-err.err | tail -n 1 | tr -d '<>^*_' | tee /tmp/aout-whisper-live_${MYPID}.txt >/dev/null
+                  whisper --temperature 0 --beam_size 8 --best_of 4 --initial_prompt "" --threads ${WHISPER_THREADS} --model ${MODEL} --model_dir ./models --output_dir /tmp --output_format txt "$wav_file" 2> /tmp/whisper-live_${MYPID}-err.err | tail -n 1 | tr -d '<>^*_' | tee /tmp/aout-whisper-live_${MYPID}.txt >/dev/null
                   err=$?
             else
-                  whisper --temperature 0 --beam_size 8 --best_of 4 --initial_prompt "" --language ${LANGUAGE} --threads 4 --model ${MODEL} --model_dir ./models --output_dir /tmp --output_format txt "$wav_file" 2> /tmp/whisper-live_${MYPID}-err.err | tail -n 1 | tr -d '<>^*_' | tee /tmp/aout-whisper-live_${MYPID}.txt >/dev/null
+                  whisper --temperature 0 --beam_size 8 --best_of 4 --initial_prompt "" --language ${LANGUAGE} --threads ${WHISPER_THREADS} --model ${MODEL} --model_dir ./models --output_dir /tmp --output_format txt "$wav_file" 2> /tmp/whisper-live_${MYPID}-err.err | tail -n 1 | tr -d '<>^*_' | tee /tmp/aout-whisper-live_${MYPID}.txt >/dev/null
                   err=$?
             fi
         fi
         sed 's/\[[^][]*\] *//g' /tmp/aout-whisper-live_${MYPID}.txt > /tmp/output-whisper-live_${MYPID}.txt
     fi
 
+    present_transcript "$(< "/tmp/output-whisper-live_${MYPID}.txt")"
+}
+
+# Translates, displays and speaks the text transcribed from one chunk.
+# Arguments: <original_text>
+present_transcript() {
     # --- Translation and Output Logic ---
 
     # Get the raw transcribed text from whisper.
-    local original_text
-    original_text=$(< "/tmp/output-whisper-live_${MYPID}.txt")
+    local original_text="$1"
 
     # Safety guard: if transcription is empty or too short, do nothing.
     if [[ $(wc -m <<< "$original_text") -lt 3 ]]; then
@@ -832,8 +1059,75 @@ while [[ $# -gt 0 ]]; do
                 exit 1
             fi
             ;;
+        --adaptive-step )
+            ADAPTIVE_STEP_MIN=$2
+            ADAPTIVE_STEP_MAX=$3
+            shift 2
+            if ! [[ "$ADAPTIVE_STEP_MIN" =~ ^[0-9]+$ ]] || ! [[ "$ADAPTIVE_STEP_MAX" =~ ^[0-9]+$ ]]; then
+                echo "${ICON_ERROR} Error: Adaptive step bounds must be numeric values."
+                usage
+                exit 1
+            fi
+            if [[ "$ADAPTIVE_STEP_MIN" -lt 3 ]] || [[ "$ADAPTIVE_STEP_MAX" -gt 60 ]] || [[ "$ADAPTIVE_STEP_MIN" -gt "$ADAPTIVE_STEP_MAX" ]]; then
+                echo "${ICON_ERROR} Error: Adaptive step bounds out of range (3 <= min_s <= max_s <= 60)."
+                usage
+                exit 1
+            fi
+            ;;
         --translate ) TRANSLATE=$1;;
         --subtitles ) SUBTITLES=${1#--};;
+        --yes ) ASSUME_YES=${1#--};;
+        --server ) WHISPER_SERVER=${1#--};;
+        --live-engine ) LIVE_ENGINE="engine";;
+        --shared-capture ) SHARED_CAPTURE=${1#--};;
+        --pin-language )
+            PIN_LANGUAGE=3
+            if [[ -n "$2" ]] && [[ "$2" != --* ]]; then
+                shift
+                PIN_LANGUAGE=$1
+                if ! [[ "$PIN_LANGUAGE" =~ ^[0-9]+$ ]] || [[ "$PIN_LANGUAGE" -lt 1 ]]; then
+                    echo "${ICON_ERROR} Error: --pin-language takes a number of chunks."
+                    usage
+                    exit 1
+                fi
+            fi
+            ;;
+        --provisional )
+            PROVISIONAL_S=2
+            if [[ -n "$2" ]] && [[ "$2" != --* ]]; then
+                shift
+                PROVISIONAL_S=$1
+                if ! [[ "$PROVISIONAL_S" =~ ^[0-9]+$ ]] || [[ "$PROVISIONAL_S" -lt 1 ]]; then
+                    echo "${ICON_ERROR} Error: --provisional takes a number of seconds."
+                    usage
+                    exit 1
+                fi
+            fi
+            ;;
+        --overlap )
+            OVERLAP_S=1
+            if [[ -n "$2" ]] && [[ "$2" != --* ]]; then
+                shift
+                OVERLAP_S=$1
+                if ! [[ "$OVERLAP_S" =~ ^[0-9]+$ ]] || [[ "$OVERLAP_S" -lt 1 ]]; then
+                    echo "${ICON_ERROR} Error: --overlap takes a number of seconds."
+                    usage
+                    exit 1
+                fi
+            fi
+            ;;
+        --catch-up )
+            CATCH_UP_LAG="auto"
+            if [[ -n "$2" ]] && [[ "$2" != --* ]]; then
+                shift
+                CATCH_UP_LAG=$1
+                if ! [[ "$CATCH_UP_LAG" =~ ^[0-9]+$ ]] || [[ "$CATCH_UP_LAG" -lt 1 ]]; then
+                    echo "${ICON_ERROR} Error: Catch-up lag must be a number of seconds."
+                    usage
+                    exit 1
+                fi
+            fi
+            ;;
         --playeronly ) PLAYER_ONLY=${1#--};;
         --timeshift ) TIMESHIFT=${1#--};;
         --segment_time )
@@ -940,7 +1234,7 @@ while [[ $# -gt 0 ]]; do
             if [[ $# -gt 1 ]]; then
                 while [[ $# -gt 1 ]]; do
                     case $2 in
-                        --model | --language | --step | --translate | --subtitles | --playeronly | --timeshift | --segment_time | --segments | --sync | --raw | --upper | --lower | --streamlink | --yt-dlp | --vad | --trans | --gemini-trans | --gemini-level )
+                        --model | --language | --step | --adaptive-step | --translate | --subtitles | --yes | --server | --live-engine | --catch-up | --pin-language | --overlap | --provisional | --shared-capture | --playeronly | --timeshift | --segment_time | --segments | --sync | --raw | --upper | --lower | --streamlink | --yt-dlp | --vad | --trans | --gemini-trans | --gemini-level )
                             break
                             ;;
                         *)
@@ -994,7 +1288,8 @@ if [ "$TIMESHIFT" = "timeshift" ]; then
 fi
 
 # Get the script's PID and check for permissions on temporary files.
-MYPID=$(ps aux | awk '/livestream_video\.sh/ {pid=$2} END {print pid}')
+# $$ is exact; scanning "ps aux" picked a wrong PID when several sessions started at once.
+MYPID=$$
 
 if [ -n "$MYPID" ]; then
     if [ -e "/tmp/whisper-live_${MYPID}.wav" ] && ! [ -w "/tmp/whisper-live_${MYPID}.wav" ]; then
@@ -1076,14 +1371,32 @@ if [[ $SUBTITLES == "subtitles" ]] && [[ $LOCAL_FILE -eq 0 ]]; then
     echo ""
     echo "${ICON_ERROR} Error: Generate Subtitles only available for local Audio/Video Files."
     echo ""
-    # Remove the used port from the temporary file
-    if [ -f "$TEMP_FILE" ]; then
-        awk -v myport="$MYPORT" '$0 !~ myport' "$TEMP_FILE" > temp_file.tmp && mv temp_file.tmp "$TEMP_FILE"
-    fi
+    release_port
     exit 1
 fi
 
 
+# On exit, whatever this session took is given back (session_cleanup skips what it never took).
+trap session_cleanup EXIT
+
+# Start only when the machine has room for another transcription session.
+if [[ "$PLAYER_ONLY" == "" ]] || [[ $SUBTITLES == "subtitles" ]]; then
+    acquire_session_slot
+fi
+
+# Load the model once for a live session when asked to.
+if [[ "$WHISPER_SERVER" == "server" ]] && [[ "$PLAYER_ONLY" == "" ]] && [[ $SUBTITLES != "subtitles" ]]; then
+    case "$WHISPER_EXECUTABLE" in
+        ./build/bin/whisper-cli | ./main | whisper-cpp )
+            start_whisper_server
+            ;;
+        * )
+            echo "${ICON_WARN} --server needs a whisper.cpp executable, transcribing each chunk with ${WHISPER_EXECUTABLE}."
+            ;;
+    esac
+fi
+
+
 # Generate Subtitles from a local Audio/Video File.
 if [[ $SUBTITLES == "subtitles" ]] && [[ $LOCAL_FILE -eq 1 ]]; then
 
@@ -1122,7 +1435,11 @@ if [[ $SUBTITLES == "subtitles" ]] && [[ $LOCAL_FILE -eq 1 ]]; then
         echo "  - File: $whisper_dest_file"
         echo "  - Type: $whisper_file_description"
         echo ""
-        read -p "Do you want to re-run the AI and overwrite this file? (Answering 'n' will use the existing file) [y/n]: " response
+        if [[ "$ASSUME_YES" == "yes" ]]; then
+            response="y"
+        else
+            read -p "Do you want to re-run the AI and overwrite this file? (Answering 'n' will use the existing file) [y/n]: " response
+        fi
 
         # Normalize user input: convert to lowercase and remove leading/trailing whitespace
         response_clean=$(echo "$response" | tr '[:upper:]' '[:lower:]' | xargs)
@@ -1170,26 +1487,26 @@ if [[ $SUBTITLES == "subtitles" ]] && [[ $LOCAL_FILE -eq 1 ]]; then
             echo "---------------------------------------------------------------------------"
             echo ""
             if [[ "$WHISPER_EXECUTABLE" == "./build/bin/whisper-cli" ]] || [[ "$WHISPER_EXECUTABLE" == "./main" ]] || [[ "$WHISPER_EXECUTABLE" == "whisper-cpp" ]]; then
-                "$WHISPER_EXECUTABLE" -l ${LANGUAGE} ${TRANSLATE} -t 4 -m ./models/ggml-${MODEL}.bin -f /tmp/whisper-live_${MYPID}.wav -osrt 2> /tmp/whisper-live_${MYPID}-err.err
+                "$WHISPER_EXECUTABLE" -l ${LANGUAGE} ${TRANSLATE} -t ${WHISPER_THREADS} -m ./models/ggml-${MODEL}.bin -f /tmp/whisper-live_${MYPID}.wav -osrt 2> /tmp/whisper-live_${MYPID}-err.err
                 err=$?
             elif [[ "$WHISPER_EXECUTABLE" == "pwcpp" ]]; then
                 if [[ "$TRANSLATE" == "--translate" ]]; then
-                    pwcpp --language ${LANGUAGE} --translate translate --n_threads 4 -m ./models/ggml-${MODEL}.bin -osrt /tmp/whisper-live_${MYPID}.wav 2> /tmp/whisper-live_${MYPID}-err.err
+                    pwcpp --language ${LANGUAGE} --translate translate --n_threads ${WHISPER_THREADS} -m ./models/ggml-${MODEL}.bin -osrt /tmp/whisper-live_${MYPID}.wav 2> /tmp/whisper-live_${MYPID}-err.err
                     err=$?
                 else
-                    pwcpp --language ${LANGUAGE} --n_threads 4 -m ./models/ggml-${MODEL}.bin -osrt /tmp/whisper-live_${MYPID}.wav 2> /tmp/whisper-live_${MYPID}-err.err
+                    pwcpp --language ${LANGUAGE} --n_threads ${WHISPER_THREADS} -m ./models/ggml-${MODEL}.bin -osrt /tmp/whisper-live_${MYPID}.wav 2> /tmp/whisper-live_${MYPID}-err.err
                     err=$?
                 fi
             elif [[ "$WHISPER_EXECUTABLE" == "whisper" ]]; then
                 if [[ "$TRANSLATE" == "--translate" ]]; then
-                    whisper --temperature 0 --beam_size 8 --best_of 4 --initial_prompt "" --threads 4 --model ${MODEL} --task translate --model_dir ./models --output_format srt --output_dir /tmp /tmp/whisper-live_${MYPID}.wav 2> /tmp/whisper-live_${MYPID}-err.err
+                    whisper --temperature 0 --beam_size 8 --best_of 4 --initial_prompt "" --threads ${WHISPER_THREADS} --model ${MODEL} --task translate --model_dir ./models --output_format srt --output_dir /tmp /tmp/whisper-live_${MYPID}.wav 2> /tmp/whisper-live_${MYPID}-err.err
                     err=$?
                 else
                     whisper_lang_opt=""
                     if [[ "$LANGUAGE" != "auto" ]]; then
                         whisper_lang_opt="--language ${LANGUAGE}"
                     fi
-                    whisper --temperature 0 --beam_size 8 --best_of 4 --initial_prompt "" ${whisper_lang_opt} --threads 4 --model ${MODEL} --model_dir ./models --output_format srt --output_dir /tmp /tmp/whisper-live_${MYPID}.wav 2> /tmp/whisper-live_${MYPID}-err.err
+                    whisper --temperature 0 --beam_size 8 --best_of 4 --initial_prompt "" ${whisper_lang_opt} --threads ${WHISPER_THREADS} --model ${MODEL} --model_dir ./models --output_format srt --output_dir /tmp /tmp/whisper-live_${MYPID}.wav 2> /tmp/whisper-live_${MYPID}-err.err
                     err=$?
                 fi
                 mv /tmp/whisper-live_${MYPID}.srt "$temp_whisper_srt"
@@ -1600,7 +1917,11 @@ if [[ $SUBTITLES == "subtitles" ]] && [[ $LOCAL_FILE -eq 1 ]]; then
             echo "  - File: $dest_file"
             echo "  - Type: $file_desc"
             echo ""
-            read -p "Do you want to overwrite it? [y/n]: " response
+            if [[ "$ASSUME_YES" == "yes" ]]; then
+                response="y"
+            else
+                read -p "Do you want to overwrite it? [y/n]: " response
+            fi
 
             overwrite_response=$(echo "$response" | tr '[:upper:]' '[:lower:]' | xargs)
         fi
@@ -1740,46 +2061,67 @@ trap "RUNNING=0" SIGINT SIGTERM
 if [[ $TIMESHIFT == "timeshift" ]] && [[ $LOCAL_FILE -eq 0 ]]; then
     printf "[+] Timeshift active: '$SEGMENTS' segments of '$SEGMENT_TIME' minutes and a synchronization of '$SYNC' seconds.\n\n"
 
+    # Segment files: this session's own capture renames them into the playlist, a shared one is linked from it
+    BUF_BASE="/tmp/whisper-live_${MYPID}_buf"
+    if [[ -n "$SHARED_CAPTURE" ]] && { [[ $URL == "pulse" ]] || [[ $URL == "avfoundation" ]]; }; then
+        echo "${ICON_WARN} --shared-capture needs a network stream; capturing it for this session only."
+    elif [[ -n "$SHARED_CAPTURE" ]]; then
+        capture_method=""
+        [[ "$STREAMLINK_FORCE" == "streamlink" ]] && capture_method="--method streamlink"
+        [[ "$YTDLP_FORCE" == "yt-dlp" ]] && capture_method="--method yt-dlp"
+        capture_reply=$(p4w_cli capture subscribe "$URL" --pid "$MYPID" --segments "$SEGMENTS" --segment-time "$SEGMENT_TIME" $capture_method)
+        shared_segments=$(echo "$capture_reply" | sed -n 2p)
+        if [[ -n "$shared_segments" ]]; then
+            SHARED_CAPTURE_SOURCE=$(echo "$capture_reply" | sed -n 1p)
+            BUF_BASE=${shared_segments%\%03d.avi}
+            echo "[+] Sharing the capture and timeshift segments of this stream with the other sessions on it."
+        else
+            echo "${ICON_WARN} The shared capture did not start; capturing the stream for this session only."
+        fi
+    fi
+
     SEGMENT_TIME=$((SEGMENT_TIME * 60))
 
-    case $URL in
-        pulse )
-             filename_base="whisper-live_${MYPID}_buf%03d"
-             filter_complex="[0:a]showspectrum=s=854x480:mode=separate:color=intensity:legend=disabled:fps=25,drawtext=fontfile=/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf:text='PID\: ${MYPID} | %{pts\:gmtime\:$(date +%s)\:%Y-%m-%d %H\\\\\:%M\\\\\:%S}':fontcolor=white:x=10:y=10"
-             ffmpeg -loglevel quiet -y -f pulse -i "$AUDIO_INDEX" -filter_complex "$filter_complex" -c:v mjpeg -q:v 2 -c:a pcm_s16le -threads 2 -f segment -segment_time $SEGMENT_TIME -reset_timestamps 1 -segment_format avi /tmp/${filename_base}.avi &
-             FFMPEG_PID=$!
-             ;;
-         avfoundation )
-             filename_base="whisper-live_${MYPID}_buf%03d"
-             filter_complex="[0:a]showspectrum=s=854x480:mode=separate:color=intensity:legend=disabled:fps=25,drawtext=fontfile=/System/Library/Fonts/Supplemental/Arial.ttf:text='PID\: ${MYPID} | %{pts\:gmtime\:$(date +%s)\:%Y-%m-%d %H\\\\\:%M\\\\\:%S}':fontcolor=white:x=10:y=10"
-             ffmpeg -loglevel quiet -y -f avfoundation -i :"${AUDIO_INDEX}" -filter_complex "$filter_complex" -c:v mjpeg -q:v 2 -c:a pcm_s16le -threads 2 -f segment -segment_time $SEGMENT_TIME -reset_timestamps 1 -segment_format avi /tmp/${filename_base}.avi &
-             FFMPEG_PID=$!
-             ;;
-        *youtube* | *youtu.be* )
-            if ! command -v yt-dlp &>/dev/null; then echo "yt-dlp is required" && exit 1; fi
-            ffmpeg -loglevel quiet -accurate_seek -y -probesize 32 -i $(yt-dlp -i -f b -g $URL) -bufsize 44M -acodec ${FMT} -threads 2 -vcodec libx264 -map 0:v:0 -map 0:a:0 -preset ultrafast -movflags +faststart -vsync 2 -f segment -segment_time $SEGMENT_TIME -reset_timestamps 1 /tmp/whisper-live_${MYPID}_buf%03d.avi &
-            FFMPEG_PID=$!
-            ;;
-        * )
-            if [[ "$STREAMLINK_FORCE" = "streamlink" || "$URL" = *twitch* ]]; then
-                if ! command -v streamlink >/dev/null 2>&1; then echo "streamlink is required" && exit 1; fi
-                streamlink $URL best -O 2>/dev/null | ffmpeg -loglevel quiet -accurate_seek -y -probesize 32 -i - -bufsize 44M -acodec ${FMT} -threads 2 -vcodec libx264 -map 0:v:0 -map 0:a:0 -preset ultrafast -movflags +faststart -vsync 2 -f segment -segment_time $SEGMENT_TIME -reset_timestamps 1 /tmp/whisper-live_${MYPID}_buf%03d.avi &
-                FFMPEG_PID=$!
-            elif [[ "$YTDLP_FORCE" = "yt-dlp" ]]; then
+    if [[ -z "$SHARED_CAPTURE_SOURCE" ]]; then
+        case $URL in
+            pulse )
+                 filename_base="whisper-live_${MYPID}_buf%03d"
+                 filter_complex="[0:a]showspectrum=s=854x480:mode=separate:color=intensity:legend=disabled:fps=25,drawtext=fontfile=/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf:text='PID\: ${MYPID} | %{pts\:gmtime\:$(date +%s)\:%Y-%m-%d %H\\\\\:%M\\\\\:%S}':fontcolor=white:x=10:y=10"
+                 ffmpeg -loglevel quiet -y -f pulse -i "$AUDIO_INDEX" -filter_complex "$filter_complex" -c:v mjpeg -q:v 2 -c:a pcm_s16le -threads 2 -f segment -segment_time $SEGMENT_TIME -reset_timestamps 1 -segment_format avi /tmp/${filename_base}.avi &
+                 FFMPEG_PID=$!
+                 ;;
+             avfoundation )
+                 filename_base="whisper-live_${MYPID}_buf%03d"
+                 filter_complex="[0:a]showspectrum=s=854x480:mode=separate:color=intensity:legend=disabled:fps=25,drawtext=fontfile=/System/Library/Fonts/Supplemental/Arial.ttf:text='PID\: ${MYPID} | %{pts\:gmtime\:$(date +%s)\:%Y-%m-%d %H\\\\\:%M\\\\\:%S}':fontcolor=white:x=10:y=10"
+                 ffmpeg -loglevel quiet -y -f avfoundation -i :"${AUDIO_INDEX}" -filter_complex "$filter_complex" -c:v mjpeg -q:v 2 -c:a pcm_s16le -threads 2 -f segment -segment_time $SEGMENT_TIME -reset_timestamps 1 -segment_format avi /tmp/${filename_base}.avi &
+                 FFMPEG_PID=$!
+                 ;;
+            *youtube* | *youtu.be* )
                 if ! command -v yt-dlp &>/dev/null; then echo "yt-dlp is required" && exit 1; fi
                 ffmpeg -loglevel quiet -accurate_seek -y -probesize 32 -i $(yt-dlp -i -f b -g $URL) -bufsize 44M -acodec ${FMT} -threads 2 -vcodec libx264 -map 0:v:0 -map 0:a:0 -preset ultrafast -movflags +faststart -vsync 2 -f segment -segment_time $SEGMENT_TIME -reset_timestamps 1 /tmp/whisper-live_${MYPID}_buf%03d.avi &
                 FFMPEG_PID=$!
-            else
-                if [[ $QUALITY == "lower" ]]; then
-                    ffmpeg -loglevel quiet -accurate_seek -y -probesize 32 -i $URL -bufsize 44M -map_metadata 0 -map 0:v:0? -map 0:v:1? -map 0:v:2? -map 0:v:3? -map 0:v:4? -map 0:v:5? -map 0:v:6? -map 0:v:7? -map 0:v:8? -map 0:v:9? -map 0:a? -acodec ${FMT} -vcodec libx264 -threads 2 -preset ultrafast -movflags +faststart -vsync 2 -f segment -segment_time $SEGMENT_TIME -reset_timestamps 1 /tmp/whisper-live_${MYPID}_buf%03d.avi &
+                ;;
+            * )
+                if [[ "$STREAMLINK_FORCE" = "streamlink" || "$URL" = *twitch* ]]; then
+                    if ! command -v streamlink >/dev/null 2>&1; then echo "streamlink is required" && exit 1; fi
+                    streamlink $URL best -O 2>/dev/null | ffmpeg -loglevel quiet -accurate_seek -y -probesize 32 -i - -bufsize 44M -acodec ${FMT} -threads 2 -vcodec libx264 -map 0:v:0 -map 0:a:0 -preset ultrafast -movflags +faststart -vsync 2 -f segment -segment_time $SEGMENT_TIME -reset_timestamps 1 /tmp/whisper-live_${MYPID}_buf%03d.avi &
                     FFMPEG_PID=$!
-                else
-                    ffmpeg -loglevel quiet -accurate_seek -y -probesize 32 -i $URL -bufsize 44M -map_metadata 0 -map 0:v:9? -map 0:v:8? -map 0:v:7? -map 0:v:6? -map 0:v:5? -map 0:v:4? -map 0:v:3? -map 0:v:2? -map 0:v:1? -map 0:v:0? -map 0:a? -acodec ${FMT} -vcodec libx264 -threads 2 -preset ultrafast -movflags +faststart -vsync 2 -f segment -segment_time $SEGMENT_TIME -reset_timestamps 1 /tmp/whisper-live_${MYPID}_buf%03d.avi &
+                elif [[ "$YTDLP_FORCE" = "yt-dlp" ]]; then
+                    if ! command -v yt-dlp &>/dev/null; then echo "yt-dlp is required" && exit 1; fi
+                    ffmpeg -loglevel quiet -accurate_seek -y -probesize 32 -i $(yt-dlp -i -f b -g $URL) -bufsize 44M -acodec ${FMT} -threads 2 -vcodec libx264 -map 0:v:0 -map 0:a:0 -preset ultrafast -movflags +faststart -vsync 2 -f segment -segment_time $SEGMENT_TIME -reset_timestamps 1 /tmp/whisper-live_${MYPID}_buf%03d.avi &
                     FFMPEG_PID=$!
+                else
+                    if [[ $QUALITY == "lower" ]]; then
+                        ffmpeg -loglevel quiet -accurate_seek -y -probesize 32 -i $URL -bufsize 44M -map_metadata 0 -map 0:v:0? -map 0:v:1? -map 0:v:2? -map 0:v:3? -map 0:v:4? -map 0:v:5? -map 0:v:6? -map 0:v:7? -map 0:v:8? -map 0:v:9? -map 0:a? -acodec ${FMT} -vcodec libx264 -threads 2 -preset ultrafast -movflags +faststart -vsync 2 -f segment -segment_time $SEGMENT_TIME -reset_timestamps 1 /tmp/whisper-live_${MYPID}_buf%03d.avi &
+                        FFMPEG_PID=$!
+                    else
+                        ffmpeg -loglevel quiet -accurate_seek -y -probesize 32 -i $URL -bufsize 44M -map_metadata 0 -map 0:v:9? -map 0:v:8? -map 0:v:7? -map 0:v:6? -map 0:v:5? -map 0:v:4? -map 0:v:3? -map 0:v:2? -map 0:v:1? -map 0:v:0? -map 0:a? -acodec ${FMT} -vcodec libx264 -threads 2 -preset ultrafast -movflags +faststart -vsync 2 -f segment -segment_time $SEGMENT_TIME -reset_timestamps 1 /tmp/whisper-live_${MYPID}_buf%03d.avi &
+                        FFMPEG_PID=$!
+                    fi
                 fi
-            fi
-            ;;
-    esac
+                ;;
+        esac
+    fi
 
     arg='#EXTM3U'
   	x=0
@@ -1789,8 +2131,18 @@ if [[ $TIMESHIFT == "timeshift" ]] && [[ $LOCAL_FILE -eq 0 ]]; then
   	done
   	echo -e $arg > /tmp/playlist_whisper-live_${MYPID}.m3u
 
+    n=0; tbuf=0
+    if [[ -n "$SHARED_CAPTURE_SOURCE" ]]; then
+        # Join at the newest segment of the shared capture
+        for f in "$BUF_BASE"[0-9]*.avi; do
+            x=${f#"$BUF_BASE"}; x=${x%.avi}
+            if [[ "$x" =~ ^[0-9]+$ ]] && [ $((10#$x)) -gt $tbuf ]; then tbuf=$((10#$x)); fi
+        done
+    fi
+    abuf=$(printf "%03d" $tbuf); xbuf=$((tbuf+1)); nbuf=$(printf "%03d" $xbuf)
+
     max_wait_time=20
-    file_path="/tmp/whisper-live_${MYPID}_buf000.avi"
+    file_path="${BUF_BASE}${abuf}.avi"
     start_time=$(date +%s)
     while [ ! -f "$file_path" ]; do
         current_time=$(date +%s)
@@ -1802,12 +2154,12 @@ if [[ $TIMESHIFT == "timeshift" ]] && [[ $LOCAL_FILE -eq 0 ]]; then
     if [ -f "$file_path" ]; then
         if [[ "$PLAYER_ONLY" == "" ]]; then printf "Buffering audio. Please wait...\n\n"; fi
         sleep 20
-        ln -f -s /tmp/whisper-live_${MYPID}_buf000.avi /tmp/whisper-live_${MYPID}_0.avi
+        ln -f -s "$file_path" /tmp/whisper-live_${MYPID}_0.avi
     else
         printf "${ICON_ERROR} Error: ffmpeg failed to capture the stream\n" && exit 1
     fi
 
-    if ! ps -p $FFMPEG_PID > /dev/null; then printf "${ICON_ERROR} Error: ffmpeg failed to capture the stream\n" && exit 1; fi
+    if [[ -z "$SHARED_CAPTURE_SOURCE" ]] && ! ps -p $FFMPEG_PID > /dev/null; then printf "${ICON_ERROR} Error: ffmpeg failed to capture the stream\n" && exit 1; fi
 
     sleep 2
     if [[ $MPV_OPTIONS == "true" ]]; then
@@ -1821,20 +2173,20 @@ if [[ $TIMESHIFT == "timeshift" ]] && [[ $LOCAL_FILE -eq 0 ]]; then
     if [ -z "$VLC_PID" ]; then printf "${ICON_ERROR} Error: The player could not be executed.\n" && exit 1; fi
 
     set +e
-    n=0; tbuf=0; abuf="000"; xbuf=1; nbuf="001"
     FILEPLAYED=""; transcribed_until=0; segment_duration=0; last_pos=0
     TIMEPLAYED=0; tin=0
 
      while [ $RUNNING -eq 1 ]; do
-        if [ -f /tmp/whisper-live_${MYPID}_buf$nbuf.avi ]; then
-            mv -f /tmp/whisper-live_${MYPID}_buf$abuf.avi /tmp/whisper-live_${MYPID}_$n.avi
+        if [ -f "${BUF_BASE}$nbuf.avi" ]; then
+            # A shared segment stays where it is, the playlist entry already links to it
+            if [[ -z "$SHARED_CAPTURE_SOURCE" ]]; then mv -f "${BUF_BASE}$abuf.avi" /tmp/whisper-live_${MYPID}_$n.avi; fi
             if [ $n -eq $((SEGMENTS-1)) ]; then n=-1; fi
             tbuf=$((tbuf+1))
             if [ $tbuf -lt 10 ]; then abuf="00"$tbuf""; elif [ $tbuf -lt 100 ]; then abuf="0"$tbuf""; else abuf="$tbuf"; fi
             xbuf=$((xbuf+1))
             if [ $xbuf -lt 10 ]; then nbuf="00"$xbuf""; elif [ $xbuf -lt 100 ]; then nbuf="0"$xbuf""; else nbuf="$xbuf"; fi
             n=$((n+1))
-            ln -f -s /tmp/whisper-live_${MYPID}_buf$abuf.avi /tmp/whisper-live_${MYPID}_$n.avi
+            ln -f -s "${BUF_BASE}$abuf.avi" /tmp/whisper-live_${MYPID}_$n.avi
         fi
 
         vlc_check
@@ -1954,7 +2306,8 @@ if [[ $TIMESHIFT == "timeshift" ]] && [[ $LOCAL_FILE -eq 0 ]]; then
 
     pkill -f "^ffmpeg.*${MYPID}.*$"
     pkill -f "^${WHISPER_EXECUTABLE}.*${MYPID}.*$"
-    if [ -f "$TEMP_FILE" ]; then awk -v myport="$myport" '$0 !~ myport' "$TEMP_FILE" > temp_file.tmp && mv temp_file.tmp "$TEMP_FILE"; fi
+    release_port
+    release_shared_capture
 
 elif [[ $TIMESHIFT == "timeshift" ]] && [[ $LOCAL_FILE -eq 1 ]]; then # local video file with vlc
     if [[ "$PLAYER_ONLY" == "" ]]; then
@@ -2066,13 +2419,44 @@ elif [[ $TIMESHIFT == "timeshift" ]] && [[ $LOCAL_FILE -eq 1 ]]; then # local vi
 
         pkill -f "^ffmpeg.*${MYPID}.*$"
         pkill -f "^${WHISPER_EXECUTABLE}.*${MYPID}.*$"
-        if [ -f "$TEMP_FILE" ]; then awk -v myport="$myport" '$0 !~ myport' "$TEMP_FILE" > temp_file.tmp && mv temp_file.tmp "$TEMP_FILE"; fi
+        release_port
     else
       $MPV_OPTIONS "${URL}" &>/dev/null &
     fi
 
 elif [[ "$PLAYER_ONLY" == "" ]]; then # No timeshift
 
+    # The Python engine decodes the capture once and transcribes, translates, displays and speaks it in parallel stages
+    if [[ "$LIVE_ENGINE" == "engine" ]]; then
+        case "$WHISPER_EXECUTABLE" in
+            ./build/bin/whisper-cli | ./main | whisper-cpp | pwcpp )
+                if ! p4w_cli live --help >/dev/null 2>&1; then
+                    echo "${ICON_WARN} --live-engine needs Python 3 and playlist4whisper_cli.py, using the standard loop."
+                    LIVE_ENGINE=""
+                fi
+                ;;
+            * )
+                echo "${ICON_WARN} --live-engine needs a whisper.cpp executable, using the standard loop."
+                LIVE_ENGINE=""
+                ;;
+        esac
+    fi
+    if [[ -n "$SHARED_CAPTURE" ]]; then
+        if [[ "$LIVE_ENGINE" != "engine" ]] || [[ $QUALITY != "raw" ]] || [[ $LOCAL_FILE -eq 1 ]] || [[ $URL == "pulse" ]] || [[ $URL == "avfoundation" ]]; then
+            echo "${ICON_WARN} --shared-capture needs --live-engine with raw quality, or --timeshift, and a network stream; capturing it for this session only."
+        else
+            capture_method=""
+            [[ "$STREAMLINK_FORCE" == "streamlink" ]] && capture_method="--method streamlink"
+            [[ "$YTDLP_FORCE" == "yt-dlp" ]] && capture_method="--method yt-dlp"
+            SHARED_CAPTURE_SOURCE=$(p4w_cli capture subscribe "$URL" --pid "$MYPID" $capture_method)
+            if [[ -n "$SHARED_CAPTURE_SOURCE" ]]; then
+                echo "[+] Sharing the capture of this stream with the other sessions on it."
+            else
+                echo "${ICON_WARN} The shared capture did not start; capturing the stream for this session only."
+            fi
+        fi
+    fi
+
     if [[ $URL == "pulse" ]]; then
           ffmpeg -loglevel quiet -y -f pulse -i "$AUDIO_INDEX" /tmp/whisper-live_${MYPID}.${FMT} &
           FFMPEG_PID=$!
@@ -2238,6 +2622,10 @@ elif [[ "$PLAYER_ONLY" == "" ]]; then # No timeshift
             exit 1
         fi
 
+    elif [[ -n "$SHARED_CAPTURE_SOURCE" ]]; then
+        # Captured once for every session on the stream; only the player is this session's own
+        $MPV_OPTIONS $URL &>/dev/null &
+
     elif [[ $QUALITY == "raw" ]]; then
         case $URL in
             *youtube* | *youtu.be* )
@@ -2324,9 +2712,67 @@ elif [[ "$PLAYER_ONLY" == "" ]]; then # No timeshift
     # Cursor for continuous audio tracking to avoid gaps
     current_audio_cursor=0
 
+    if [[ "$CATCH_UP_LAG" == "auto" ]]; then
+        CATCH_UP_LAG=$((STEP_S * 3))
+    fi
+
+    # Step of the loop below, changed with --adaptive-step
+    live_step=$STEP_S
+    chunks_at_step=0
+    if [[ -n "$ADAPTIVE_STEP_MAX" ]]; then
+        [[ $live_step -lt $ADAPTIVE_STEP_MIN ]] && live_step=$ADAPTIVE_STEP_MIN
+        [[ $live_step -gt $ADAPTIVE_STEP_MAX ]] && live_step=$ADAPTIVE_STEP_MAX
+    fi
+
+    if [[ -n "$PIN_LANGUAGE" ]] && [[ "$LIVE_ENGINE" != "engine" ]]; then
+        echo "${ICON_WARN} --pin-language needs --live-engine, the language is detected for every chunk."
+    fi
+    if [[ -n "$PROVISIONAL_S" ]] && [[ "$LIVE_ENGINE" != "engine" ]]; then
+        echo "${ICON_WARN} --provisional needs --live-engine, only the final text is shown."
+    fi
+    if [[ -n "$OVERLAP_S" ]]; then
+        if [[ "$LIVE_ENGINE" != "engine" ]]; then
+            echo "${ICON_WARN} --overlap needs --live-engine, chunks do not overlap."
+            OVERLAP_S=""
+        elif [[ $OVERLAP_S -ge ${ADAPTIVE_STEP_MIN:-$STEP_S} ]]; then
+            echo "${ICON_WARN} --overlap must be shorter than the step, chunks do not overlap."
+            OVERLAP_S=""
+        fi
+    fi
+    if [[ "$LIVE_ENGINE" == "engine" ]]; then
+        GEMINI_API_KEY="$GEMINI_API_KEY" p4w_cli live "${SHARED_CAPTURE_SOURCE:-/tmp/whisper-live_${MYPID}.${FMT}}" --pid "$MYPID" --step "$STEP_S" \
+            --model "$MODEL" --language "$LANGUAGE" --executable "$WHISPER_EXECUTABLE" \
+            --output-text "$OUTPUT_TEXT" --trans-language "$TRANS_LANGUAGE" \
+            $([[ "$TRANSLATE" == "--translate" ]] && echo "--translate") \
+            $([[ -n "$WHISPER_SERVER_PORT" ]] && echo "--server-port $WHISPER_SERVER_PORT") \
+            $([[ $TRANS == "trans" ]] && echo "--trans") \
+            $([[ -n "$GEMINI_TRANS_MODEL" ]] && echo "--gemini-model $GEMINI_TRANS_MODEL --gemini-level $GEMINI_CONTEXT_LEVEL") \
+            $([[ $SPEAK == "speak" ]] && echo "--speak") \
+            $([[ "$VAD_SPLIT" == "vad" ]] && echo "--vad --vad-executable $VAD_EXECUTABLE --vad-model $VAD_MODEL_PATH") \
+            $([[ -n "$ADAPTIVE_STEP_MAX" ]] && echo "--min-step $ADAPTIVE_STEP_MIN --max-step $ADAPTIVE_STEP_MAX") \
+            $([[ -n "$CATCH_UP_LAG" ]] && echo "--max-lag $CATCH_UP_LAG") \
+            $([[ -n "$PIN_LANGUAGE" ]] && echo "--pin-language $PIN_LANGUAGE") \
+            $([[ -n "$OVERLAP_S" ]] && echo "--overlap $OVERLAP_S") \
+            $([[ -n "$PROVISIONAL_S" ]] && echo "--provisional $PROVISIONAL_S") \
+            --vad-marker "$VAD_CUT_MARKER"
+        # Ctrl+C stops the engine and ends the session
+        RUNNING=0
+    fi
+
     while [ $RUNNING -eq 1 ]; do
         
-        extract_duration=$STEP_S
+        extract_duration=$live_step
+
+        # With --catch-up, audio more than CATCH_UP_LAG seconds old is skipped, down to the last step
+        if [[ -n "$CATCH_UP_LAG" ]]; then
+            behind=$(printf "%.0f" "$(echo "$SECONDS - $current_audio_cursor" | bc -l)")
+            if [[ $behind -gt $CATCH_UP_LAG ]]; then
+                gap_message="[... $((behind - live_step))s skipped to catch up ...]"
+                echo "$gap_message"
+                echo "$gap_message" >> "/tmp/transcription-whisper-live_${MYPID}.txt"
+                current_audio_cursor=$((SECONDS - live_step))
+            fi
+        fi
         
         # Wait until the background recorder has written enough audio
         # Using SECONDS as reference for elapsed time
@@ -2365,14 +2811,36 @@ elif [[ "$PLAYER_ONLY" == "" ]]; then # No timeshift
         # Advance cursor by exactly the amount of audio we just processed
         current_audio_cursor=$(echo "$current_audio_cursor + $chunk_actual_duration" | bc -l)
 
+        # With --adaptive-step, the time from the end of the chunk to now is the time it took to
+        # transcribe it, plus any backlog: above 80% of the step whisper is not keeping up and the
+        # step grows by a quarter (fewer model loads per minute); below 40% it shrinks by a fifth.
+        # Two chunks are transcribed at each step before the next change.
+        if [[ -n "$ADAPTIVE_STEP_MAX" ]]; then
+            chunk_lag=$(printf "%.0f" "$(echo "$SECONDS - $current_audio_cursor" | bc -l)")
+            chunks_at_step=$((chunks_at_step + 1))
+            new_step=$live_step
+            if [[ $chunks_at_step -lt 2 ]]; then
+                :
+            elif [[ $((chunk_lag * 10)) -gt $((live_step * 8)) ]]; then
+                new_step=$((live_step + (live_step + 3) / 4))
+            elif [[ $((chunk_lag * 10)) -lt $((live_step * 4)) ]]; then
+                new_step=$((live_step - (live_step + 4) / 5))
+            fi
+            [[ $new_step -gt $ADAPTIVE_STEP_MAX ]] && new_step=$ADAPTIVE_STEP_MAX
+            [[ $new_step -lt $ADAPTIVE_STEP_MIN ]] && new_step=$ADAPTIVE_STEP_MIN
+            if [[ $new_step -ne $live_step ]]; then
+                echo "[+] Step ${live_step}s -> ${new_step}s (lag ${chunk_lag}s)" >&2
+                live_step=$new_step
+                chunks_at_step=0
+            fi
+        fi
+
     done
 
     pkill -f "^ffmpeg.*${MYPID}.*$"
     pkill -f "^${WHISPER_EXECUTABLE}.*${MYPID}.*$"
-    # Remove the used port from the temporary file
-    if [ -f "$TEMP_FILE" ]; then
-        awk -v myport="$MYPORT" '$0 !~ myport' "$TEMP_FILE" > temp_file.tmp && mv temp_file.tmp "$TEMP_FILE"
-    fi
+    release_port
+    release_shared_capture
 
 else
     if [[ $LOCAL_FILE -eq 0 ]] ; then
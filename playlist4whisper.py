@@ -43,9 +43,22 @@ import queue
 import threading
 import subprocess
 import tempfile
+import shlex
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, PhotoImage, scrolledtext
 from tkinter import font as tkfont
+from playlist4whisper_core import (
+    default_executable_option, default_terminal_option, default_bash_options, default_timeshiftactive_option,
+    default_timeshift_options, default_playeronly_option, default_player_option, default_mpv_options,
+    default_online_translation_option, default_trans_options, default_engine_model_option,
+    default_gemini_level_option,
+    whisper_executables, models, suffixes, model_list, lang_codes, model_inventory,
+    find_whisper_executable, find_quantize_executable, load_config_file, resolve_settings,
+    script_options, translation_options, read_playlist, write_playlist,
+    SubtitleJobQueue, subtitle_destination, subtitle_job_environment, ModelInstaller, parse_model_name,
+    ModelBenchmarks, ModelWarmer, default_warmup_option, default_server_option,
+    default_live_engine_option, default_catch_up_option, SessionGovernor, read_session_metrics
+)
 try:
     import imageio
     from PIL import Image, ImageTk
@@ -205,11 +218,7 @@ def perform_startup_checks(results_queue):
     """
     # --- Check for critical executables first ---
     # Uses the global 'whisper_executables' list
-    found_default_executable = None
-    for exe in whisper_executables:
-        if shutil.which(exe):
-            found_default_executable = exe
-            break
+    found_default_executable = find_whisper_executable()
 
     if found_default_executable is None:
         results_queue.put({"critical_error": "Whisper executable is required. The program cannot continue."})
@@ -227,12 +236,7 @@ def perform_startup_checks(results_queue):
     if not os.path.exists(models_dir):
         os.makedirs(models_dir)
 
-    found_quantize_executable = None
-    quantize_paths = ["./build/bin/whisper-quantize", "./build/bin/quantize", "./whisper-quantize", "./quantize"]
-    for path in quantize_paths:
-        if os.path.exists(path):
-            found_quantize_executable = path
-            break
+    found_quantize_executable = find_quantize_executable()
     if found_quantize_executable is None:
         print("Warning: quantize executable not found. Quantization will be skipped if attempted.")
 
@@ -258,57 +262,9 @@ def perform_startup_checks(results_queue):
 
 # Default options
 rPadChars = 75
-default_executable_option = "./build/bin/whisper-cli"
-default_terminal_option = "xterm"
-default_bash_options = "9 base auto vad raw"
-default_timeshiftactive_option = False
-default_timeshift_options = "6 4 10"
-default_playeronly_option = False
-default_player_option = "mpv"
-default_mpv_options = ""
-default_online_translation_option = False
-default_trans_options = "en both speak"
-default_override_option = False
-default_engine_model_option = "Google Translate"
-default_gemini_api_key = ""
-default_gemini_model = "gemini-3-flash-preview"
-default_gemini_level_option = "2"
-
-# Array of executable names in priority order
-whisper_executables = ["./build/bin/whisper-cli", "./main", "whisper-cpp", "pwcpp", "whisper"]
-
 terminal = ["gnome-terminal", "konsole", "lxterm", "mate-terminal", "mlterm", "xfce4-terminal", "xterm"]
 player = ["none", "smplayer", "mpv"]
 gemini_models = ["gemini-3.1-pro-preview", "gemini-3.1-flash-lite-preview", "gemini-3-flash-preview", "gemini-2.5-pro", "gemini-2.5-flash", "gemini-2.5-flash-lite", "gemma-3-27b-it", "gemma-3-12b-it", "gemma-3-4b-it"]
-models = ["tiny.en", "tiny", "base.en", "base", "small.en", "small", "medium.en", "medium", "large-v1", "large-v2", "large-v3", "large-v3-turbo"]
-suffixes = ["-q2_k", "-q3_k", "-q4_0", "-q4_1", "-q4_k", "-q5_0", "-q5_1", "-q5_k", "-q6_k", "-q8_0"]
-model_path = "./models/ggml-{}.bin"
-model_list = models + [model + suffix for model in models for suffix in suffixes]
-
-lang_codes = {'auto': 'Autodetect', 'af': 'Afrikaans', 'am': 'Amharic', 'ar': 'Arabic', 'as': 'Assamese',
-            'az': 'Azerbaijani', 'ba': 'Bashkir', 'be': 'Belarusian', 'bg': 'Bulgarian', 'bn': 'Bengali',
-            'bo': 'Tibetan', 'br': 'Breton', 'bs': 'Bosnian', 'ca': 'Catalan', 'cs': 'Czech', 'cy': 'Welsh',
-            'da': 'Danish', 'de': 'German', 'el': 'Greek', 'en': 'English', 'eo': 'Esperanto', 'es': 'Spanish',
-            'et': 'Estonian', 'eu': 'Basque', 'fa': 'Persian', 'fi': 'Finnish', 'fo': 'Faroese',
-            'fr': 'French', 'ga': 'Irish', 'gl': 'Galician', 'gu': 'Gujarati', 'ha': 'Hausa',
-            'haw': 'Hawaiian', 'he': 'Hebrew', 'hi': 'Hindi', 'hr': 'Croatian', 'ht': 'Haitian Creole',
-            'hu': 'Hungarian', 'hy': 'Armenian', 'id': 'Indonesian', 'is': 'Icelandic', 'it': 'Italian',
-            'ja': 'Japanese', 'jw': 'Javanese', 'ka': 'Georgian', 'kk': 'Kazakh',
-            'km': 'Khmer', 'kn': 'Kannada', 'ko': 'Korean', 'ku': 'Kurdish', 'ky': 'Kyrgyz',
-            'la': 'Latin', 'lb': 'Luxembourgish', 'ln': 'Lingala', 'lo': 'Lao', 'lt': 'Lithuanian',
-            'lv': 'Latvian', 'mg': 'Malagasy', 'mi': 'Maori', 'mk': 'Macedonian', 'ml': 'Malayalam',
-            'mn': 'Mongolian', 'mr': 'Marathi', 'ms': 'Malay', 'mt': 'Maltese', 'my': 'Myanmar',
-            'ne': 'Nepali', 'nl': 'Dutch', 'nn': 'Nynorsk', 'no': 'Norwegian', 'oc': 'Occitan',
-            'or': 'Oriya', 'pa': 'Punjabi', 'pl': 'Polish', 'ps': 'Pashto', 'pt': 'Portuguese',
-            'ro': 'Romanian', 'ru': 'Russian', 'sa': 'Sanskrit', 'sd': 'Sindhi',
-            'sh': 'Serbo-Croatian', 'si': 'Sinhala', 'sk': 'Slovak', 'sl': 'Slovenian',
-            'sn': 'Shona', 'so': 'Somali', 'sq': 'Albanian', 'sr': 'Serbian',
-            'su': 'Sundanese', 'sv': 'Swedish', 'sw': 'Swahili', 'ta': 'Tamil',
-            'te': 'Telugu', 'tg': 'Tajik', 'th': 'Thai', 'tl': 'Tagalog',
-            'tk': 'Turkmen', 'tr': 'Turkish', 'tt': 'Tatar', 'ug': 'Uighur',
-            'uk': 'Ukrainian', 'ur': 'Urdu', 'uz': 'Uzbek', 'vi': 'Vietnamese',
-            'vo': 'Volapuk', 'wa': 'Walloon', 'xh': 'Xhosa', 'yi': 'Yiddish',
-            'yo': 'Yoruba', 'zh': 'Chinese', 'zu': 'Zulu'}
 
 regions = {
         "Africa": ["af", "am", "ar", "ha", "sn", "so", "sw", "yo", "xh", "zu"],
@@ -331,6 +287,10 @@ terminal_installed = []
 player_installed = []
 default_executable = None
 quantize_executable = None
+subtitle_job_queue = None
+model_installer = None
+model_benchmarks = ModelBenchmarks()
+model_warmer = ModelWarmer()
 # These texts will be set dynamically once checks are complete
 options_frame1_text = "Checking for translate-shell..."
 options_frame3_text = "Checking for VLC player..."
@@ -1788,6 +1748,166 @@ class MergeLanguageSelectionDialog(tk.Toplevel):
         self.geometry(f'+{int(x)}+{int(y)}')
 
 
+class SubtitleJobsDialog(tk.Toplevel):
+    """
+    Shows the batch subtitle queue: one row per file with its status, attempts and ETA.
+    The list refreshes every second; the queue itself runs in a background thread.
+    """
+    def __init__(self, master, job_queue):
+        super().__init__(master)
+        self.transient(master)
+        self.title("Subtitle Jobs")
+        self.job_queue = job_queue
+
+        columns = ("file", "model", "status", "attempts")
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=12)
+        for column, heading, width in zip(columns, ("File", "Model", "Status", "Attempts"), (380, 110, 200, 70)):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor=tk.W)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+
+        self.summary_label = tk.Label(self, text="", anchor=tk.W)
+        self.summary_label.pack(fill=tk.X, padx=10)
+
+        button_frame = tk.Frame(self)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        tk.Button(button_frame, text="Retry", command=self.retry_selected).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Cancel Job", command=self.cancel_selected).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Clear Finished", command=self.clear_finished).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Close", command=self.destroy).pack(side=tk.RIGHT, padx=5)
+
+        self.refresh()
+
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+        jobs = self.job_queue.snapshot()
+        selected = set(self.tree.selection())
+        self.tree.delete(*self.tree.get_children())
+        for job in jobs:
+            iid = str(job["id"])
+            self.tree.insert("", tk.END, iid=iid, values=(os.path.basename(job["url"]), job["model"],
+                                                         self.job_queue.describe(job), job["attempts"]))
+            if iid in selected:
+                self.tree.selection_add(iid)
+
+        pending = sum(1 for job in jobs if job["state"] in ("queued", "running"))
+        running = sum(1 for job in jobs if job["state"] == "running")
+        summary = f"{running} running, {pending - running} queued"
+        if pending:
+            eta = self.job_queue.batch_eta()
+            if eta:
+                summary += f" - batch ETA {int(eta // 60)} min"
+        self.summary_label.config(text=summary)
+        self.after(1000, self.refresh)
+
+    def selected_ids(self):
+        return [int(iid) for iid in self.tree.selection()]
+
+    def retry_selected(self):
+        for job_id in self.selected_ids():
+            self.job_queue.retry(job_id)
+
+    def cancel_selected(self):
+        for job_id in self.selected_ids():
+            self.job_queue.cancel(job_id)
+
+    def clear_finished(self):
+        self.job_queue.clear_finished()
+
+
+class SessionLatencyDialog(tk.Toplevel):
+    """
+    Shows the percentiles of the time each stage of the running live engine sessions takes per
+    chunk, and of the lag behind the audio when it is done, from their metrics files. Refreshes
+    every two seconds.
+    """
+    def __init__(self, master):
+        super().__init__(master)
+        self.transient(master)
+        self.title("Session Latency")
+
+        columns = ("session", "stage", "chunks", "p50", "p95", "p99", "lag_p50", "lag_p95", "lag_p99")
+        headings = ("Session", "Stage", "Chunks", "Time p50", "p95", "p99", "Lag p50", "p95", "p99")
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=14)
+        for column, heading, width in zip(columns, headings, (80, 90, 60, 75, 65, 65, 75, 65, 65)):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor=tk.W if column in ("session", "stage") else tk.E)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+
+        self.summary_label = tk.Label(self, text="", anchor=tk.W)
+        self.summary_label.pack(fill=tk.X, padx=10)
+        tk.Button(self, text="Close", command=self.destroy).pack(side=tk.RIGHT, padx=10, pady=10)
+
+        self.refresh()
+
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+        metrics = read_session_metrics()
+        self.tree.delete(*self.tree.get_children())
+        for pid, session in sorted(metrics.items()):
+            for stage, stats in session["stages"].items():
+                busy, lag = stats["busy"], stats["lag"]
+                if not lag["count"]:
+                    continue
+                times = [f"{busy[key]:.2f}s" if busy["count"] else "-" for key in ("p50", "p95", "p99")]
+                self.tree.insert("", tk.END, values=(pid, stage, lag["count"], *times,
+                                                     *(f"{lag[key]:.2f}s" for key in ("p50", "p95", "p99"))))
+        if metrics:
+            self.summary_label.config(text=", ".join(f"{pid}: lag {session['lag']:.0f}s, {session['chunks']} chunks"
+                                                     for pid, session in sorted(metrics.items())))
+        else:
+            self.summary_label.config(text="No live engine session running (Engine in the Performance frame).")
+        self.after(2000, self.refresh)
+
+
+class ModelInstallDialog(tk.Toplevel):
+    """
+    Non-modal progress window for one model installation running in the background.
+    Several can be open at once; 'on_finished(job)' is called in the Tk thread at the end.
+    """
+    def __init__(self, master, job, on_finished):
+        super().__init__(master)
+        self.transient(master)
+        self.title("Model Installation")
+        self.resizable(False, False)
+        self.job = job
+        self.on_finished = on_finished
+
+        message = f"Installing {job.model} model. Please note that the model will be installed may not be optimized for an accelerated version of Whisper-cpp."
+        tk.Label(self, text=message, wraplength=550, justify="left").pack(padx=20, pady=(20, 10))
+        self.progress = ttk.Progressbar(self, length=550, mode="determinate", maximum=100)
+        self.progress.pack(padx=20)
+        self.status_label = tk.Label(self, text=job.message, anchor=tk.W)
+        self.status_label.pack(fill=tk.X, padx=20, pady=5)
+        self.cancel_button = tk.Button(self, text="Cancel", command=self.job.cancel)
+        self.cancel_button.pack(pady=(0, 15))
+        self.protocol("WM_DELETE_WINDOW", self.withdraw)  # Keeps following the job
+
+        self.poll()
+
+    def poll(self):
+        job = self.job
+        if job.progress is None and not job.finished:
+            if self.progress.cget("mode") != "indeterminate":
+                self.progress.configure(mode="indeterminate")
+                self.progress.start(15)
+        else:
+            self.progress.stop()
+            self.progress.configure(mode="determinate", value=(job.progress or 0) * 100)
+        status = job.message
+        if job.progress is not None and not job.finished:
+            status += f" {int(job.progress * 100)}%"
+        self.status_label.config(text=status)
+
+        if job.finished:
+            self.destroy()
+            self.on_finished(job)
+        else:
+            self.after(300, self.poll)
+
+
 def setup_external_drop(tree_widget, insert_fn):
     """
     Register *tree_widget* as an external drop target (files from the file manager).
@@ -1853,6 +1973,9 @@ class M3uPlaylistPlayer(tk.Frame):
         self.list_number = 0
         self.playlist = []
         self.subtitles = ""
+        self.skip_existing_subtitles = False
+        self.queued_subtitle_jobs = 0
+        self.queued_subtitle_model = "base"
         self.selected_model_old = ""
         self._dragging_item = None  # new attribute for drag-and-drop
         self.create_widgets()
@@ -1995,8 +2118,9 @@ class M3uPlaylistPlayer(tk.Frame):
         self.model = tk.StringVar(value="base")
         self.model_option_menu = tk.Menubutton(self.model_frame, textvariable=self.model, width=8, anchor="w", indicatoron=True, relief="raised")
         self.model_option_menu.pack(side=tk.LEFT)
-        self.model_menu = tk.Menu(self.model_option_menu, tearoff=0)
+        self.model_menu = tk.Menu(self.model_option_menu, tearoff=0, postcommand=self.refresh_model_menu)
         self.model_option_menu.configure(menu=self.model_menu)
+        self.model_menu_entries = {}  # model -> (cascade menu, index, label shown)
         self.update_model_menu()
 
         # Language
@@ -2373,8 +2497,79 @@ class M3uPlaylistPlayer(tk.Frame):
         self.merge_subs_button = tk.Button(self.options_frame6, text="Merge Subs", command=self.merge_subtitles, padx=4)
         self.merge_subs_button.pack(side=tk.LEFT)
 
+        self.subtitle_jobs_button = tk.Button(self.options_frame6, text="Jobs", command=self.show_subtitle_jobs, padx=4)
+        self.subtitle_jobs_button.pack(side=tk.LEFT)
+
+        self.options_frame7 = tk.LabelFrame(self.container_frame, text="Performance", padx=3, pady=2)
+        self.options_frame7.pack(side=tk.LEFT, expand=True, padx=4, pady=2)
+
+        self.warmup_label = tk.Label(self.options_frame7, text="Warmup", padx=4)
+        self.warmup_label.pack(side=tk.LEFT)
+        self.warmup = tk.BooleanVar(value=default_warmup_option)
+        self.warmup_checkbox = tk.Checkbutton(self.options_frame7, variable=self.warmup, onvalue=True, offvalue=False, command=self.change_warmup)
+        self.warmup_checkbox.pack(side=tk.LEFT)
+
+        self.server_label = tk.Label(self.options_frame7, text="Server", padx=4)
+        self.server_label.pack(side=tk.LEFT)
+        self.server = tk.BooleanVar(value=default_server_option)
+        self.server_checkbox = tk.Checkbutton(self.options_frame7, variable=self.server, onvalue=True, offvalue=False,
+                                              command=lambda: self.set_tab_option("server_option", self.server.get()))
+        self.server_checkbox.pack(side=tk.LEFT)
+
+        self.live_engine_label = tk.Label(self.options_frame7, text="Engine", padx=4)
+        self.live_engine_label.pack(side=tk.LEFT)
+        self.live_engine = tk.BooleanVar(value=default_live_engine_option)
+        self.live_engine_checkbox = tk.Checkbutton(self.options_frame7, variable=self.live_engine, onvalue=True, offvalue=False,
+                                                   command=lambda: self.set_tab_option("live_engine_option", self.live_engine.get()))
+        self.live_engine_checkbox.pack(side=tk.LEFT)
+
+        self.catch_up_label = tk.Label(self.options_frame7, text="Catch up", padx=4)
+        self.catch_up_label.pack(side=tk.LEFT)
+        self.catch_up = tk.BooleanVar(value=default_catch_up_option)
+        self.catch_up_checkbox = tk.Checkbutton(self.options_frame7, variable=self.catch_up, onvalue=True, offvalue=False,
+                                                command=lambda: self.set_tab_option("catch_up_option", self.catch_up.get()))
+        self.catch_up_checkbox.pack(side=tk.LEFT)
 
+        self.latency_button = tk.Button(self.options_frame7, text="Latency", command=self.show_session_latency, padx=4)
+        self.latency_button.pack(side=tk.LEFT)
 
+        self.threads_label = tk.Label(self.options_frame7, text="Threads -", padx=4)
+        self.threads_label.pack(side=tk.LEFT)
+        self.refresh_threads()
+
+
+
+
+    def set_tab_option(self, key, value):
+        # Performance options are tab settings, like the API key; not stored per channel
+        self.load_config()
+        self.current_options[key] = value
+        self.save_config()
+
+    def refresh_threads(self):
+        # Thread budget the resource governor would give a session of this tab started now
+        if not self.winfo_exists():
+            return
+        governor = SessionGovernor()
+        threads, running = governor.preview(self.model.get(), self.executable.get())
+        text = f"Threads {threads}" + (f" ({running} running)" if running else "")
+        # Lag of the live engine sessions, and whether one is catching up
+        states = [state for state in governor.states().values() if "lag" in state]
+        if states:
+            lags = [state["lag"] for state in states]
+            catching_up = sum(1 for state in states if state.get("catch_up"))
+            text += f"  Lag {max(lags):.0f}s" + (f" ({catching_up} catching up)" if catching_up else "")
+        self.threads_label.config(text=text)
+        self.after(5000, self.refresh_threads)
+
+    def change_warmup(self):
+        self.set_tab_option("warmup_option", self.warmup.get())
+        self.warm_model()
+
+    def warm_model(self):
+        # Reads the selected model into the page cache so the first chunks do not wait for the disk
+        if self.warmup.get() and self.executable.get() != "whisper" and self.model.get() in self.models_installed:
+            model_warmer.warm(self.model.get())
 
     def set_status(self, message, kind="warning"):
         # Display a persistent status message. kind="warning" = amber, kind="ok" = green.
@@ -2436,260 +2631,104 @@ class M3uPlaylistPlayer(tk.Frame):
         if filename is None:
             filename = f'playlist_{self.spec}.m3u'
         try:
-            with open(filename, "r", encoding='utf-8') as file:
-                lines = file.readlines()
-
-            for i, line in enumerate(lines):
-                if line.startswith("#EXTINF"):
-                    name = line[line.rfind(",") + 1:].strip()
-                    url = None
-
-                    for j in range(i + 1, len(lines)):
-                        url_line = lines[j].strip()
-                        if url_line and not url_line.startswith("#"):
-                            url = url_line
-                            break
-
-                    if url:
-                        list_number = len(self.playlist) + 1
-                        self.tree.insert("", "end", values=(list_number, name, url))
-                        self.playlist.append((name, url))
+            for name, url in read_playlist(filename):
+                list_number = len(self.playlist) + 1
+                self.tree.insert("", "end", values=(list_number, name, url))
+                self.playlist.append((name, url))
         except FileNotFoundError:
             err_message = ("File Not Found", f"The default playlist_{self.spec}.m3u file was not found.")
             self.error_messages.put(err_message)
 
 
     def update_installed_models(self):
-        self.models_installed = []
-
-        if self.executable == "whisper":
+        if self.executable.get() == "whisper":
             self.models_installed = models
         else:
-            for model in models:
-                if os.path.exists(model_path.format(model)):
-                    self.models_installed.append(model)
-                for suffix in suffixes:
-                    full_model_name = f"{model}{suffix}"
-                    if os.path.exists(model_path.format(full_model_name)):
-                        self.models_installed.append(full_model_name)
-
+            self.models_installed = model_inventory.installed()
+
+    def model_menu_key(self):
+        # Everything the menu labels depend on
+        return (model_inventory.generation, self.executable.get(), self.step_s.get(), model_benchmarks.stamp())
+
+    def refresh_model_menu(self):
+        # Called when the menu is opened: one stat() of ./models unless something changed there
+        model_inventory.refresh()
+        if self.model_menu_shown != self.model_menu_key():
+            self.update_installed_models()
+            self.update_model_menu()
+
+    def model_menu_label(self, model_name, installed, result=None, recommended=False):
+        label = f"{model_name}*" if installed else model_name
+        if installed and result:
+            # Measured by 'playlist4whisper_cli.py benchmark'
+            label += f"  {result['rtf']:.2f}x RTF"
+        return label + "  \u2713" if recommended else label
 
     def update_model_menu(self):
-        self.model_menu.delete(0, tk.END)
-
         default_fg = tk.Label().cget("fg")
         disabled_fg = tk.Label().cget("disabledforeground")
+        installed = set(self.models_installed)
+        self.model_menu_shown = self.model_menu_key()
+        try:
+            step = int(self.step_s.get())
+        except ValueError:
+            step = int(default_bash_options.split()[0])
+        results = model_benchmarks.results(self.executable.get(), step)
+        recommended = model_benchmarks.recommend(self.executable.get(), step, installed=installed)
 
-        for model in models:
-            suffix_menu = tk.Menu(self.model_menu, tearoff=0)
-            model_installed = model in self.models_installed
-
-            suffix_menu.add_radiobutton(
-                label=f"{model}*" if model_installed else model,
-                value=model,
-                variable=self.model,
-                command=self.update_model_button,
-                state="normal",
-                foreground=default_fg if model_installed else disabled_fg,
-                activeforeground=default_fg if model_installed else disabled_fg,
-                activebackground="white",
-            )
-
-            for suffix in suffixes:
-                full_model_name = f"{model}{suffix}"
-                model_suffix_installed = full_model_name in self.models_installed
-
-                suffix_menu.add_radiobutton(
-                    label=f"{full_model_name}*" if model_suffix_installed else full_model_name,
-                    value=full_model_name,
-                    variable=self.model,
-                    command=self.update_model_button,
-                    state="normal",
-                    foreground=default_fg if model_suffix_installed else disabled_fg,
-                    activeforeground=default_fg if model_suffix_installed else disabled_fg,
-                    activebackground="white",
-                )
-
-            self.model_menu.add_cascade(label=model, menu=suffix_menu)
+        if not self.model_menu_entries:
+            # Built once; later updates only reconfigure the entries that changed
+            for model in models:
+                suffix_menu = tk.Menu(self.model_menu, tearoff=0)
+                for index, full_model_name in enumerate([model] + [f"{model}{suffix}" for suffix in suffixes]):
+                    suffix_menu.add_radiobutton(
+                        label=full_model_name,
+                        value=full_model_name,
+                        variable=self.model,
+                        command=self.update_model_button,
+                        state="normal",
+                        activebackground="white",
+                    )
+                    self.model_menu_entries[full_model_name] = (suffix_menu, index, None)
+                self.model_menu.add_cascade(label=model, menu=suffix_menu)
+
+        for full_model_name, (suffix_menu, index, shown) in self.model_menu_entries.items():
+            label = self.model_menu_label(full_model_name, full_model_name in installed,
+                                          results.get(full_model_name), full_model_name == recommended)
+            if label == shown:
+                continue
+            color = default_fg if full_model_name in installed else disabled_fg
+            suffix_menu.entryconfigure(index, label=label, foreground=color, activeforeground=color)
+            self.model_menu_entries[full_model_name] = (suffix_menu, index, label)
 
         self.model_option_menu.grab_release()
 
     def install_model(self, model_name):
-        terminal = self.terminal.get()
-
-        if quantize_executable:  # Check if quantize_executable is not None
-            try:
-                base_model, suffix = self.parse_model_name(model_name)
-
-                if terminal == "gnome-terminal" and subprocess.run(["gnome-terminal", "--version"]).returncode == 0:
-                    if suffix:
-                        subprocess.Popen(["gnome-terminal", "--tab", "--", "/bin/bash", "-c", f"make {base_model}; {quantize_executable} ./models/ggml-{base_model}.bin ./models/ggml-{model_name}.bin {suffix.lstrip('-')}; exit"])
-                    else:
-                        subprocess.Popen(["gnome-terminal", "--tab", "--", "/bin/bash", "-c", f"make {model_name}; exit"])
-
-                elif terminal == "konsole" and subprocess.run(["konsole", "--version"]).returncode == 0:
-                    if suffix:
-                        script_content = f"""\
-                                        make {base_model}
-                                        {quantize_executable} ./models/ggml-{base_model}.bin ./models/ggml-{model_name}.bin {suffix.lstrip('-')}
-                                        """
-                    else:
-                        script_content = f"make {model_name}"
-                    subprocess.Popen(["konsole", "-e", f"bash -c '{script_content}'"])
-
-                elif terminal == "lxterm" and subprocess.run(["lxterm", "-version"]).returncode == 0:
-                    if suffix:
-                        subprocess.Popen(["lxterm", "-e", "bash", "-c", f"make {base_model}; {quantize_executable} ./models/ggml-{base_model}.bin ./models/ggml-{model_name}.bin {suffix.lstrip('-')}"])
-                    else:
-                        subprocess.Popen(["lxterm", "-e", "bash", "-c", f"make {model_name}"])
-
-                elif terminal == "mate-terminal" and subprocess.run(["mate-terminal", "--version"]).returncode == 0:
-                    if suffix:
-                        script_content = f"""\
-                                        make {base_model}
-                                        {quantize_executable} ./models/ggml-{base_model}.bin ./models/ggml-{model_name}.bin {suffix.lstrip('-')}
-                                        """
-                    else:
-                        script_content = f"make {model_name}"
-
-                    subprocess.Popen(["mate-terminal", "-e", f"bash -c '{script_content}'"])
-                elif terminal == "mlterm":
-                    result = subprocess.run(["mlterm", "--version"], capture_output=True, text=True)
-                    mlterm_output = result.stdout
-                    if "mlterm" in mlterm_output:
-                        if suffix:
-                            script_content = f"""\
-                                            bash -c '
-                                            make {base_model}
-                                            {quantize_executable} ./models/ggml-{base_model}.bin ./models/ggml-{model_name}.bin {suffix.lstrip('-')}'
-                                            """
-                        else:
-                            script_content = f"""\
-                                            bash -c '
-                                            make {model_name}'
-                                            """
-                        subprocess.Popen(["bash", "-c", f"mlterm -e {script_content}"])
-
-
-                elif terminal == "xfce4-terminal" and subprocess.run(["xfce4-terminal", "--version"]).returncode == 0:
-                    if suffix:
-                        script_content = f"""\
-                                        make {base_model}
-                                        {quantize_executable} ./models/ggml-{base_model}.bin ./models/ggml-{model_name}.bin {suffix.lstrip('-')}
-                                        """
-                    else:
-                        script_content = f"make {model_name}"
-
-                    subprocess.Popen(["xfce4-terminal", "-x", "bash", "-c", script_content])
-
-                elif terminal == "xterm" and subprocess.run(["xterm", "-version"]).returncode == 0:
-                    if suffix:
-                        script_content = f"""\
-                                        make {base_model}
-                                        {quantize_executable} ./models/ggml-{base_model}.bin ./models/ggml-{model_name}.bin {suffix.lstrip('-')}
-                                        """
-                    else:
-                        script_content = f"make {model_name}"
-
-                    subprocess.Popen(["xterm", "-e", "bash", "-c", script_content])
-
-                else:
-                    err_message = "No compatible terminal found."
-                    print(err_message)
-                    messagebox.showerror("Error", err_message)
-
-                root = tk.Toplevel(self.master)
-                root.title("Model Installation")
-                root.transient(self.master)
-                root.grab_set()
-                root.focus_force()
-                root.resizable(False, False)
-                root.attributes('-topmost', False)
-
-                root.update_idletasks()
-                width = 600
-                height = 100
-                x = (root.winfo_screenwidth() // 2) - (width // 2)
-                y = (root.winfo_screenheight() // 2) - (height // 2)
-                root.geometry('{}x{}+{}+{}'.format(width, height, x, y))
-
-                message = f"Installing {model_name} model. Please note that the model will be installed may not be optimized for an accelerated version of Whisper-cpp. Please wait..."
-                label = tk.Label(root, text=message, wraplength=550, justify="left")
-                label.pack(padx=20, pady=20)
-
-                root.update()
-                time.sleep(5)
-                # Get the PIDs of all processes containing the command "make {base_model}"
-                process_ids = self.find_make_model_processes(base_model)
-
-                # Wait for all found processes to finish
-                if process_ids:
-                    self.wait_for_process_completion(process_ids, f"make {base_model}")
-                else:
-                    print("No processes found to wait for.")
-
-
-                root.grab_release()
-                root.destroy()
-
-
-            except OSError as e:
-                print("Error executing command:", e)
-                messagebox.showerror("Error", "Error executing command.")
-        else:
+        # Runs in the background; the dialog follows the job and on_model_installed finishes the selection
+        global model_installer
+        if model_installer is None:
+            model_installer = ModelInstaller(quantize_executable)
+        base_model, suffix = parse_model_name(model_name)
+        if suffix and not quantize_executable:
             err_message = "Quantize executable does not exist."
             print(err_message)
             messagebox.showerror("Error", err_message)
+            return
+        job = model_installer.install(model_name)
+        ModelInstallDialog(self.master, job, self.on_model_installed)
 
-
-    def find_make_model_processes(self, base_model):
-        try:
-            result = subprocess.run(["ps", "x"], capture_output=True, text=True)
-            process_ids = []
-            for line in result.stdout.split("\n"):
-                columns = line.split()
-                if len(columns) > 4:
-                    command = columns[4:]
-                    full_command = ' '.join(command)
-                    if f"make {base_model}" in full_command:
-                        pid = columns[0]
-                        process_ids.append(pid)
-            return process_ids
-        except Exception as e:
-            print(f"Error finding 'make {base_model}' processes: {e}")
-            return []
-
-    def wait_for_process_completion(self, pids, process_name):
-        timeout = 5
-        for pid in pids:
-            while True:
-                time.sleep(1)
-                try:
-                    check_pid = subprocess.run(["ps", "-p", str(pid), "-o", "command"], capture_output=True, text=True, timeout=timeout).stdout.strip()
-                    if process_name not in check_pid:
-                        print(f"Process {pid} has finished.")
-                        break
-                except subprocess.TimeoutExpired:
-                    print(f"Process {pid} ({process_name}) has finished (timeout expired).")
-                    break
-
-
-    def parse_model_name(self, model_name):
-        suffix = ""
-        if model_name in models:
-            base_model = model_name
-        else:
-            for model in models:
-                for sfx in suffixes:
-                    full_model_name = f"{model}{sfx}"
-                    if full_model_name == model_name:
-                        base_model = model
-                        suffix = sfx
-                        break
-                if suffix:
-                    break
-
-        return base_model, suffix
+    def on_model_installed(self, job):
+        self.update_installed_models()
+        self.update_model_menu()
+        if job.state == "done":
+            self.model.set(job.model)
+            self.model_option_menu.configure(text=job.model)
+            self.save_options()
+            print(job.message)
+            messagebox.showinfo("Model Installed", job.message)
+        elif job.state == "failed":
+            print(job.message)
+            messagebox.showerror("Error", job.message)
 
 
     def update_model_button(self):
@@ -2700,26 +2739,11 @@ class M3uPlaylistPlayer(tk.Frame):
                                             icon='warning',
                                             type='yesnocancel',
                                             default='yes')
+            # Keep the current model until the installation has finished
+            self.model_option_menu.configure(text=self.selected_model_old)
+            self.model.set(self.selected_model_old)
             if action == 'yes':
                 self.install_model(selected_option)
-                self.update_installed_models()
-                self.update_model_menu()
-
-                if os.path.exists(model_path.format(selected_option)):
-                    self.model_option_menu.configure(text=selected_option)
-                    self.save_options()
-                    err_message = f"Successfully installed {selected_option} model."
-                    print(err_message)
-                    messagebox.showinfo("Model Installed", err_message)
-                else:
-                    self.model_option_menu.configure(text=self.selected_model_old)
-                    self.model.set(self.selected_model_old)
-                    err_message = f"The model {selected_option} could not be installed."
-                    print(err_message)
-                    messagebox.showerror("Error", err_message)
-            else:
-                self.model_option_menu.configure(text=self.selected_model_old)
-                self.model.set(self.selected_model_old)
 
         else:
             self.model_option_menu.configure(text=selected_option)
@@ -2740,6 +2764,10 @@ class M3uPlaylistPlayer(tk.Frame):
         trans_options = self.current_options.get("trans_options", default_trans_options)
         engine_model_option = self.current_options.get("engine_model_option", default_engine_model_option)
         gemini_level_option = self.current_options.get("gemini_level_option", default_gemini_level_option)
+        self.warmup.set(self.current_options.get("warmup_option", default_warmup_option))
+        self.server.set(self.current_options.get("server_option", default_server_option))
+        self.live_engine.set(self.current_options.get("live_engine_option", default_live_engine_option))
+        self.catch_up.set(self.current_options.get("catch_up_option", default_catch_up_option))
 
         # Reset all frames to black border
         for frame in [self.executable_frame, self.terminal_frame, self.step_frame, self.model_frame, self.language_frame,
@@ -2857,97 +2885,9 @@ class M3uPlaylistPlayer(tk.Frame):
         self.gemini_level_option_menu.config(text=gemini_level_option)
 
     def get_resolved_settings_for_url(self, url):
-        # 1. Base Global Options
-        opts = {
-            "executable": self.current_options.get("executable_option", default_executable_option),
-            "terminal": self.current_options.get("terminal_option", default_terminal_option),
-            "bash_options": self.current_options.get("bash_options", default_bash_options),
-            "playeronly": self.current_options.get("playeronly_option", default_playeronly_option),
-            "player": self.current_options.get("player_option", default_player_option),
-            "mpv_options": self.current_options.get("mpv_options", default_mpv_options),
-            "timeshiftactive": self.current_options.get("timeshiftactive_option", default_timeshiftactive_option),
-            "timeshift_options": self.current_options.get("timeshift_options", default_timeshift_options),
-            "online_translation": self.current_options.get("online_translation_option", default_online_translation_option),
-            "trans_options": self.current_options.get("trans_options", default_trans_options),
-            "engine_model": self.current_options.get("engine_model_option", default_engine_model_option),
-            "gemini_level": self.current_options.get("gemini_level_option", default_gemini_level_option),
-            "vad": False,
-            "translate": False
-        }
-
-        # 2. Per-Item Overrides (only if not in global override mode)
-        if not self.override_options.get() and url in self.current_options:
-            item_config = self.current_options[url]
-            mapping = {
-                "executable_option": "executable",
-                "terminal_option": "terminal",
-                "bash_options": "bash_options",
-                "playeronly_option": "playeronly",
-                "player_option": "player",
-                "mpv_options": "mpv_options",
-                "timeshiftactive_option": "timeshiftactive",
-                "timeshift_options": "timeshift_options",
-                "online_translation_option": "online_translation",
-                "trans_options": "trans_options",
-                "engine_model_option": "engine_model",
-                "gemini_level_option": "gemini_level"
-            }
-            for cfg_key, target_key in mapping.items():
-                if cfg_key in item_config:
-                    opts[target_key] = item_config[cfg_key]
-
-        # 3. Parse complex options into a flat result dictionary
-        res = {
-            "executable": opts["executable"],
-            "terminal": opts["terminal"],
-            "playeronly": opts["playeronly"],
-            "player": opts["player"],
-            "mpv_options": opts["mpv_options"],
-            "timeshiftactive": opts["timeshiftactive"],
-            "online_translation": opts["online_translation"],
-            "engine_model": opts["engine_model"],
-            "gemini_level": opts["gemini_level"]
-        }
+        # Same resolution as the headless CLI: global options, or the channel's own if not in override mode
+        return resolve_settings(self.current_options, url, self.override_options.get())
 
-        # Parse bash_options
-        b_opts = opts["bash_options"].split()
-        res["step"] = "9"
-        res["model"] = "base"
-        res["language_code"] = "auto"
-        res["translate"] = False
-        res["vad"] = False
-        res["quality"] = "raw"
-        for o in b_opts:
-            if o.isdigit() and (3 <= int(o) <= 60): res["step"] = o
-            elif o == "translate": res["translate"] = True
-            elif o == "vad": res["vad"] = True
-            elif o in ["raw", "upper", "lower"]: res["quality"] = o
-            elif o in model_list: res["model"] = o
-            elif o in lang_codes: res["language_code"] = o
-
-        # Parse timeshift_options
-        ts_opts = opts["timeshift_options"].split()
-        if len(ts_opts) >= 3:
-            res["sync"] = ts_opts[0]
-            res["segments"] = ts_opts[1]
-            res["segment_time"] = ts_opts[2]
-        else:
-            d_ts = default_timeshift_options.split()
-            res["sync"] = d_ts[0]
-            res["segments"] = d_ts[1]
-            res["segment_time"] = d_ts[2]
-
-        # Parse trans_options
-        tr_opts = opts["trans_options"].split()
-        res["trans_language_code"] = "en"
-        res["output_text"] = "both"
-        res["speak"] = False
-        for o in tr_opts:
-            if o in lang_codes: res["trans_language_code"] = o
-            elif o in ["original", "translation", "both", "none"]: res["output_text"] = o
-            elif o == "speak": res["speak"] = True
-
-        return res
     def play_channel(self, event=None):
         self.load_config()
 
@@ -2979,7 +2919,6 @@ class M3uPlaylistPlayer(tk.Frame):
 
                 mpv_options = s["mpv_options"]
                 language_cleaned = s["language_code"]
-                translate_value = " --translate" if s["translate"] else ""
 
                 if self.subtitles == "subtitles":
                     region = "cell"
@@ -3033,43 +2972,27 @@ class M3uPlaylistPlayer(tk.Frame):
 
                 # Use resolved terminal and build bash_options from resolved values
                 terminal = s["terminal"]
-                bash_options = "--step " + s["step"] + " --model " + s["model"] + " --language " + language_cleaned + \
-                               translate_value + " --" + quality
-
-                if s["playeronly"]:
-                    bash_options = bash_options + " --playeronly"
-                if s["timeshiftactive"]:
-                    bash_options = bash_options + " --timeshift --sync " + s["sync"] + " --segments " + s["segments"] + " --segment_time " + s["segment_time"]
-                if s["vad"]:
-                    bash_options = bash_options + " --vad"
-                if self.spec == "streamlink":
-                    bash_options = bash_options + " --streamlink"
-                if self.spec == "yt-dlp":
-                    bash_options = bash_options + " --yt-dlp"
                 if self.subtitles == "subtitles":
-                    bash_options = bash_options + " --subtitles"
+                    destination = subtitle_destination(url, language_cleaned, s["translate"])
+                    if self.skip_existing_subtitles and os.path.exists(destination):
+                        print("Skipping, subtitles already exist:", destination)
+                        continue
+                bash_options = script_options(s, self.spec, subtitles=self.subtitles == "subtitles")
 
                 # --- Online Translation Logic ---
                 env = None
                 if s["online_translation"]:
                     if subprocess.call(["trans", "-V"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) == 0:
-                        trans_language_cleaned = s["trans_language_code"]
-                        speak_value = " speak" if s["speak"] else ""
-                        bash_options += f" --trans {trans_language_cleaned} {s['output_text']}{speak_value}"
-
                         selected_engine = s["engine_model"]
+                        # No need to load_config here, we already have s
+                        api_key = self.current_options.get("gemini_api_key", "")
+                        trans_options, env = translation_options(s, api_key)
+                        bash_options += trans_options
 
                         if selected_engine != "Google Translate":
-                            # No need to load_config here, we already have s
-                            api_key = self.current_options.get("gemini_api_key", "")
-
                             if not api_key:
                                 messagebox.showwarning("API Key Missing", f"A Gemini model ('{selected_engine}') is selected, but the API key is not set. Translation will fall back to Google Translate.")
                             else:
-                                bash_options += f" --gemini-trans {selected_engine}"
-                                bash_options += f" --gemini-level {s['gemini_level']}"
-                                env = os.environ.copy()
-                                env["GEMINI_API_KEY"] = api_key
                                 print(f"Online translation active with Gemini model: {selected_engine}, level: {s['gemini_level']}.")
                         else:
                             print("Online translation active with Google Translate.")
@@ -3104,6 +3027,13 @@ class M3uPlaylistPlayer(tk.Frame):
                     if os.path.exists(self.bash_script):
                         command_to_run = f"{self.bash_script} {url_cmd} {bash_options} {executable_option} {mpv_options_cmd}"
                         print("Script Options:", command_to_run)
+                        if self.subtitles == "subtitles":
+                            # Subtitle runs go through the bounded queue instead of one terminal each
+                            subtitle_job_queue.add(url, shlex.split(command_to_run), model=s["model"],
+                                                   spec=self.spec, destination=destination)
+                            self.queued_subtitle_jobs += 1
+                            self.queued_subtitle_model = s["model"]
+                            continue
                         try:
                             popen_kwargs = {"env": env} if env else {}
 
@@ -3643,18 +3573,49 @@ class M3uPlaylistPlayer(tk.Frame):
                     valid = True
                     break
             if valid:
+                existing = []
+                for item in selection:
+                    url = self.tree.item(item, "values")[2]
+                    if re.match(r'^/|^\./', url):
+                        s = self.get_resolved_settings_for_url(url)
+                        destination = subtitle_destination(url, s["language_code"], s["translate"])
+                        if os.path.exists(destination):
+                            existing.append(os.path.basename(destination))
+                self.skip_existing_subtitles = False
+                if existing:
+                    answer = messagebox.askyesnocancel("Subtitles Already Exist",
+                                                       f"{len(existing)} subtitle file(s) already exist, e.g. {existing[0]}.\n\n"
+                                                       "Yes: generate them again and overwrite.\nNo: skip those files.")
+                    if answer is None:
+                        return
+                    self.skip_existing_subtitles = not answer
+
+                self.queued_subtitle_jobs = 0
                 self.subtitles="subtitles"
                 self.play_channel()
                 self.subtitles=""
-                err_message = f"Please wait while generating subtitles for selected files."
-                print(err_message)
-                messagebox.showinfo("Generating Subtitles", err_message)
+                if self.queued_subtitle_jobs:
+                    limit = subtitle_job_queue.concurrency_limit(self.queued_subtitle_model)
+                    err_message = f"{self.queued_subtitle_jobs} file(s) added to the subtitle queue. " \
+                                  f"Up to {limit} will be processed at the same time on this machine.\n\n" \
+                                  "Press 'Jobs' to follow their progress."
+                    print(err_message)
+                    messagebox.showinfo("Generating Subtitles", err_message)
+                    self.show_subtitle_jobs()
             else:
                 messagebox.showerror("Error", "Select at least one valid local file to generate subtitles.")
         else:
             messagebox.showerror("Error", "Select a file to generate subtitles.")
 
 
+    # Shows the batch subtitle queue
+    def show_subtitle_jobs(self):
+        SubtitleJobsDialog(self.main_window, subtitle_job_queue)
+
+    def show_session_latency(self):
+        SessionLatencyDialog(self.main_window)
+
+
     # Opens the Video Cutter dialog
     def open_video_cutter(self):
         """Opens the Video Cutter dialog for the selected local file."""
@@ -4124,10 +4085,7 @@ class M3uPlaylistPlayer(tk.Frame):
         default_filename = f'playlist_{self.spec}.m3u'
         filename = filedialog.asksaveasfilename(filetypes=[("Playlist Files", "*.m3u")], initialfile=default_filename)
         if filename:
-            with open(filename, "w") as file:
-                for item in self.tree.get_children():
-                    list_number, name, url = self.tree.item(item, "values")
-                    file.write(f"#EXTINF:-1,{name}\n{url}\n")
+            write_playlist(filename, [self.tree.item(item, "values")[1:3] for item in self.tree.get_children()])
             self.clear_status()
 
     # New helper method to update the search counter label
@@ -4295,6 +4253,8 @@ class M3uPlaylistPlayer(tk.Frame):
         self.override_options.set(override_option)
 
         self.widgets_updates()
+        if event is not None:
+            self.warm_model()  # A channel was selected
 
         selected_items = self.tree.selection()
         if not selected_items:
@@ -4331,34 +4291,10 @@ class M3uPlaylistPlayer(tk.Frame):
             self._update_search_counter()
 
     def load_config(self):
+        config_file = f'config_{self.spec}.json'
         try:
-            config_file = f'config_{self.spec}.json'
-
-            # Start with a full set of default values
-            defaults = {
-                "executable_option": default_executable_option,
-                "terminal_option": default_terminal_option,
-                "bash_options": default_bash_options,
-                "playeronly_option": default_playeronly_option,
-                "player_option": default_player_option,
-                "mpv_options": default_mpv_options,
-                "override_option": default_override_option,
-                "timeshiftactive_option": default_timeshiftactive_option,
-                "timeshift_options": default_timeshift_options,
-                "online_translation_option": default_online_translation_option,
-                "trans_options": default_trans_options,
-                "engine_model_option": default_engine_model_option,
-                "gemini_api_key": default_gemini_api_key,
-                "gemini_level_option": default_gemini_level_option
-            }
-
-            if os.path.exists(config_file):
-                with open(config_file, "r") as file:
-                    loaded_options = json.load(file)
-                    # Update defaults with loaded options, preserving all keys
-                    defaults.update(loaded_options)
-
-            self.current_options = defaults
+            # Defaults updated with the loaded options, preserving all keys
+            self.current_options = load_config_file(self.spec)
 
         except Exception as e:
             err_message=("Config Error", f"Error loading {config_file}: {e}. Try deleting it.")
@@ -4574,12 +4510,20 @@ class MainApplication:
 
         tab_control.pack(expand=True, fill=tk.BOTH, side=tk.LEFT)
 
+        # Batch subtitle generation is shared by every tab and resumes jobs left from a previous run
+        global subtitle_job_queue
+        subtitle_job_queue = SubtitleJobQueue(env_provider=subtitle_job_environment)
+        subtitle_job_queue.start()
+
         all_specs = [name.lower().replace(" ", "_") for name in self.tab_names]
         for tab, spec in zip(tabs, all_specs):
             player = M3uPlaylistPlayer(tab, spec, all_specs, bash_script, self.error_messages, self.main_window)
             player.pack(fill=tk.BOTH, expand=True)
             self.playlist_players.append(player)
 
+        # The first tab is shown at start: its model is usually the next one loaded
+        self.playlist_players[0].warm_model()
+
     def on_close(self):
         self.main_window.destroy()
 
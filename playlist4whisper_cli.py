@@ -0,0 +1,1104 @@
+#!/usr/bin/env python3
+"""
+playlist4whisper_cli - Headless companion of playlist4whisper for servers and cron jobs.
+
+It never imports tkinter and works on the same files as the GUI: the per-tab
+'config_{spec}.json' settings, 'playlist_{spec}.m3u' playlists and the shared
+subtitle job queue. Run it from the whisper.cpp directory, like playlist4whisper.py.
+
+Examples:
+  playlist4whisper_cli.py subtitles ./video1.mp4 ./video2.mkv --spec youtube
+  playlist4whisper_cli.py jobs
+  playlist4whisper_cli.py playlist import other.m3u --spec iptv --dedupe
+  playlist4whisper_cli.py playlist export --spec iptv --format csv
+  playlist4whisper_cli.py check
+  playlist4whisper_cli.py benchmark models --step 5
+  playlist4whisper_cli.py config --spec iptv --url ./video1.mp4
+
+Author: Antonio R. Version: 5.34 License: GPL 3.0
+
+Copyright (c) 2023 Antonio R.
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+https://github.com/antor44/livestream_video
+
+--------------------------------------------------------------------------------
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import shlex
+import shutil
+import tempfile
+import argparse
+
+from playlist4whisper_core import (
+    suffixes, model_inventory, find_whisper_executable, find_quantize_executable, load_config_file,
+    resolve_settings, script_options, translation_options, read_playlist, write_playlist,
+    SubtitleJobQueue, subtitle_destination, subtitle_job_environment, PortAllocator, SessionGovernor,
+    ModelInstaller, ModelBenchmarks, benchmark_clip, benchmark_model, default_whisper_threads,
+    ModelWarmer, model_path, prefetch_file, evict_file, benchmark_server, WhisperServerError,
+    default_executable_option, calibrate_threads, allot_threads, cpu_count, read_session_metrics,
+    process_tree_usage, prometheus_metrics, CaptureBroker
+)
+
+
+bash_script = "./livestream_video.sh"
+
+
+def load_settings(spec):
+    try:
+        return load_config_file(spec)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Error loading config_{spec}.json: {e}")
+
+
+# --- subtitles / jobs ---
+
+def subtitle_job_args(url, s, spec, current_options):
+    """The same livestream_video.sh command line the GUI queues for a subtitle run."""
+    bash_options = script_options(s, spec, subtitles=True)
+    if s["online_translation"]:
+        if shutil.which("trans"):
+            trans_options, _ = translation_options(s, current_options.get("gemini_api_key", ""))
+            bash_options += trans_options
+        else:
+            print("Warning: translate-shell is not installed, online translation skipped.", file=sys.stderr)
+    return [bash_script, url] + shlex.split(bash_options) + \
+        ["--executable", s["executable"], "--player", "vlc"] + shlex.split(s["mpv_options"])
+
+
+def subtitle_jobs(files, spec, overwrite):
+    """The subtitle runs of 'files' with the tab's settings, as (url, script arguments, model, destination)."""
+    current_options = load_settings(spec)
+    jobs = []
+    for url in files:
+        if not os.path.isfile(url):
+            print(f"Skipping {url}: not a local file.", file=sys.stderr)
+            continue
+        if not url.startswith(("/", "./")):
+            url = "./" + url  # Same form as files added to a playlist
+        s = resolve_settings(current_options, url, current_options.get("override_option", False))
+        destination = subtitle_destination(url, s["language_code"], s["translate"])
+        if os.path.exists(destination) and not overwrite:
+            print(f"Skipping {url}: {destination} already exists (use --overwrite).")
+            continue
+        jobs.append((url, subtitle_job_args(url, s, spec, current_options), s["model"], destination))
+    return jobs
+
+
+def command_subtitles(args):
+    job_queue = SubtitleJobQueue(max_concurrent=args.max_jobs, env_provider=subtitle_job_environment)
+    job_ids = []
+    for url, script_args, model, destination in subtitle_jobs(args.files, args.spec, args.overwrite):
+        job_ids.append(job_queue.add(url, script_args, model=model, spec=args.spec, destination=destination))
+        print(f"Queued job {job_ids[-1]}: {url} -> {destination}")
+
+    if not job_ids or args.no_wait:
+        return 0
+
+    job_queue.start()
+    last_line = ""
+    first_pass = True
+    while True:
+        time.sleep(2)
+        jobs = [job for job in job_queue.snapshot() if job["id"] in job_ids]
+        if not jobs:
+            if first_pass:
+                first_pass = False
+                continue  # First scheduler pass not done yet
+            # Cleared from another instance (Jobs dialog, 'jobs clear')
+            job_queue.stop()
+            print(f"Jobs {', '.join(map(str, job_ids))} were removed from the queue.", file=sys.stderr)
+            return 1
+        first_pass = False
+        pending = [job for job in jobs if job["state"] in ("queued", "running")]
+        line = ", ".join(f"{os.path.basename(job['url'])}: {job_queue.describe(job)}" for job in pending)
+        if line != last_line:
+            print(line or "All jobs finished.", flush=True)
+            last_line = line
+        if not pending:
+            break
+    job_queue.stop()
+
+    failed = [job for job in jobs if job["state"] != "done"]
+    for job in failed:
+        print(f"Job {job['id']} {job['state']}: {job['url']} (log: {job.get('log')})", file=sys.stderr)
+    removed = [job_id for job_id in job_ids if job_id not in {job["id"] for job in jobs}]
+    if removed:
+        print(f"Jobs {', '.join(map(str, removed))} were removed from the queue.", file=sys.stderr)
+    return 1 if failed or removed else 0
+
+
+def command_jobs(args):
+    job_queue = SubtitleJobQueue()
+    if args.retry:
+        job_queue.retry(args.retry)
+    if args.cancel:
+        job_queue.cancel(args.cancel)
+    if args.clear:
+        job_queue.clear_finished()
+    job_queue.refresh()
+    jobs = job_queue.snapshot()
+    if args.json:
+        print(json.dumps(jobs, indent=1))
+        return 0
+    for job in jobs:
+        print(f"{job['id']:>4}  {job['model']:<16} {job_queue.describe(job):<28} {job['url']}")
+    if not jobs:
+        print("No subtitle jobs.")
+    return 0
+
+
+# --- playlist ---
+
+def playlist_file(args):
+    return args.playlist or f"playlist_{args.spec}.m3u"
+
+
+def dedupe_entries(entries):
+    """Keeps the first entry for each URL, preserving order."""
+    seen = set()
+    unique = []
+    for name, url in entries:
+        if url not in seen:
+            seen.add(url)
+            unique.append((name, url))
+    return unique
+
+
+def command_playlist(args):
+    filename = playlist_file(args)
+    try:
+        entries = read_playlist(filename)
+    except FileNotFoundError:
+        if args.action != "import":
+            sys.exit(f"Playlist {filename} not found.")
+        entries = []
+    except OSError as e:
+        sys.exit(f"Error reading {filename}: {e}")
+
+    if args.action == "import":
+        count = len(entries)
+        for source in args.sources:
+            try:
+                entries += read_playlist(source)
+            except OSError as e:
+                sys.exit(f"Error reading {source}: {e}")
+        if args.dedupe:
+            entries = dedupe_entries(entries)
+        write_playlist(filename, entries)
+        print(f"{len(entries) - count} entries added to {filename} ({len(entries)} in total).")
+
+    elif args.action == "dedupe":
+        unique = dedupe_entries(entries)
+        write_playlist(filename, unique)
+        print(f"{len(entries) - len(unique)} duplicate entries removed from {filename}.")
+
+    elif args.action == "export":
+        output = open(args.output, "w", newline="") if args.output else sys.stdout
+        try:
+            if args.format == "m3u":
+                for name, url in entries:
+                    output.write(f"#EXTINF:-1,{name}\n{url}\n")
+            elif args.format == "csv":
+                writer = csv.writer(output)
+                writer.writerow(["name", "url"])
+                writer.writerows(entries)
+            elif args.format == "json":
+                json.dump([{"name": name, "url": url} for name, url in entries], output, indent=1)
+                output.write("\n")
+            else:
+                for name, url in entries:
+                    output.write(f"{url}\n")
+        finally:
+            if args.output:
+                output.close()
+    return 0
+
+
+# --- model ---
+
+def command_model(args):
+    """Installs models in parallel (download with resume and SHA1 check, then quantization)."""
+    installer = ModelInstaller(find_quantize_executable(), url_template=args.url_template, max_quantize=args.jobs)
+    if args.action == "quantize":
+        base_model, variants = args.models[0], args.models[1:] or suffixes
+        try:
+            jobs = installer.install_variants(base_model, [sfx if sfx.startswith("-") else f"-{sfx}" for sfx in variants])
+        except ValueError as e:
+            sys.exit(str(e))
+    else:
+        jobs = [installer.install(model) for model in args.models]
+    last_line = ""
+    while True:
+        line = " | ".join(f"{job.model}: {job.message}" + (f" {int(job.progress * 100)}%" if job.progress and not job.finished else "")
+                          for job in jobs)
+        if line != last_line and (sys.stdout.isatty() or all(job.finished for job in jobs)):
+            print(("\r" if sys.stdout.isatty() else "") + line, end="", flush=True)
+            last_line = line
+        if all(job.finished for job in jobs):
+            print()
+            break
+        time.sleep(0.5)
+    if args.action == "quantize":
+        for job in jobs:
+            print(job.report())
+    return 0 if all(job.state == "done" for job in jobs) else 1
+
+
+# --- benchmark ---
+
+def benchmark_settings(args):
+    """The whisper executable and step size of a benchmark: the options given, or the tab's."""
+    s = load_settings(args.spec)
+    step = args.step or int(resolve_settings(s, None, True)["step"])
+    return args.executable or s["executable_option"] or find_whisper_executable(), step
+
+
+def command_benchmark(args):
+    """Measures each installed model on a speech clip of one step and recommends the best one that keeps up."""
+    executable, step = benchmark_settings(args)
+    installed = model_inventory.installed()
+    selected = args.models or installed
+    missing = [model for model in selected if model not in installed]
+    if missing:
+        sys.exit(f"Not installed: {', '.join(missing)}")
+    try:
+        clip = benchmark_clip(step)
+    except RuntimeError as e:
+        sys.exit(str(e))
+
+    benchmarks = ModelBenchmarks()
+    print(f"{executable}, {step}s chunks, {args.threads} threads")
+    print(f"{'model':<22} {'RTF':>6} {'time':>7} {'load':>6} {'peak RSS':>9}")
+    for model in selected:
+        try:
+            result = benchmark_model(executable, model, clip, step, threads=args.threads)
+        except (OSError, RuntimeError) as e:
+            print(f"{model:<22} failed: {e}")
+            continue
+        benchmarks.record(executable, step, model, result)
+        load = f"{result['load_seconds']:.2f}s" if result["load_seconds"] is not None else "-"
+        print(f"{model:<22} {result['rtf']:>6.2f} {result['seconds']:>6.2f}s {load:>6} {result['peak_rss'] / 1024**2:>6.0f} MB",
+              flush=True)
+
+    best = benchmarks.recommend(executable, step, args.target_rtf, installed)
+    if best:
+        print(f"Recommended for --step {step}: {best} (RTF under {args.target_rtf})")
+        return 0
+    print(f"No installed model keeps the RTF under {args.target_rtf} with --step {step}; try a longer step or a smaller model.")
+    return 1
+
+
+def run_subtitle_batch(jobs, limit, spec):
+    """
+    Runs 'jobs' (from subtitle_jobs()) through a job queue of their own with at most 'limit' at
+    once. The resource governor admits as many sessions, so that it does not hold back a limit
+    above one per core (it still waits for free memory). Returns the wall time, the most jobs
+    that ran at the same time and the failed jobs.
+    """
+    jobs_file = os.path.join(tempfile.gettempdir(), f"benchmark-subtitle_jobs_{os.getpid()}.json")
+    log_file = os.path.join(tempfile.gettempdir(), f"benchmark-subtitle-job_{os.getpid()}_{limit}_{{}}.log")
+    job_queue = SubtitleJobQueue(jobs_file=jobs_file, max_concurrent=limit, max_attempts=1, log_file=log_file,
+                                 env_provider=lambda job: dict(subtitle_job_environment(job),
+                                                               LIVESTREAM_MAX_SESSIONS=str(limit)))
+    try:
+        started = time.monotonic()
+        job_ids = [job_queue.add(url, script_args, model=model, spec=spec, destination=destination)
+                   for url, script_args, model, destination in jobs]
+        job_queue.start()
+        peak = 0
+        while True:
+            time.sleep(0.5)
+            batch = [job for job in job_queue.snapshot() if job["id"] in job_ids]
+            peak = max([peak] + [sum(1 for job in batch if job["state"] == "running")])
+            if len(batch) == len(job_ids) and not any(job["state"] in ("queued", "running") for job in batch):
+                break
+        wall = time.monotonic() - started
+    finally:
+        job_queue.stop(terminate_running=True)
+        for path in (jobs_file, jobs_file + ".lock"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return {"seconds": wall, "peak": peak, "failed": [job for job in batch if job["state"] != "done"]}
+
+
+def command_benchmark_subtitles(args):
+    """Times a batch of subtitle runs through the job queue at its limit, and all of them started at once."""
+    jobs = subtitle_jobs(args.files, args.spec, args.overwrite)
+    if not jobs:
+        sys.exit("No files to transcribe.")
+    limit = args.max_jobs or SubtitleJobQueue().concurrency_limit(jobs[0][2], running=0)
+    if limit >= len(jobs):
+        sys.exit(f"The queue would run all {len(jobs)} files at once (limit {limit}); "
+                 "use more files or a lower --max-jobs.")
+
+    print(f"{len(jobs)} files, model {jobs[0][2]}, {cpu_count()} cores")
+    print(f"{'launch':<16} {'at once':>7} {'wall time':>10} {'failed':>7}")
+    results = {}
+    for name, at_once in (("queue", limit), ("all at once", len(jobs))):
+        results[name] = result = run_subtitle_batch(jobs, at_once, args.spec)
+        print(f"{name:<16} {result['peak']:>7} {result['seconds']:>9.1f}s {len(result['failed']):>7}", flush=True)
+        for job in result["failed"]:
+            print(f"  job {job['id']} {job['state']}: {job['url']} (log: {job.get('log')})", file=sys.stderr)
+    queued, at_once = results["queue"]["seconds"], results["all at once"]["seconds"]
+    print(f"The queue took {queued / at_once:.2f}x the wall time of starting every file at once "
+          f"({'faster' if queued < at_once else 'slower'} by {abs(at_once - queued):.1f}s).")
+    return 1 if any(result["failed"] for result in results.values()) else 0
+
+
+def command_benchmark_server(args):
+    """Compares one whisper process per chunk (as livestream_video.sh) with a whisper-server that keeps the model loaded."""
+    executable, step = benchmark_settings(args)
+    if args.model not in model_inventory.installed():
+        sys.exit(f"Not installed: {args.model}")
+    try:
+        clip = benchmark_clip(step)
+        spawned = [benchmark_model(executable, args.model, clip, step, threads=args.threads) for _ in range(args.chunks)]
+        served = benchmark_server(args.model, clip, step, chunks=args.chunks, threads=args.threads)
+    except (OSError, RuntimeError, WhisperServerError) as e:
+        sys.exit(str(e))
+
+    spawn_latency = sum(result["seconds"] for result in spawned) / len(spawned)
+    server_latency = sum(served["latencies"]) / len(served["latencies"])
+    spawn_cpu = sum(result["cpu_seconds"] for result in spawned) / len(spawned)
+    print(f"{args.model}, {step}s chunks, {args.threads} threads, {args.chunks} chunks")
+    print(f"{'':<16} {'latency':>8} {'RTF':>6} {'CPU/chunk':>10}")
+    print(f"{'per chunk':<16} {spawn_latency:>7.2f}s {spawn_latency / step:>6.2f} {spawn_cpu:>9.2f}s")
+    server_cpu = f"{served['cpu_seconds_per_chunk']:.2f}s" if served["cpu_seconds_per_chunk"] is not None else "-"
+    print(f"{'whisper-server':<16} {server_latency:>7.2f}s {served['rtf']:>6.2f} {server_cpu:>10}")
+    print(f"whisper-server loaded the model in {served['load_seconds']:.2f}s (once per session; "
+          "its CPU time above includes it, spread over the chunks).")
+    return 0
+
+
+def command_benchmark_threads(args):
+    """
+    Calibrates how a model's speed scales with threads, which the resource governor then uses,
+    and compares the throughput of 1, 2, 4... concurrent sessions with the governor's thread
+    budgets against a fixed 4 threads each.
+    """
+    import concurrent.futures
+
+    executable, step = benchmark_settings(args)
+    if args.model not in model_inventory.installed():
+        sys.exit(f"Not installed: {args.model}")
+    cores = cpu_count()
+    benchmarks = ModelBenchmarks()
+    try:
+        clip = benchmark_clip(step)
+        seconds = calibrate_threads(executable, args.model, clip, step, cores)
+    except (OSError, RuntimeError) as e:
+        sys.exit(str(e))
+    benchmarks.record_scaling(executable, args.model, seconds)
+    useful = benchmarks.useful_threads(executable, args.model)
+
+    print(f"{args.model}, {executable}, {step}s chunks, {cores} cores")
+    print(f"{'threads':>7} {'time':>7} {'speed-up':>9}")
+    for threads, value in sorted(seconds.items()):
+        print(f"{threads:>7} {value:>6.2f}s {seconds[1] / value:>8.2f}x")
+    print(f"Useful threads: {useful} (more were not at least 15% faster); sessions of this model get {useful} at most.")
+    print()
+
+    def throughput(threads_each):
+        # Every session transcribes 'rounds' chunks at the same time; audio seconds per second
+        with concurrent.futures.ThreadPoolExecutor(len(threads_each)) as pool:
+            started = time.monotonic()
+            runs = [pool.submit(lambda threads: [benchmark_model(executable, args.model, clip, step, threads=threads)
+                                                 for _ in range(args.rounds)], threads) for threads in threads_each]
+            for run in runs:
+                run.result()
+        return len(threads_each) * args.rounds * step / (time.monotonic() - started)
+
+    print(f"{'sessions':>8} {'threads':>8} {'audio/s':>8} {'RTF':>6}   {'fixed -t 4':>10} {'RTF':>6}")
+    for count in args.sessions:
+        budgets = list(allot_threads({session: useful for session in range(count)}, cores).values())
+        try:
+            tuned, fixed = throughput(budgets), throughput([4] * count)
+        except (OSError, RuntimeError) as e:
+            sys.exit(str(e))
+        print(f"{count:>8} {'/'.join(map(str, sorted(set(budgets)))):>8} {tuned:>7.1f}s {count / tuned:>6.2f}   "
+              f"{fixed:>9.1f}s {count / fixed:>6.2f}", flush=True)
+    return 0
+
+
+def command_benchmark_ingest(args):
+    """Compares the CPU and I/O of extracting chunks with one ffmpeg each against one decoder into memory."""
+    from playlist4whisper_live import benchmark_ingest
+
+    _, step = benchmark_settings(args)
+    try:
+        results = benchmark_ingest(args.file, step)
+    except (OSError, RuntimeError) as e:
+        sys.exit(str(e))
+    print(f"Per hour of audio, {step}s chunks:")
+    print(f"{'':<18} {'CPU':>8} {'read':>10} {'written':>10} {'disk read':>10} {'disk written':>13}")
+    for name, usage in results.items():
+        io = [f"{usage[key] / 1024**2:.0f} MB" if key in usage else "-" for key in ("rchar", "wchar", "read_bytes", "write_bytes")]
+        print(f"{name:<18} {usage['cpu_seconds']:>7.1f}s {io[0]:>10} {io[1]:>10} {io[2]:>10} {io[3]:>13}")
+    return 0
+
+
+def command_benchmark_pipeline(args):
+    """Plays a recording into the live engine as if it were live, with the stages in turn and pipelined."""
+    from playlist4whisper_live import benchmark_pipeline, engine_backend, engine_translator, format_stages
+
+    executable, step = benchmark_settings(args)
+    try:
+        backend = engine_backend(executable, args.model)
+        results = benchmark_pipeline(args.file, backend, step, language=args.language, seconds=args.seconds,
+                                     translator=engine_translator(args), depth=args.queue)
+    except (OSError, ValueError, WhisperServerError) as e:
+        sys.exit(str(e))
+    for name, report in results.items():
+        print(f"{name}, {args.model}, {step}s chunks:")
+        print(format_stages(report))
+        print()
+    return 0
+
+
+def command_benchmark_step(args):
+    """Plays a recording into the live engine with a fixed step and with the step controller, and compares their lag."""
+    from playlist4whisper_live import SyntheticBackend, benchmark_step, engine_backend
+
+    executable, step = benchmark_settings(args)
+    try:
+        backend = engine_backend(executable, args.model) if args.model else SyntheticBackend(args.asr_overhead, args.asr_rtf)
+        results = benchmark_step(args.file, backend, step, args.min_step, args.max_step, seconds=args.seconds)
+    except (OSError, ValueError, WhisperServerError) as e:
+        sys.exit(str(e))
+    if args.model:
+        print(f"{args.model}, {step}s chunks, steps {args.min_step:g}-{args.max_step:g}s:")
+    else:
+        print(f"Synthetic speech recognition ({args.asr_overhead:g}s + {args.asr_rtf:g} x audio per chunk), "
+              f"{step}s chunks, steps {args.min_step:g}-{args.max_step:g}s:")
+    print(f"{'':<10} {'chunks':>6} {'lag':>7} {'max lag':>8} {'last lag':>9} {'step':>6}")
+    for name, result in results.items():
+        lag = result["lag"]
+        print(f"{name:<10} {lag['count']:>6} {lag['mean']:>6.2f}s {lag['max']:>7.2f}s {lag['last']:>8.2f}s {result['step']:>5g}s")
+    for change in results["adaptive"]["adjustments"]:
+        print(f"  step {change['from']:g}s -> {change['to']:g}s (RTF {change['rtf']:.2f}, lag {change['lag']:.1f}s)")
+    return 0
+
+
+def command_benchmark_language(args):
+    """Plays a recording into the live engine detecting the language of every chunk and pinning it."""
+    from playlist4whisper_live import benchmark_language, engine_backend
+
+    executable, step = benchmark_settings(args)
+    try:
+        backend = engine_backend(executable, args.model)
+        results = benchmark_language(args.file, backend, step, agree=args.agree, seconds=args.seconds)
+    except (OSError, ValueError, WhisperServerError) as e:
+        sys.exit(str(e))
+    print(f"{args.model}, {step}s chunks, pinned after {args.agree} chunks:")
+    print(f"{'':<10} {'chunks':>6} {'RTF':>6} {'time p50':>9} {'p95':>7}")
+    for name, result in results.items():
+        rtf = f"{result['rtf']:.3f}" if result["rtf"] is not None else "-"
+        print(f"{name:<10} {result['chunks']:>6} {rtf:>6} {result['asr']['p50']:>8.2f}s {result['asr']['p95']:>6.2f}s")
+    language = results["pinned"]["language"]
+    if language["pinned"] and "rtf_pinned" in language and results["detecting"]["rtf"]:
+        detecting, pinned = results["detecting"]["rtf"], language["rtf_pinned"]["mean"]
+        print(f"Pinned to '{language['pinned']}': RTF {pinned:.3f} once pinned, "
+              f"{(1 - pinned / detecting) * 100:.0f}% less than detecting every chunk.")
+    else:
+        print("The chunks did not agree on a language; nothing was pinned.")
+    return 0
+
+
+def command_benchmark_overlap(args):
+    """Plays a recording into the live engine without and with overlapping chunks, and compares their cost."""
+    from playlist4whisper_live import benchmark_overlap, engine_backend
+
+    executable, step = benchmark_settings(args)
+    if any(overlap <= 0 or overlap >= step for overlap in args.overlap):
+        sys.exit("Each overlap must be longer than 0 and shorter than the step.")
+    try:
+        backend = engine_backend(executable, args.model)
+        results = benchmark_overlap(args.file, backend, step, args.overlap, seconds=args.seconds)
+    except (OSError, ValueError, WhisperServerError) as e:
+        sys.exit(str(e))
+    print(f"{args.model}, {step}s chunks:")
+    print(f"{'overlap':<8} {'chunks':>6} {'RTF':>6} {'cost':>6} {'at most':>8} {'time p50':>9} {'p95':>7} {'removed':>8}")
+    for overlap, result in results.items():
+        rtf = f"{result['rtf']:.3f}" if result["rtf"] is not None else "-"
+        cost = f"{result['increase'] * 100:+.0f}%" if "increase" in result else "-"
+        expected = f"+{result['expected'] * 100:.0f}%" if overlap else "-"
+        removed = f"{result['removed_words']}" if overlap else "-"
+        print(f"{f'{overlap:g}s':<8} {result['chunks']:>6} {rtf:>6} {cost:>6} {expected:>8} "
+              f"{result['asr']['p50']:>8.2f}s {result['asr']['p95']:>6.2f}s {removed:>8}")
+    for overlap, result in results.items():
+        if overlap and result["chunks"]:
+            print(f"{overlap:g}s: repeated words found by alignment in {result['aligned']} chunks, "
+                  f"by time in {result['by_time']}.")
+    return 0
+
+
+def command_benchmark_provisional(args):
+    """Plays a recording into the live engine with the final text only and with provisional text, and compares when words appear."""
+    from playlist4whisper_live import benchmark_provisional, engine_backend
+
+    executable, step = benchmark_settings(args)
+    provisional_model = args.provisional_model or ModelBenchmarks().faster_model(
+        executable, step, args.model, model_inventory.installed()) or args.model
+    try:
+        backend = engine_backend(executable, args.model)
+        provisional_backend = engine_backend(executable, provisional_model, name="_provisional")
+        results = benchmark_provisional(args.file, backend, provisional_backend, step, args.interval, seconds=args.seconds)
+    except (OSError, ValueError, WhisperServerError) as e:
+        sys.exit(str(e))
+    print(f"{args.model}, {step}s chunks; provisional text with {provisional_model} every {args.interval:g}s:")
+    print(f"{'':<11} {'chunks':>6} {'first words p50':>16} {'p95':>7} {'final text p50':>15} {'lag':>7}")
+    for name, result in results.items():
+        first, final = result["first_words"], result["final"]
+        if not first or not final:
+            print(f"{name:<11} no text")
+            continue
+        print(f"{name:<11} {final['count']:>6} {first['p50']:>15.2f}s {first['p95']:>6.2f}s {final['p50']:>14.2f}s "
+              f"{result['lag']['mean']:>6.2f}s")
+    before, after = results["final only"]["first_words"], results["two-tier"]["first_words"]
+    if before and after:
+        print(f"First words {before['p50'] - after['p50']:.1f}s sooner (median); "
+              f"provisional sub-windows took {results['two-tier']['windows']['p50']:.2f}s (median).")
+    return 0
+
+
+# --- live ---
+
+def command_live(args):
+    """Runs the live engine on a capture file; started by livestream_video.sh --live-engine."""
+    from playlist4whisper_live import run_live
+
+    return run_live(args)
+
+
+def command_warmup(args):
+    """Reads a model into the page cache; with --measure, compares the first chunk from a cold and a warm cache."""
+    s = load_settings(args.spec)
+    path = model_path.format(args.model)
+    if not os.path.exists(path):
+        sys.exit(f"Not installed: {args.model}")
+    if not args.measure:
+        started = time.time()
+        size = prefetch_file(path)
+        print(f"{args.model}: {size / 1024**2:.0f} MB read in {time.time() - started:.1f}s")
+        return 0
+
+    executable = args.executable or s["executable_option"] or find_whisper_executable()
+    step = args.step or int(resolve_settings(s, None, True)["step"])
+    try:
+        clip = benchmark_clip(step)
+        results = {}
+        for label in ("cold", "warm"):
+            if label == "cold":
+                if not evict_file(path):
+                    sys.exit("Dropping a file from the page cache is not supported on this system.")
+            elif not ModelWarmer().memory_allows(args.model):
+                sys.exit("Not enough free memory to keep the model in the page cache.")
+            else:
+                prefetch_file(path)
+            results[label] = benchmark_model(executable, args.model, clip, step, threads=args.threads)
+    except (OSError, RuntimeError) as e:
+        sys.exit(str(e))
+
+    for label, result in results.items():
+        load = f"{result['load_seconds']:.2f}s" if result["load_seconds"] is not None else "-"
+        print(f"{label}: first transcript after {result['seconds']:.2f}s (model load {load})")
+    print(f"Warmup saves {results['cold']['seconds'] - results['warm']['seconds']:.2f}s on the first {step}s chunk.")
+    return 0
+
+
+# --- port ---
+
+def command_port(args):
+    """Loopback port registry shared with livestream_video.sh (get_unique_port / release_port)."""
+    allocator = PortAllocator()
+    if args.action == "allocate":
+        port = allocator.allocate(args.pid or os.getppid())
+        if port is None:
+            print("No free loopback port found.", file=sys.stderr)
+            return 1
+        print(port)
+    elif args.action == "release":
+        if args.port is None and args.pid is None:
+            sys.exit("release needs --port or --pid.")
+        allocator.release(port=args.port, pid=args.pid)
+    else:
+        for port, pid in sorted(allocator.in_use().items()):
+            print(f"{port}\t{pid}")
+    return 0
+
+
+# --- session ---
+
+def command_session(args):
+    """Admission of transcription sessions, used by livestream_video.sh before loading a model."""
+    governor = SessionGovernor(max_sessions=args.max_sessions)
+    pid = args.pid or os.getppid()
+    if args.action == "admit":
+        decision, threads, reason = governor.admit(pid, args.model, args.kind, args.executable)
+        print(f"{decision} {threads} {reason}")
+        return 0 if decision == "admit" else 2 if decision == "queue" else 3
+    if args.action == "preview":
+        threads, running = governor.preview(args.model, args.executable)
+        print(f"{threads} threads ({running} other session(s) running)")
+        return 0
+    if args.action == "release":
+        governor.release(pid)
+        return 0
+    if args.action == "metrics":
+        # Written by the live engine of each running session
+        from playlist4whisper_live import format_latency
+
+        metrics = read_session_metrics()
+        if args.pid:
+            metrics = {key: value for key, value in metrics.items() if key == str(args.pid)}
+        if args.json:
+            print(json.dumps(metrics, indent=1))
+            return 0
+        for session_pid, session in metrics.items():
+            print(f"{session_pid}: {session['audio_seconds'] / 60:.1f} min of audio, {session['chunks']} chunks, "
+                  f"lag {session['lag']:.0f}s")
+            print(format_latency(session["stages"]))
+            print()
+        return 0
+    data = governor.status()
+    if args.json:
+        print(json.dumps(data, indent=1))
+        return 0
+    for pid, session in data["sessions"].items():
+        limit = f" (useful up to {session['limit']})" if session.get("limit") else ""
+        state = session.get("state", {})
+        lag = f", {state['lag']:.0f}s behind" if "lag" in state else ""
+        catch_up = f", catching up: {'+'.join(state['catch_up'])}" if state.get("catch_up") else ""
+        print(f"{pid:>8}  {session['kind']:<10} {session['model']:<16} {session['threads']} threads{limit}{lag}{catch_up}")
+    for pid, entry in data["waiting"].items():
+        print(f"{pid:>8}  {entry['kind']:<10} waiting for {int(time.time() - entry['since'])}s")
+    return 0
+
+
+def command_metrics(args):
+    """Serves the metrics of every session in the text format of Prometheus, or prints them once."""
+    import http.server
+
+    governor = SessionGovernor()
+
+    def exposition():
+        # Files the sessions write anyway and one pass over /proc: nothing is asked of the sessions
+        sessions = governor.running()
+        return prometheus_metrics(sessions, read_session_metrics(), process_tree_usage(sessions))
+
+    if args.once:
+        sys.stdout.write(exposition())
+        return 0
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = exposition().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    try:
+        server = http.server.ThreadingHTTPServer((args.host, args.port), Handler)
+    except OSError as e:
+        sys.exit(f"Cannot listen on {args.host}:{args.port}: {e}")
+    print(f"Session metrics on http://{args.host}:{args.port}/metrics (Ctrl+C to stop)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+# --- capture ---
+
+def command_capture(args):
+    """Captures shared by the sessions on the same stream (livestream_video.sh --shared-capture)."""
+    import signal
+    import subprocess
+
+    broker = CaptureBroker()
+    pid = args.pid or os.getppid()
+    if args.action == "run":
+        from playlist4whisper_live import CaptureFanout
+
+        try:
+            fanout = CaptureFanout(args.target)
+        except KeyError:
+            sys.exit(f"No capture {args.target}.")
+        signal.signal(signal.SIGTERM, lambda *_: fanout.ended.set())
+        try:
+            return fanout.run()
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Shared capture error: {e}", file=sys.stderr)
+            return 1
+        except KeyboardInterrupt:
+            return 0
+
+    if args.action == "subscribe":
+        if not args.target:
+            sys.exit("subscribe needs the URL of the stream.")
+        try:
+            key, capture, new = broker.subscribe(args.target, pid, args.segments, args.segment_time * 60, args.method)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+        if new:
+            try:
+                # Left by an ingestion that was killed before it could remove it
+                os.remove(capture["socket"])
+            except OSError:
+                pass
+            with open(os.path.join(os.path.dirname(capture["socket"]), f"capture-whisper-live_{key}.log"), "a") as log:
+                subprocess.Popen([sys.executable, os.path.abspath(__file__), "capture", "run", key],
+                                 stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+        started = time.monotonic()
+        # The ingestion attaches once its socket is listening
+        while not (broker.captures().get(key, {}).get("pid") and os.path.exists(capture["socket"])):
+            if time.monotonic() - started > args.timeout:
+                broker.unsubscribe(pid, key)
+                print(f"The shared capture of {args.target} did not start.", file=sys.stderr)
+                return 1
+            time.sleep(0.1)
+        if args.segments and not capture["segment_files"]:
+            problem = "has no timeshift segments"
+        elif args.segments and capture["segment_time"] != args.segment_time * 60:
+            problem = f"has segments of {capture['segment_time'] // 60} minutes"
+        else:
+            problem = None
+        if problem:
+            # A timeshift session then captures the stream on its own
+            broker.unsubscribe(pid, key)
+            print(f"The shared capture of {args.target} {problem}.", file=sys.stderr)
+            return 1
+        print(f"capture:{capture['socket']}")
+        if args.segments:
+            print(capture["segment_files"])
+    elif args.action == "unsubscribe":
+        captures = broker.captures()
+        key = next((key for key, capture in captures.items() if capture["url"] == args.target), None) if args.target else None
+        broker.unsubscribe(pid, key)
+    else:
+        captures = broker.captures()
+        if args.json:
+            print(json.dumps(captures, indent=1))
+            return 0
+        if not captures:
+            print("No shared captures.")
+            return 0
+        print(f"{'capture':<13} {'pid':>7} {'sessions':>8} {'audio':>8} {'dropped':>8}  url")
+        for key, capture in captures.items():
+            stats = capture.get("stats", {})
+            audio = f"{stats['audio_seconds'] / 60:.1f}m" if "audio_seconds" in stats else "-"
+            dropped = f"{stats['dropped_seconds']:.0f}s" if "dropped_seconds" in stats else "-"
+            print(f"{key:<13} {capture['pid'] or '-':>7} {len(capture['subscribers']):>8} {audio:>8} {dropped:>8}  "
+                  f"{capture['url']}")
+    return 0
+
+
+# --- check / config ---
+
+def command_check(args):
+    """Reports the programs and models playlist4whisper needs. Exits 1 if a required one is missing."""
+    checks = []
+    whisper = find_whisper_executable()
+    checks.append(("whisper executable", whisper and f"{whisper} ({shutil.which(whisper)})", True))
+    for program in ("ffmpeg", "ffprobe"):
+        checks.append((program, shutil.which(program), True))
+    checks.append((bash_script, os.path.exists(bash_script) and os.path.abspath(bash_script), True))
+    for program in ("curl", "jq", "bc", "trans", "vlc", "mpv", "smplayer", "streamlink", "yt-dlp"):
+        checks.append((program, shutil.which(program), False))
+    checks.append(("quantize executable", find_quantize_executable(), False))
+
+    checks.append(("models", ", ".join(model_inventory.installed()), True))
+
+    failed = False
+    for name, found, required in checks:
+        status = "ok" if found else ("MISSING" if required else "not found")
+        failed = failed or (required and not found)
+        print(f"{name:<20} {status:<10} {found or ''}")
+    return 1 if failed else 0
+
+
+def command_config(args):
+    current_options = load_settings(args.spec)
+    if args.url:
+        result = resolve_settings(current_options, args.url, current_options.get("override_option", False))
+        result["script_options"] = script_options(result, args.spec)
+    else:
+        result = {key: value for key, value in current_options.items() if not isinstance(value, dict)}
+        result["channels_with_own_options"] = sorted(key for key, value in current_options.items() if isinstance(value, dict))
+        if result.get("gemini_api_key"):
+            result["gemini_api_key"] = "********"
+    if args.json:
+        print(json.dumps(result, indent=1))
+    else:
+        for key, value in result.items():
+            print(f"{key:<28} {value}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Headless batch tool for playlist4whisper: subtitle jobs, "
+                                                 "playlist maintenance, health checks and configuration.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sub = subparsers.add_parser("subtitles", help="Generate subtitles for local files through the job queue.")
+    sub.add_argument("files", nargs="+", help="Local audio/video files.")
+    sub.add_argument("--spec", default="iptv", help="Tab whose settings are used (config_SPEC.json).")
+    sub.add_argument("--overwrite", action="store_true", help="Generate again when the subtitle file exists.")
+    sub.add_argument("--max-jobs", type=int, default=0, help="Concurrent jobs, 0 = automatic from cores and memory.")
+    sub.add_argument("--no-wait", action="store_true", help="Only queue the jobs (a running GUI or CLI picks them up).")
+    sub.set_defaults(func=command_subtitles)
+
+    sub = subparsers.add_parser("jobs", help="List, retry, cancel or clear subtitle jobs.")
+    sub.add_argument("--retry", type=int, metavar="ID")
+    sub.add_argument("--cancel", type=int, metavar="ID")
+    sub.add_argument("--clear", action="store_true", help="Remove finished, failed and cancelled jobs.")
+    sub.add_argument("--json", action="store_true")
+    sub.set_defaults(func=command_jobs)
+
+    sub = subparsers.add_parser("playlist", help="Import, deduplicate or export a playlist.")
+    sub.add_argument("action", choices=["import", "dedupe", "export"])
+    sub.add_argument("sources", nargs="*", help="M3U files to import.")
+    sub.add_argument("--spec", default="iptv", help="Tab whose playlist is used (playlist_SPEC.m3u).")
+    sub.add_argument("--playlist", help="Playlist file, instead of the tab's default one.")
+    sub.add_argument("--dedupe", action="store_true", help="Drop repeated URLs after importing.")
+    sub.add_argument("--format", choices=["m3u", "csv", "json", "urls"], default="m3u")
+    sub.add_argument("--output", help="Export file, standard output by default.")
+    sub.set_defaults(func=command_playlist)
+
+    sub = subparsers.add_parser("model", help="Download (and quantize) models into ./models.")
+    sub.add_argument("action", choices=["install", "quantize"],
+                     help="quantize takes a base model and quantization types, all of them by default.")
+    sub.add_argument("models", nargs="+", metavar="MODEL", help="e.g. 'install base small.en-q5_0' or 'quantize small q5_0 q8_0'")
+    sub.add_argument("--url-template", help="Download URL with {} for the model name (mirror or local test server).")
+    sub.add_argument("--jobs", type=int, default=0, help="Quantizations run at once, 0 = one per core as memory allows.")
+    sub.set_defaults(func=command_model)
+
+    sub = subparsers.add_parser("benchmark", help="Measure transcription speed on this machine.")
+    benchmarks = sub.add_subparsers(dest="benchmark", required=True)
+
+    def benchmark_parser(name, help, func):
+        sub = benchmarks.add_parser(name, help=help)
+        sub.add_argument("--spec", default="iptv", help="Tab whose whisper executable and step size are used by default.")
+        sub.add_argument("--step", type=int, help="Chunk length in seconds (livestream_video.sh --step).")
+        sub.add_argument("--executable", help="whisper.cpp executable, e.g. ./build/bin/whisper-cli")
+        sub.add_argument("--threads", type=int, default=default_whisper_threads)
+        sub.set_defaults(func=func)
+        return sub
+
+    sub = benchmark_parser("models", "Measure installed models and recommend one for a step size.", command_benchmark)
+    sub.add_argument("models", nargs="*", metavar="MODEL", help="Models to measure, all installed models by default.")
+    sub.add_argument("--target-rtf", type=float, default=0.8,
+                     help="Largest real-time factor (processing time / audio time) to recommend a model for live use.")
+
+    sub = benchmark_parser("server", "Compare one whisper process per chunk with a persistent whisper-server.",
+                           command_benchmark_server)
+    sub.add_argument("model")
+    sub.add_argument("--chunks", type=int, default=5)
+
+    sub = benchmarks.add_parser("subtitles", help="Time a batch of subtitle runs through the job queue and all started at once.")
+    sub.add_argument("files", nargs="+", help="Local audio/video files.")
+    sub.add_argument("--spec", default="iptv", help="Tab whose settings are used (config_SPEC.json).")
+    sub.add_argument("--overwrite", action="store_true", help="Also use files whose subtitle file exists (it is written again).")
+    sub.add_argument("--max-jobs", type=int, default=0, help="Limit of the queue, 0 = automatic from cores and memory.")
+    sub.set_defaults(func=command_benchmark_subtitles)
+
+    sub = benchmark_parser("threads", "Calibrate a model's thread scaling and compare 1, 2, 4 concurrent sessions.",
+                           command_benchmark_threads)
+    sub.add_argument("model")
+    sub.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4], help="Concurrent session counts to compare.")
+    sub.add_argument("--rounds", type=int, default=2, help="Chunks transcribed by every session.")
+
+    sub = benchmark_parser("ingest", "Compare chunk extraction with one ffmpeg per chunk and with the in-memory ring buffer.",
+                           command_benchmark_ingest)
+    sub.add_argument("file", help="A recorded stream or audio/video file.")
+
+    sub = benchmark_parser("pipeline", "Compare the lag of the live engine with its stages in turn and pipelined.",
+                           command_benchmark_pipeline)
+    sub.add_argument("file", help="A recorded stream or audio/video file, played in real time.")
+    sub.add_argument("model")
+    sub.add_argument("--language", default="auto")
+    sub.add_argument("--seconds", type=int, help="Stop each run after this many seconds of audio.")
+    sub.add_argument("--trans", action="store_true", help="Translate with 'trans'.")
+    sub.add_argument("--trans-language", default="en")
+    sub.add_argument("--gemini-model", help="Translate with Gemini (GEMINI_API_KEY in the environment).")
+    sub.add_argument("--queue", type=int, default=2, help="Chunks waiting in front of each stage at most.")
+
+    sub = benchmark_parser("step", "Compare the lag of the live engine with a fixed step and with the step controller.",
+                           command_benchmark_step)
+    sub.add_argument("file", help="A recorded stream or audio/video file, played in real time.")
+    sub.add_argument("--model", help="Model to transcribe with; without it, a synthetic slow transcription is timed.")
+    sub.add_argument("--min-step", type=float, default=3)
+    sub.add_argument("--max-step", type=float, default=30)
+    sub.add_argument("--asr-overhead", type=float, default=2.0, help="Seconds per chunk of the synthetic transcription.")
+    sub.add_argument("--asr-rtf", type=float, default=0.7, help="Seconds per second of audio of the synthetic transcription.")
+    sub.add_argument("--seconds", type=int, help="Stop each run after this many seconds of audio.")
+
+    sub = benchmark_parser("language", "Compare detecting the language of every chunk with pinning it.",
+                           command_benchmark_language)
+    sub.add_argument("file", help="A recorded stream or audio/video file, played in real time.")
+    sub.add_argument("model")
+    sub.add_argument("--agree", type=int, default=3, help="Chunks that must agree before the language is pinned.")
+    sub.add_argument("--seconds", type=int, help="Stop each run after this many seconds of audio.")
+
+    sub = benchmark_parser("overlap", "Compare the cost of speech recognition without and with overlapping chunks.",
+                           command_benchmark_overlap)
+    sub.add_argument("file", help="A recorded stream or audio/video file, played in real time.")
+    sub.add_argument("model")
+    sub.add_argument("--overlap", type=float, nargs="+", default=[1, 2], help="Seconds of overlap to compare.")
+    sub.add_argument("--seconds", type=int, help="Stop each run after this many seconds of audio.")
+
+    sub = benchmark_parser("provisional", "Compare when words appear with the final text only and with provisional text.",
+                           command_benchmark_provisional)
+    sub.add_argument("file", help="A recorded stream or audio/video file, played in real time.")
+    sub.add_argument("model")
+    sub.add_argument("--provisional-model", help="Model for provisional text (default: one measured faster, or a quantized variant).")
+    sub.add_argument("--interval", type=float, default=2, help="Seconds of new audio per provisional sub-window.")
+    sub.add_argument("--seconds", type=int, help="Stop each run after this many seconds of audio.")
+
+    sub = subparsers.add_parser("live", help="Live transcription engine used by livestream_video.sh --live-engine.")
+    sub.add_argument("source", help="Capture file (followed while it grows) or URL.")
+    sub.add_argument("--pid", type=int, help="livestream_video.sh session, for its thread budget and file names.")
+    sub.add_argument("--step", type=int, default=9)
+    sub.add_argument("--model", default="base")
+    sub.add_argument("--language", default="auto")
+    sub.add_argument("--translate", action="store_true")
+    sub.add_argument("--executable", default=default_executable_option)
+    sub.add_argument("--server-port", type=int, help="Port of a running whisper-server to use instead of the executable.")
+    sub.add_argument("--buffer", type=int, default=300, help="Seconds of decoded audio kept in memory.")
+    sub.add_argument("--no-follow", action="store_true", help="Read a finished file at full speed instead of following it.")
+    sub.add_argument("--output-text", choices=["original", "translation", "both", "none"], default="original")
+    sub.add_argument("--trans", action="store_true", help="Translate with 'trans' (the fallback when Gemini is used).")
+    sub.add_argument("--trans-language", default="en")
+    sub.add_argument("--gemini-model", help="Translate with Gemini (GEMINI_API_KEY in the environment).")
+    sub.add_argument("--gemini-level", type=int, choices=range(4), default=2, help="Gemini context level.")
+    sub.add_argument("--speak", action="store_true", help="Speak the translation.")
+    sub.add_argument("--queue", type=int, default=2, help="Chunks waiting in front of each stage at most.")
+    sub.add_argument("--sequential", action="store_true", help="Run the stages one after another, as livestream_video.sh.")
+    sub.add_argument("--vad", action="store_true", help="End chunks at the nearest pause (needs NumPy).")
+    sub.add_argument("--vad-executable", help="whisper-vad-speech-segments, to use the Silero model where energy finds no pause.")
+    sub.add_argument("--vad-model", help="Silero model for --vad-executable, e.g. ./models/ggml-silero-v5.1.2.bin")
+    sub.add_argument("--vad-marker", default="", help="Shown before text of chunks not cut at a pause.")
+    sub.add_argument("--transcript", help="JSON Lines file the segments are appended to "
+                                          "(default with --pid: /tmp/transcript-whisper-live_PID.jsonl).")
+    sub.add_argument("--gate", type=float, default=0,
+                     help="Skip chunks whose speech probability is below this (0-1, e.g. 0.1, needs NumPy); "
+                          "0 transcribes every chunk.")
+    sub.add_argument("--min-step", type=float, help="Let the step follow the speed of transcription, down to this.")
+    sub.add_argument("--max-step", type=float, help="Let the step follow the speed of transcription, up to this.")
+    sub.add_argument("--max-lag", type=float, default=0,
+                     help="Catch up when this many seconds of audio wait to be transcribed; 0 never does.")
+    sub.add_argument("--catch-up", default="model,merge,drop",
+                     help="What to do, one more at a time, while behind: model (a faster model), merge (longer chunks), "
+                          "drop (skip the oldest audio).")
+    sub.add_argument("--fast-model", help="Model for 'model' (default: one measured faster, or a quantized variant).")
+    sub.add_argument("--metrics", help="JSON file the stage timings and percentiles are written to every few seconds "
+                                       "(default with --pid: /tmp/metrics-whisper-live_PID.json).")
+    sub.add_argument("--pin-language", type=int, default=0, metavar="N",
+                     help="With --language auto, pin the language after N chunks agree on it; 0 detects it every chunk.")
+    sub.add_argument("--overlap", type=float, default=0,
+                     help="Seconds each chunk repeats of the one before, so words cut at the boundary are heard whole; "
+                          "the repeated words are removed.")
+    sub.add_argument("--provisional", type=float, default=0, metavar="SECONDS",
+                     help="Show provisional text of every SECONDS of new audio (e.g. 2) until the final text replaces it; "
+                          "0 shows the final text only.")
+    sub.add_argument("--provisional-model",
+                     help="Model for provisional text (default: one measured faster, or a quantized variant).")
+    sub.set_defaults(func=command_live)
+
+    sub = subparsers.add_parser("warmup", help="Read a model into the page cache, or measure the first chunk with and without it.")
+    sub.add_argument("model")
+    sub.add_argument("--measure", action="store_true",
+                     help="Transcribe one chunk after dropping the model from the cache and again after reading it.")
+    sub.add_argument("--spec", default="iptv")
+    sub.add_argument("--step", type=int)
+    sub.add_argument("--executable")
+    sub.add_argument("--threads", type=int, default=default_whisper_threads)
+    sub.set_defaults(func=command_warmup)
+
+    sub = subparsers.add_parser("port", help="Allocate, release or list loopback ports used by livestream_video.sh.")
+    sub.add_argument("action", choices=["allocate", "release", "list"])
+    sub.add_argument("--pid", type=int, help="Owner of the port, the calling process by default.")
+    sub.add_argument("--port", type=int)
+    sub.set_defaults(func=command_port)
+
+    sub = subparsers.add_parser("session", help="Admit, release or list transcription sessions (resource governor), "
+                                                "or show the stage latencies of live engine sessions (metrics).")
+    sub.add_argument("action", choices=["admit", "release", "list", "preview", "metrics"])
+    sub.add_argument("--pid", type=int, help="Session process, the calling process by default.")
+    sub.add_argument("--model", default="base")
+    sub.add_argument("--executable", help="whisper executable, to look up the model's calibrated thread scaling.")
+    sub.add_argument("--kind", choices=["live", "subtitles"], default="live")
+    sub.add_argument("--max-sessions", type=int, default=0, help="Concurrent sessions, 0 = one per core.")
+    sub.add_argument("--json", action="store_true")
+    sub.set_defaults(func=command_session)
+
+    sub = subparsers.add_parser("metrics", help="Serve the metrics of all sessions to Prometheus on a local port.")
+    sub.add_argument("--host", default="127.0.0.1", help="Address to listen on; keep it local unless firewalled.")
+    sub.add_argument("--port", type=int, default=9477)
+    sub.add_argument("--once", action="store_true", help="Print the metrics once instead of serving them.")
+    sub.set_defaults(func=command_metrics)
+
+    sub = subparsers.add_parser("capture", help="Share one capture between the sessions on the same stream "
+                                                "(livestream_video.sh --shared-capture).")
+    sub.add_argument("action", choices=["subscribe", "unsubscribe", "list", "run"],
+                     help="run is the ingestion process, started by the first subscriber.")
+    sub.add_argument("target", nargs="?", help="URL of the stream (the key of the capture for run).")
+    sub.add_argument("--pid", type=int, help="Session process, the calling process by default.")
+    sub.add_argument("--method", choices=["streamlink", "yt-dlp"], help="Capture with streamlink or yt-dlp.")
+    sub.add_argument("--segments", type=int, default=0,
+                     help="Timeshift segments to keep; prints the segment files after the socket (ffmpeg pattern).")
+    sub.add_argument("--segment-time", type=int, default=10, help="Minutes per timeshift segment.")
+    sub.add_argument("--timeout", type=float, default=20, help="Seconds to wait for the capture to start.")
+    sub.add_argument("--json", action="store_true")
+    sub.set_defaults(func=command_capture)
+
+    sub = subparsers.add_parser("check", help="Check required programs and installed models.")
+    sub.set_defaults(func=command_check)
+
+    sub = subparsers.add_parser("config", help="Show a tab's options, or the settings resolved for one URL.")
+    sub.add_argument("--spec", default="iptv")
+    sub.add_argument("--url", help="Show the settings the GUI would use to play or transcribe this URL.")
+    sub.add_argument("--json", action="store_true")
+    sub.set_defaults(func=command_config)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2174 @@
+#!/usr/bin/env python3
+"""
+playlist4whisper_core - Tk-free helpers shared by "playlist4whisper.py" and "livestream_video.sh".
+
+Everything in this module must stay importable without a display: no tkinter, no optional
+third-party packages at import time. It holds the shared registries (file + flock based, so
+several instances and users can cooperate), resource probing and the batch job machinery.
+
+Author: Antonio R. Version: 5.34 License: GPL 3.0
+
+Copyright (c) 2023 Antonio R.
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+https://github.com/antor44/livestream_video
+
+--------------------------------------------------------------------------------
+"""
+
+import os
+import re
+import json
+import time
+import errno
+import fcntl
+import hashlib
+import shutil
+import signal
+import socket
+import random
+import platform
+import tempfile
+import threading
+import subprocess
+from contextlib import contextmanager
+
+
+# Default options, shared by the GUI tabs and the headless CLI
+default_executable_option = "./build/bin/whisper-cli"
+default_terminal_option = "xterm"
+default_bash_options = "9 base auto vad raw"
+default_timeshiftactive_option = False
+default_timeshift_options = "6 4 10"
+default_playeronly_option = False
+default_player_option = "mpv"
+default_mpv_options = ""
+default_online_translation_option = False
+default_trans_options = "en both speak"
+default_override_option = False
+default_engine_model_option = "Google Translate"
+default_gemini_api_key = ""
+default_gemini_model = "gemini-3-flash-preview"
+default_gemini_level_option = "2"
+
+# Array of executable names in priority order
+whisper_executables = ["./build/bin/whisper-cli", "./main", "whisper-cpp", "pwcpp", "whisper"]
+whisper_server_executables = ["./build/bin/whisper-server", "./server", "whisper-server"]
+quantize_executables = ["./build/bin/whisper-quantize", "./build/bin/quantize", "./whisper-quantize", "./quantize"]
+
+models = ["tiny.en", "tiny", "base.en", "base", "small.en", "small", "medium.en", "medium", "large-v1", "large-v2", "large-v3", "large-v3-turbo"]
+suffixes = ["-q2_k", "-q3_k", "-q4_0", "-q4_1", "-q4_k", "-q5_0", "-q5_1", "-q5_k", "-q6_k", "-q8_0"]
+model_path = "./models/ggml-{}.bin"
+model_list = models + [model + suffix for model in models for suffix in suffixes]
+
+lang_codes = {'auto': 'Autodetect', 'af': 'Afrikaans', 'am': 'Amharic', 'ar': 'Arabic', 'as': 'Assamese',
+            'az': 'Azerbaijani', 'ba': 'Bashkir', 'be': 'Belarusian', 'bg': 'Bulgarian', 'bn': 'Bengali',
+            'bo': 'Tibetan', 'br': 'Breton', 'bs': 'Bosnian', 'ca': 'Catalan', 'cs': 'Czech', 'cy': 'Welsh',
+            'da': 'Danish', 'de': 'German', 'el': 'Greek', 'en': 'English', 'eo': 'Esperanto', 'es': 'Spanish',
+            'et': 'Estonian', 'eu': 'Basque', 'fa': 'Persian', 'fi': 'Finnish', 'fo': 'Faroese',
+            'fr': 'French', 'ga': 'Irish', 'gl': 'Galician', 'gu': 'Gujarati', 'ha': 'Hausa',
+            'haw': 'Hawaiian', 'he': 'Hebrew', 'hi': 'Hindi', 'hr': 'Croatian', 'ht': 'Haitian Creole',
+            'hu': 'Hungarian', 'hy': 'Armenian', 'id': 'Indonesian', 'is': 'Icelandic', 'it': 'Italian',
+            'ja': 'Japanese', 'jw': 'Javanese', 'ka': 'Georgian', 'kk': 'Kazakh',
+            'km': 'Khmer', 'kn': 'Kannada', 'ko': 'Korean', 'ku': 'Kurdish', 'ky': 'Kyrgyz',
+            'la': 'Latin', 'lb': 'Luxembourgish', 'ln': 'Lingala', 'lo': 'Lao', 'lt': 'Lithuanian',
+            'lv': 'Latvian', 'mg': 'Malagasy', 'mi': 'Maori', 'mk': 'Macedonian', 'ml': 'Malayalam',
+            'mn': 'Mongolian', 'mr': 'Marathi', 'ms': 'Malay', 'mt': 'Maltese', 'my': 'Myanmar',
+            'ne': 'Nepali', 'nl': 'Dutch', 'nn': 'Nynorsk', 'no': 'Norwegian', 'oc': 'Occitan',
+            'or': 'Oriya', 'pa': 'Punjabi', 'pl': 'Polish', 'ps': 'Pashto', 'pt': 'Portuguese',
+            'ro': 'Romanian', 'ru': 'Russian', 'sa': 'Sanskrit', 'sd': 'Sindhi',
+            'sh': 'Serbo-Croatian', 'si': 'Sinhala', 'sk': 'Slovak', 'sl': 'Slovenian',
+            'sn': 'Shona', 'so': 'Somali', 'sq': 'Albanian', 'sr': 'Serbian',
+            'su': 'Sundanese', 'sv': 'Swedish', 'sw': 'Swahili', 'ta': 'Tamil',
+            'te': 'Telugu', 'tg': 'Tajik', 'th': 'Thai', 'tl': 'Tagalog',
+            'tk': 'Turkmen', 'tr': 'Turkish', 'tt': 'Tatar', 'ug': 'Uighur',
+            'uk': 'Ukrainian', 'ur': 'Urdu', 'uz': 'Uzbek', 'vi': 'Vietnamese',
+            'vo': 'Volapuk', 'wa': 'Walloon', 'xh': 'Xhosa', 'yi': 'Yiddish',
+            'yo': 'Yoruba', 'zh': 'Chinese', 'zu': 'Zulu'}
+
+# Where ggml models are downloaded from, and their SHA1 (same list as whisper.cpp's models/README.md).
+# A 'models/manifest.json' file ({"model": "sha1", ...}) adds or overrides entries.
+model_download_url = "https://huggingface.co/ggerganov/whisper.cpp/resolve/main/ggml-{}.bin"
+model_sha1 = {
+    "tiny": "bd577a113a864445d4c299885e0cb97d4ba92b5f", "tiny.en": "c78c86eb1a8faa21b369bcd33207cc90d64ae9df",
+    "base": "465707469ff3a37a2b9b8d8f89f2f99de7299dac", "base.en": "137c40403d78fd54d454da0f9bd998f78703390c",
+    "small": "55356645c2b361a969dfd0ef2c5a50d530afd8d5", "small.en": "db8a495a91d927739e50b3fc1cc4c6b8f6c2d022",
+    "medium": "fd9727b6e1217c2f614f9b698455c4ffd82463b4", "medium.en": "8c30f0e44ce9560643ebd10bbe50cd20eafd3723",
+    "large-v1": "b1caaf735c4cc1429223d5a74f0f4d0b9b59a299", "large-v2": "0f4c8e34f21cf1a914c59d8b3ce882345ad349d6",
+    "large-v3": "ad82bf6a9043ceed055076d0fd39f5f186ff8062", "large-v3-turbo": "4af2b29d7ec73d781377bfd1758ca957a807e941",
+}
+
+# Approximate runtime memory of whisper.cpp per base model (bytes), used when the
+# model file is not on disk yet. Quantized variants are scaled from their file size.
+model_memory_estimates = {
+    "tiny": 273 * 1024**2, "base": 388 * 1024**2, "small": 852 * 1024**2,
+    "medium": 2100 * 1024**2, "large": 3900 * 1024**2,
+}
+
+# Threads each whisper run uses (livestream_video.sh passes "-t 4").
+default_whisper_threads = 4
+default_warmup_option = True
+default_server_option = False
+default_live_engine_option = False
+default_catch_up_option = False
+
+
+# --- Process and resource helpers ---
+
+# What the command line of each kind of registered process contains, for pid_alive(match=...)
+session_command = "livestream_video"  # a livestream_video.sh session
+app_command = "playlist4whisper"  # the GUI or the CLI
+ingestion_command = "playlist4whisper_cli"  # a shared capture ('capture run')
+
+
+def pid_alive(pid, match=None):
+    """
+    Returns True if the process exists. If 'match' is given and the command line can be
+    read (Linux /proc), the command line must also contain it, which protects against
+    PID reuse after a crash.
+    """
+    try:
+        pid = int(pid)
+    except (TypeError, ValueError):
+        return False
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        if e.errno != errno.EPERM:
+            return False
+    if match:
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                cmdline = f.read().replace(b"\0", b" ").decode(errors="replace")
+            return match in cmdline
+        except OSError:
+            pass
+    return True
+
+
+def cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def available_memory_bytes():
+    """Returns the memory available for new processes, or None if it cannot be determined."""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    if platform.system() == "Darwin":
+        try:
+            output = subprocess.run(["vm_stat"], capture_output=True, text=True, timeout=2).stdout
+            page_size = int(re.search(r"page size of (\d+) bytes", output).group(1))
+            pages = 0
+            for key in ("Pages free", "Pages inactive", "Pages speculative", "Pages purgeable"):
+                found = re.search(rf"{key}:\s+(\d+)", output)
+                if found:
+                    pages += int(found.group(1))
+            return pages * page_size
+        except (OSError, AttributeError, ValueError, subprocess.SubprocessError):
+            pass
+    return None
+
+
+def total_memory_bytes():
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def estimate_model_memory(model):
+    """Estimates the RAM a whisper.cpp process needs for 'model' (e.g. 'base', 'small-q5_0')."""
+    path = model_path.format(model)
+    family = model.split(".")[0].split("-q")[0]
+    family = "large" if family.startswith("large") else family
+    base_estimate = model_memory_estimates.get(family, model_memory_estimates["base"])
+    try:
+        size = os.path.getsize(path)
+        # Working buffers (KV cache, mel, compute graph) on top of the weights.
+        return int(size * 1.1) + min(base_estimate // 3, 900 * 1024**2)
+    except OSError:
+        return base_estimate
+
+
+def prefetch_file(path, cancelled=None, chunk_size=8 * 1024**2):
+    """
+    Reads a file once so that it is in the page cache for the processes that open it next.
+    Returns the number of bytes read; stops early if the 'cancelled' event is set.
+    """
+    done = 0
+    buffer = bytearray(chunk_size)
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        while not (cancelled is not None and cancelled.is_set()):
+            n = f.readinto(buffer)
+            if not n:
+                break
+            done += n
+    return done
+
+
+def evict_file(path):
+    """Asks the kernel to drop a file from the page cache (Linux), to measure a cold start. Returns False if unsupported."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return True
+
+
+def media_duration(path):
+    """Returns the duration of a media file in seconds using ffprobe, or None."""
+    try:
+        result = subprocess.run(["ffprobe", "-v", "quiet", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+                                capture_output=True, text=True, timeout=30)
+        return float(result.stdout.strip())
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+# --- Shared registries ---
+
+class JsonRegistry:
+    """
+    A small JSON document on disk shared between processes (and users, for files in /tmp).
+
+    Every access goes through 'locked()', which holds an exclusive flock on a companion
+    '.lock' file while the document is read, modified and written back. Readers take a
+    shared lock, so they never see it while it is being changed. The document is written to
+    a temporary file, synced and renamed over it, so a process that dies while writing
+    leaves the previous version, not a truncated one (read as empty). Both files are world
+    writable because several users may run sessions on the same machine.
+    """
+
+    def __init__(self, path, default=None):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self.default = default if default is not None else {}
+
+    def _read(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return json.loads(json.dumps(self.default))
+
+    def _write(self, data):
+        payload = json.dumps(data, indent=1)
+        directory, name = os.path.split(self.path)
+        fd, partial = tempfile.mkstemp(prefix=name + ".", suffix=".part", dir=directory or ".")
+        try:
+            with os.fdopen(fd, "w") as f:
+                os.fchmod(f.fileno(), 0o666)
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                os.replace(partial, self.path)
+                return
+            except PermissionError:
+                pass  # Owned by another user in a sticky directory (/tmp): rewritten in place below
+        finally:
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+        with os.fdopen(_open_shared(self.path), "w") as f:
+            f.write(payload)
+            f.truncate()
+
+    @contextmanager
+    def locked(self):
+        """Yields the document for modification; it is saved when the block exits normally."""
+        with os.fdopen(_open_shared(self.lock_path), "r+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                data = self._read()
+                yield data
+                self._write(data)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def read(self):
+        """Returns a snapshot of the document without modifying it."""
+        with os.fdopen(_open_shared(self.lock_path), "r+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH)
+            try:
+                return self._read()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _open_shared(path):
+    # Opens (creating if needed) a file every local user can lock and rewrite.
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        os.fchmod(fd, 0o666)
+    except OSError:
+        pass  # Owned by another user, who already made it shareable
+    return fd
+
+
+class PortAllocator:
+    """
+    Loopback ports for livestream_video.sh sessions (VLC HTTP interface, ffmpeg UDP output).
+
+    The registry maps port -> owner PID. Allocation takes the registry lock, drops ports
+    whose owner is gone (crashed sessions used to leak them forever, and a PID reused since
+    must still run 'match', the owner's command), then picks random
+    candidates until one is both unregistered and actually free, checked with a real
+    TCP and UDP bind() on 127.0.0.1. With far fewer sessions than ports this needs one
+    or two attempts, whatever the number of concurrent sessions.
+    """
+
+    def __init__(self, registry_file=os.path.join(tempfile.gettempdir(), "livestream_video-ports.json"),
+                 port_range=(20000, 60999)):
+        self.registry = JsonRegistry(registry_file, default={"ports": {}})
+        self.port_range = port_range
+
+    def allocate(self, pid, attempts=200, match=session_command):
+        """Returns a free port registered to 'pid', or None if none could be found."""
+        with self.registry.locked() as data:
+            ports = data["ports"]
+            self._reclaim(ports)
+            for _ in range(attempts):
+                port = random.randint(*self.port_range)
+                if str(port) not in ports and port_is_free(port):
+                    ports[str(port)] = {"pid": int(pid), "since": time.time(), "match": match}
+                    return port
+        return None
+
+    def release(self, port=None, pid=None):
+        """Releases one port, or every port owned by 'pid'. Returns the number released."""
+        with self.registry.locked() as data:
+            ports = data["ports"]
+            doomed = [key for key, entry in ports.items()
+                      if (port is not None and key == str(port)) or (pid is not None and entry["pid"] == int(pid))]
+            for key in doomed:
+                del ports[key]
+            self._reclaim(ports)
+            return len(doomed)
+
+    def in_use(self):
+        """Returns {port: pid} for live owners."""
+        with self.registry.locked() as data:
+            self._reclaim(data["ports"])
+            return {int(key): entry["pid"] for key, entry in data["ports"].items()}
+
+    @staticmethod
+    def _reclaim(ports):
+        for key in [key for key, entry in ports.items()
+                    if not pid_alive(entry["pid"], match=entry.get("match", session_command))]:
+            del ports[key]
+
+
+def port_is_free(port, host="127.0.0.1"):
+    """True if nothing is bound to 'port' on 'host', for both TCP and UDP."""
+    for kind in (socket.SOCK_STREAM, socket.SOCK_DGRAM):
+        with socket.socket(socket.AF_INET, kind) as probe:
+            try:
+                probe.bind((host, port))
+            except OSError:
+                return False
+    return True
+
+
+def allot_threads(limits, cores):
+    """
+    Splits 'cores' between sessions, given as {session: most threads it can use}: each gets at
+    least one, then one more in turn while cores are left, so shares differ by one at most
+    unless a session reaches its limit; the cores it cannot use go to the others.
+    """
+    budgets = {session: 1 for session in limits}
+    remaining = cores - len(limits)
+    while remaining > 0:
+        growing = [session for session in limits if budgets[session] < limits[session]]
+        if not growing:
+            break
+        for session in growing[:remaining]:
+            budgets[session] += 1
+        remaining -= min(remaining, len(growing))
+    return budgets
+
+
+class SessionGovernor:
+    """
+    Admission control shared by every transcription session on the machine (all tabs,
+    instances and users), so that together they do not ask for more than the machine has.
+
+    A session asks 'admit()' before loading its model and gets one of:
+      - "admit": it may start; every live session gets a fair share of the cores as
+        its thread budget (rebalanced whenever a session joins or leaves), but no more
+        threads than its model can use ('ModelBenchmarks.useful_threads'); the cores it
+        cannot use go to the other sessions,
+      - "queue": no room now (all cores taken, or not enough free memory while other
+        sessions run); ask again later, waiting sessions are served in arrival order,
+      - "reject": the model can never fit in this machine's memory.
+    Budgets are also written to 'threads_file' per session, a plain number that the bash
+    script re-reads before every whisper run at no cost.
+    """
+
+    def __init__(self, registry_file=os.path.join(tempfile.gettempdir(), "livestream_video-sessions.json"),
+                 max_sessions=0, max_threads=8,
+                 threads_file=os.path.join(tempfile.gettempdir(), "livestream_video-threads_{}")):
+        self.registry = JsonRegistry(registry_file, default={"sessions": {}, "waiting": {}})
+        self.max_sessions = max_sessions  # 0 = one per core
+        self.max_threads = max_threads
+        self.threads_file = threads_file
+
+    def admit(self, pid, model="base", kind="live", executable=None):
+        """Returns (decision, threads, reason)."""
+        pid = str(int(pid))
+        limit = ModelBenchmarks().useful_threads(executable, model) if executable else None
+        needed = estimate_model_memory(model)
+        total = total_memory_bytes()
+        if total is not None and needed > total:
+            return "reject", 0, f"model {model} needs about {needed // 1024**2} MB, the machine has {total // 1024**2} MB"
+
+        with self.registry.locked() as data:
+            self._reclaim(data)
+            sessions, waiting = data["sessions"], data["waiting"]
+            if pid in sessions:
+                return "admit", sessions[pid]["threads"], "already admitted"
+            now = time.time()
+            waiting.setdefault(pid, {"since": now, "kind": kind})
+
+            reason = self._room_for(sessions, needed, now)
+            if reason is None:
+                # Live sessions go first, then arrival order
+                first = min(waiting.items(), key=lambda item: (item[1]["kind"] != "live", item[1]["since"]))[0]
+                if first != pid:
+                    reason = "other sessions are waiting"
+            if reason is not None:
+                return "queue", 0, reason
+
+            del waiting[pid]
+            sessions[pid] = {"model": model, "kind": kind, "since": now, "memory": needed, "threads": 1, "limit": limit}
+            self._rebalance(sessions)
+            return "admit", sessions[pid]["threads"], f"{len(sessions)} session(s) on {cpu_count()} cores"
+
+    def release(self, pid):
+        with self.registry.locked() as data:
+            data["sessions"].pop(str(pid), None)
+            data["waiting"].pop(str(pid), None)
+            self._remove_threads_file(pid)
+            self._reclaim(data)
+            self._rebalance(data["sessions"])
+
+    def preview(self, model="base", executable=None):
+        """The thread budget a session starting now would get (if admitted), and the number of running sessions."""
+        limit = ModelBenchmarks().useful_threads(executable, model) if executable else None
+        data = self.registry.read()
+        sessions = {pid: session for pid, session in data["sessions"].items() if pid_alive(pid, match=session_command)}
+        limits = {pid: session.get("limit") or self.max_threads for pid, session in sessions.items()}
+        limits[None] = limit or self.max_threads
+        return allot_threads(limits, cpu_count())[None], len(sessions)
+
+    def report(self, pid, state):
+        """Stores what a running session reports about itself (e.g. its lag), for 'states()'."""
+        with self.registry.locked() as data:
+            session = data["sessions"].get(str(pid))
+            if session is not None:
+                session["state"] = dict(state, time=round(time.time(), 1))
+
+    def running(self):
+        """The admitted sessions that are still running, {pid: session}, read without the write lock."""
+        return {pid: session for pid, session in self.registry.read()["sessions"].items()
+                if pid_alive(pid, match=session_command)}
+
+    def states(self):
+        """The last state reported by each running session, {pid: state}."""
+        return {pid: session["state"] for pid, session in self.registry.read()["sessions"].items()
+                if "state" in session and pid_alive(pid, match=session_command)}
+
+    def threads_for(self, pid):
+        """Current thread budget of an admitted session, or None."""
+        session = self.registry.read()["sessions"].get(str(pid))
+        return session["threads"] if session else None
+
+    def status(self):
+        with self.registry.locked() as data:
+            self._reclaim(data)
+            return json.loads(json.dumps(data))
+
+    def _room_for(self, sessions, needed, now):
+        """Returns None if another session fits now, otherwise the reason it does not."""
+        limit = self.max_sessions or cpu_count()
+        if len(sessions) >= limit:
+            return f"all {limit} session slots are in use"
+        memory = available_memory_bytes()
+        if memory is None or not sessions:
+            return None  # Nothing to wait for when this would be the only session
+        # Models of sessions admitted moments ago may not be loaded yet
+        memory -= sum(session["memory"] for session in sessions.values() if now - session["since"] < 30)
+        if memory < needed:
+            return f"not enough free memory ({max(0, memory) // 1024**2} MB, about {needed // 1024**2} MB needed)"
+        return None
+
+    def _rebalance(self, sessions):
+        if not sessions:
+            return
+        budgets = allot_threads({pid: session.get("limit") or self.max_threads for pid, session in sessions.items()},
+                                cpu_count())
+        for pid, session in sessions.items():
+            threads = session["threads"] = budgets[pid]
+            try:
+                with os.fdopen(_open_shared(self.threads_file.format(pid)), "w") as f:
+                    f.write(f"{threads}\n")
+                    f.truncate()
+            except OSError:
+                pass
+
+    def _reclaim(self, data):
+        for group in ("sessions", "waiting"):
+            # Sessions are livestream_video.sh processes; a PID reused since a crash is not one
+            for pid in [pid for pid in data[group] if not pid_alive(pid, match=session_command)]:
+                del data[group][pid]
+                self._remove_threads_file(pid)
+
+    def _remove_threads_file(self, pid):
+        try:
+            os.remove(self.threads_file.format(pid))
+        except OSError:
+            pass
+
+
+session_metrics_file = os.path.join(tempfile.gettempdir(), "metrics-whisper-live_{}.json")
+
+
+def read_session_metrics():
+    """The last metrics written by every running live engine session, {pid: metrics}."""
+    directory, pattern = os.path.split(session_metrics_file)
+    prefix, suffix = pattern.split("{}")
+    metrics = {}
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return metrics
+    for name in names:
+        pid = name[len(prefix):-len(suffix)] if name.startswith(prefix) and name.endswith(suffix) else ""
+        if not pid.isdigit() or not pid_alive(pid, match=session_command):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                metrics[pid] = json.load(f)
+        except (OSError, ValueError):
+            pass
+    return metrics
+
+
+def process_tree_usage(roots):
+    """
+    CPU seconds and resident memory of each process in 'roots' and all its descendants, as
+    {root: {"cpu_seconds", "rss_bytes", "processes"}}. The CPU time includes the children
+    they have already reaped (a whisper run per chunk). Linux /proc; elsewhere one 'ps', which
+    knows only the live processes.
+    """
+    processes = {}  # pid: (ppid, cpu_seconds, rss_bytes)
+    if os.path.isdir("/proc/self"):
+        ticks, page = os.sysconf("SC_CLK_TCK"), os.sysconf("SC_PAGE_SIZE")
+        for name in os.listdir("/proc"):
+            if not name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{name}/stat") as f:
+                    # The command name in parentheses may contain spaces
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except (OSError, IndexError):
+                continue
+            processes[name] = (fields[1], sum(int(value) for value in fields[11:15]) / ticks, int(fields[21]) * page)
+    else:
+        try:
+            output = subprocess.run(["ps", "-A", "-o", "pid=,ppid=,rss=,cputime="], capture_output=True,
+                                    text=True, timeout=5).stdout
+        except (OSError, subprocess.SubprocessError):
+            output = ""
+        for line in output.splitlines():
+            try:
+                pid, ppid, rss, cputime = line.split()
+                days, _, clock = cputime.rpartition("-")
+                seconds = sum(float(part) * 60 ** index for index, part in enumerate(reversed(clock.split(":"))))
+                processes[pid] = (ppid, seconds + int(days or 0) * 86400, int(rss) * 1024)
+            except ValueError:
+                continue
+    children = {}
+    for pid, (ppid, _, _) in processes.items():
+        children.setdefault(ppid, []).append(pid)
+    usage = {}
+    for root in map(str, roots):
+        if root not in processes:
+            continue
+        total = {"cpu_seconds": 0.0, "rss_bytes": 0, "processes": 0}
+        pending = [root]
+        while pending:
+            pid = pending.pop()
+            _, cpu, rss = processes[pid]
+            total["cpu_seconds"] += cpu
+            total["rss_bytes"] += rss
+            total["processes"] += 1
+            pending += children.get(pid, [])
+        usage[root] = total
+    return usage
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_metrics(sessions, metrics, usage):
+    """
+    The text exposition format of Prometheus for the sessions of the resource governor
+    ('sessions', as in SessionGovernor.status()), the metrics files of their live engines
+    ('metrics', as from read_session_metrics()) and the CPU and memory of their processes
+    ('usage', as from process_tree_usage()).
+    """
+    families = {}  # name: (type, description, [(labels, value)])
+
+    def add(name, kind, description, labels, value):
+        families.setdefault(name, (kind, description, []))[2].append((labels, value))
+
+    for pid, session in sorted(sessions.items()):
+        labels = {"pid": pid, "model": session["model"], "kind": session["kind"]}
+        add("livestream_session_threads", "gauge", "Whisper thread budget of the session.", labels, session["threads"])
+        if pid in usage:
+            add("livestream_session_cpu_seconds_total", "counter",
+                "CPU time of the session and all its processes, including reaped whisper runs.", labels,
+                usage[pid]["cpu_seconds"])
+            add("livestream_session_rss_bytes", "gauge", "Resident memory of the session's processes.", labels,
+                usage[pid]["rss_bytes"])
+        engine = metrics.get(pid)
+        if engine is None:
+            continue
+        add("livestream_chunks_total", "counter", "Chunks cut by the live engine.", labels, engine["chunks"])
+        add("livestream_chunks_transcribed_total", "counter", "Chunks transcribed by whisper.", labels,
+            engine["transcribed"])
+        add("livestream_chunks_silent_total", "counter", "Chunks skipped by the silence gate.", labels,
+            engine["silent_chunks"])
+        add("livestream_audio_seconds_total", "counter", "Audio decoded by the live engine.", labels,
+            engine["audio_seconds"])
+        transcribed = engine.get("transcribed_seconds", 0)
+        if transcribed:
+            add("livestream_rtf", "gauge", "Real-time factor of whisper: processing time / audio time.", labels,
+                round(engine["asr_seconds"] / transcribed, 3))
+        add("livestream_lag_seconds", "gauge", "Audio waiting to be transcribed.", labels, engine["lag"])
+        add("livestream_step_seconds", "gauge", "Current step of the session.", labels, engine["step"])
+        add("livestream_catch_up_actions", "gauge", "Catch-up actions taken (faster model, merge, drop).", labels,
+            len(engine.get("catch_up", [])))
+        translation = engine.get("translation")
+        if translation:
+            add("livestream_translation_requests_total", "counter", "Gemini translation requests.", labels,
+                translation["requests"])
+            add("livestream_translation_failures_total", "counter", "Gemini requests without a translation.", labels,
+                translation["failures"])
+            add("livestream_translation_fallbacks_total", "counter", "Chunks translated by 'trans' for Gemini.", labels,
+                translation["fallbacks"])
+        for stage, stats in engine["stages"].items():
+            busy = stats["busy"]
+            if not busy["count"]:
+                continue
+            stage_labels = dict(labels, stage=stage)
+            for key, quantile in (("p50", "0.5"), ("p95", "0.95"), ("p99", "0.99")):
+                add("livestream_stage_seconds", "summary", "Time per chunk in each stage of the live engine "
+                    "(gemini and trans: translation latency).", dict(stage_labels, quantile=quantile), busy[key])
+            add("livestream_stage_seconds_sum", None, None, stage_labels, round(busy["mean"] * busy["count"], 3))
+            add("livestream_stage_seconds_count", None, None, stage_labels, busy["count"])
+    add("livestream_sessions", "gauge", "Sessions admitted by the resource governor.", {}, len(sessions))
+
+    lines = []
+    for name, (kind, description, samples) in families.items():
+        if kind:
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{_label_value(value)}"' for key, value in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# --- Shared capture ---
+
+capture_socket_file = os.path.join(tempfile.gettempdir(), "capture-whisper-live_{}.sock")
+capture_segment_files = os.path.join(tempfile.gettempdir(), "capture-whisper-live_{}_buf%03d.avi")
+stream_default_ports = {"http": 80, "https": 443, "rtmp": 1935, "rtmps": 443, "rtsp": 554}
+
+
+def normalize_stream_url(url):
+    """
+    The stream 'url' points to, so that sessions on the same one share its capture: scheme and
+    host in lower case, without user name, default port, fragment, trailing slash or tracking
+    parameters, with the query sorted. YouTube videos become youtube:ID and Twitch channels
+    twitch:CHANNEL, whatever the form of their URL. None for what is not a network stream
+    (local files, pulse, avfoundation).
+    """
+    import urllib.parse  # Only needed here; keeps the CLI startup fast
+
+    try:
+        parts = urllib.parse.urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https", "rtmp", "rtmps", "rtsp", "srt", "udp", "rtp", "mms") or not parts.hostname:
+        return None
+    host = parts.hostname  # Already in lower case
+    site = re.sub(r"^(www|m|music)\.", "", host)
+    path = parts.path.rstrip("/")
+    query = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+    if site in ("youtube.com", "youtu.be"):
+        video = dict(query).get("v") if path == "/watch" else None
+        match = re.match(r"^/(?:live|shorts|embed)/([\w-]+)$", path) if site == "youtube.com" else re.match(r"^/([\w-]+)$", path)
+        if video or match:
+            return f"youtube:{video or match.group(1)}"
+    if site == "twitch.tv" and path:
+        return f"twitch:{path.strip('/').split('/')[0].lower()}"
+    netloc = f"[{host}]" if ":" in host else host
+    if port and port != stream_default_ports.get(scheme):
+        netloc += f":{port}"
+    query = sorted((key, value) for key, value in query if not key.startswith("utm_") and key not in ("fbclid", "gclid"))
+    return urllib.parse.urlunsplit((scheme, netloc, path, urllib.parse.urlencode(query), ""))
+
+
+class CaptureBroker:
+    """
+    One capture per stream for all the sessions on the machine that play it (e.g. two tabs on
+    the same channel with different models or target languages), instead of one ffmpeg, and
+    streamlink or yt-dlp, each.
+
+    Captures are registered under a key made from the normalized URL. The first session that
+    subscribes to a stream starts its ingestion process (CaptureFanout in
+    playlist4whisper_live.py), which decodes the audio once and fans it out on a Unix socket
+    to every session, and with 'segments' also writes the timeshift segment files that the
+    timeshift sessions on the stream play. Later sessions are only added to its subscribers,
+    and the segments kept grow to the most any of them asked for. The ingestion stops once
+    the capture has had no subscriber for 'linger' seconds, whether they unsubscribed or
+    died, so a session that restarts quickly finds its capture still running.
+    """
+
+    def __init__(self, registry_file=os.path.join(tempfile.gettempdir(), "livestream_video-captures.json"), linger=10):
+        self.registry = JsonRegistry(registry_file, default={"captures": {}})
+        self.linger = linger
+
+    def subscribe(self, url, pid, segments=0, segment_time=600, method=None):
+        """
+        Adds 'pid' to the subscribers of the capture of 'url' and returns (key, capture, new); with
+        'new', there was none and the caller starts the ingestion. Raises ValueError for what is
+        not a network stream. 'segments' only starts the segment files of a new capture; for one
+        already running, it raises the number of segments kept if it writes them.
+        """
+        normalized = normalize_stream_url(url)
+        if normalized is None:
+            raise ValueError(f"{url} is not a network stream; its capture cannot be shared.")
+        key = hashlib.sha1(normalized.encode()).hexdigest()[:12]
+        with self.registry.locked() as data:
+            captures = data["captures"]
+            self._reclaim(captures)
+            new = key not in captures
+            if new:
+                captures[key] = {"url": url, "normalized": normalized, "pid": None, "since": time.time(),
+                                 "socket": capture_socket_file.format(key), "method": method,
+                                 "segments": segments, "segment_time": segment_time,
+                                 "segment_files": capture_segment_files.format(key) if segments else None,
+                                 "subscribers": {}}
+            elif captures[key]["segment_files"]:
+                captures[key]["segments"] = max(captures[key]["segments"], segments)
+            captures[key]["subscribers"][str(int(pid))] = time.time()
+            return key, json.loads(json.dumps(captures[key])), new
+
+    def attach(self, key, pid):
+        """Records the ingestion process of a capture."""
+        with self.registry.locked() as data:
+            if key in data["captures"]:
+                data["captures"][key]["pid"] = int(pid)
+
+    def unsubscribe(self, pid, key=None):
+        """Removes 'pid' from the subscribers of 'key', or of every capture. Returns the number it left."""
+        with self.registry.locked() as data:
+            left = 0
+            for capture_key, capture in data["captures"].items():
+                if key in (None, capture_key) and capture["subscribers"].pop(str(int(pid)), None) is not None:
+                    left += 1
+            return left
+
+    def subscribers(self, key):
+        """The number of live subscribers of a capture, or None if it is no longer registered."""
+        capture = self.registry.read()["captures"].get(key)
+        if capture is None:
+            return None
+        return sum(1 for pid in capture["subscribers"] if pid_alive(pid, match=session_command))
+
+    def update(self, key, **stats):
+        """Stores what the ingestion reports about a capture (clients, audio decoded...), for 'captures()'."""
+        with self.registry.locked() as data:
+            capture = data["captures"].get(key)
+            if capture is not None:
+                capture["stats"] = dict(stats, time=round(time.time(), 1))
+
+    def release_if_idle(self, key):
+        """Unregisters a capture left without live subscribers; returns False if one subscribed meanwhile."""
+        with self.registry.locked() as data:
+            capture = data["captures"].get(key)
+            if capture is not None and any(pid_alive(pid, match=session_command) for pid in capture["subscribers"]):
+                return False
+            data["captures"].pop(key, None)
+            return True
+
+    def remove(self, key):
+        with self.registry.locked() as data:
+            data["captures"].pop(key, None)
+
+    def captures(self):
+        """The registered captures, {key: capture}, without dead subscribers."""
+        with self.registry.locked() as data:
+            self._reclaim(data["captures"])
+            return json.loads(json.dumps(data["captures"]))
+
+    @staticmethod
+    def _reclaim(captures):
+        now = time.time()
+        for key, capture in list(captures.items()):
+            # Subscribers are livestream_video.sh sessions, the ingestion a 'capture run' of the CLI
+            for pid in [pid for pid in capture["subscribers"] if not pid_alive(pid, match=session_command)]:
+                del capture["subscribers"][pid]
+            # An ingestion that died, or never started
+            if (capture["pid"] is not None and not pid_alive(capture["pid"], match=ingestion_command)
+                    or capture["pid"] is None and now - capture["since"] > 60):
+                del captures[key]
+
+
+# --- Settings and playlists ---
+
+def find_whisper_executable():
+    """Returns the first available whisper executable in priority order, or None."""
+    for exe in whisper_executables:
+        if shutil.which(exe):
+            return exe
+    return None
+
+
+def find_whisper_server_executable():
+    for exe in whisper_server_executables:
+        if shutil.which(exe):
+            return exe
+    return None
+
+
+def find_quantize_executable():
+    for path in quantize_executables:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_config_file(spec):
+    """
+    Reads 'config_{spec}.json' on top of the default options. Raises OSError/ValueError
+    if the file exists but cannot be read.
+    """
+    options = {
+        "executable_option": default_executable_option,
+        "terminal_option": default_terminal_option,
+        "bash_options": default_bash_options,
+        "playeronly_option": default_playeronly_option,
+        "player_option": default_player_option,
+        "mpv_options": default_mpv_options,
+        "override_option": default_override_option,
+        "timeshiftactive_option": default_timeshiftactive_option,
+        "timeshift_options": default_timeshift_options,
+        "online_translation_option": default_online_translation_option,
+        "trans_options": default_trans_options,
+        "engine_model_option": default_engine_model_option,
+        "gemini_api_key": default_gemini_api_key,
+        "gemini_level_option": default_gemini_level_option,
+        "warmup_option": default_warmup_option,
+        "server_option": default_server_option,
+        "live_engine_option": default_live_engine_option,
+        "catch_up_option": default_catch_up_option
+    }
+    config_file = f'config_{spec}.json'
+    if os.path.exists(config_file):
+        with open(config_file, "r") as file:
+            options.update(json.load(file))
+    return options
+
+
+def resolve_settings(current_options, url, override):
+    """
+    Returns the effective settings for 'url': the global options of the tab, replaced by
+    the options saved for that channel unless 'override' (global mode) is active.
+    """
+    # 1. Base Global Options
+    opts = {
+        "executable": current_options.get("executable_option", default_executable_option),
+        "terminal": current_options.get("terminal_option", default_terminal_option),
+        "bash_options": current_options.get("bash_options", default_bash_options),
+        "playeronly": current_options.get("playeronly_option", default_playeronly_option),
+        "player": current_options.get("player_option", default_player_option),
+        "mpv_options": current_options.get("mpv_options", default_mpv_options),
+        "timeshiftactive": current_options.get("timeshiftactive_option", default_timeshiftactive_option),
+        "timeshift_options": current_options.get("timeshift_options", default_timeshift_options),
+        "online_translation": current_options.get("online_translation_option", default_online_translation_option),
+        "trans_options": current_options.get("trans_options", default_trans_options),
+        "engine_model": current_options.get("engine_model_option", default_engine_model_option),
+        "gemini_level": current_options.get("gemini_level_option", default_gemini_level_option),
+        "vad": False,
+        "translate": False
+    }
+
+    # 2. Per-Item Overrides (only if not in global override mode)
+    if not override and url in current_options:
+        item_config = current_options[url]
+        mapping = {
+            "executable_option": "executable",
+            "terminal_option": "terminal",
+            "bash_options": "bash_options",
+            "playeronly_option": "playeronly",
+            "player_option": "player",
+            "mpv_options": "mpv_options",
+            "timeshiftactive_option": "timeshiftactive",
+            "timeshift_options": "timeshift_options",
+            "online_translation_option": "online_translation",
+            "trans_options": "trans_options",
+            "engine_model_option": "engine_model",
+            "gemini_level_option": "gemini_level"
+        }
+        for cfg_key, target_key in mapping.items():
+            if cfg_key in item_config:
+                opts[target_key] = item_config[cfg_key]
+
+    # 3. Parse complex options into a flat result dictionary
+    res = {
+        "executable": opts["executable"],
+        "terminal": opts["terminal"],
+        "playeronly": opts["playeronly"],
+        "player": opts["player"],
+        "mpv_options": opts["mpv_options"],
+        "timeshiftactive": opts["timeshiftactive"],
+        "online_translation": opts["online_translation"],
+        "engine_model": opts["engine_model"],
+        "gemini_level": opts["gemini_level"],
+        # Performance options are set per tab, not per channel
+        "server": current_options.get("server_option", default_server_option),
+        "live_engine": current_options.get("live_engine_option", default_live_engine_option),
+        "catch_up": current_options.get("catch_up_option", default_catch_up_option)
+    }
+
+    # Parse bash_options
+    b_opts = opts["bash_options"].split()
+    res["step"] = "9"
+    res["model"] = "base"
+    res["language_code"] = "auto"
+    res["translate"] = False
+    res["vad"] = False
+    res["quality"] = "raw"
+    for o in b_opts:
+        if o.isdigit() and (3 <= int(o) <= 60): res["step"] = o
+        elif o == "translate": res["translate"] = True
+        elif o == "vad": res["vad"] = True
+        elif o in ["raw", "upper", "lower"]: res["quality"] = o
+        elif o in model_list: res["model"] = o
+        elif o in lang_codes: res["language_code"] = o
+
+    # Parse timeshift_options
+    ts_opts = opts["timeshift_options"].split()
+    if len(ts_opts) >= 3:
+        res["sync"] = ts_opts[0]
+        res["segments"] = ts_opts[1]
+        res["segment_time"] = ts_opts[2]
+    else:
+        d_ts = default_timeshift_options.split()
+        res["sync"] = d_ts[0]
+        res["segments"] = d_ts[1]
+        res["segment_time"] = d_ts[2]
+
+    # Parse trans_options
+    tr_opts = opts["trans_options"].split()
+    res["trans_language_code"] = "en"
+    res["output_text"] = "both"
+    res["speak"] = False
+    for o in tr_opts:
+        if o in lang_codes: res["trans_language_code"] = o
+        elif o in ["original", "translation", "both", "none"]: res["output_text"] = o
+        elif o == "speak": res["speak"] = True
+
+    return res
+
+
+def script_options(s, spec, subtitles=False):
+    """Builds the livestream_video.sh options for resolved settings 's' (without translation and player)."""
+    translate_value = " --translate" if s["translate"] else ""
+    bash_options = "--step " + s["step"] + " --model " + s["model"] + " --language " + s["language_code"] + \
+                   translate_value + " --" + s["quality"]
+
+    if s["playeronly"]:
+        bash_options = bash_options + " --playeronly"
+    if s["timeshiftactive"]:
+        bash_options = bash_options + " --timeshift --sync " + s["sync"] + " --segments " + s["segments"] + " --segment_time " + s["segment_time"]
+    if s["vad"]:
+        bash_options = bash_options + " --vad"
+    if spec == "streamlink":
+        bash_options = bash_options + " --streamlink"
+    if spec == "yt-dlp":
+        bash_options = bash_options + " --yt-dlp"
+    if subtitles:
+        # Batch jobs run unattended, overwriting is confirmed before they are queued
+        bash_options = bash_options + " --subtitles --yes"
+    else:
+        if s.get("server"):
+            bash_options = bash_options + " --server"
+        if s.get("live_engine"):
+            bash_options = bash_options + " --live-engine"
+        if s.get("catch_up"):
+            bash_options = bash_options + " --catch-up"
+    return bash_options
+
+
+def translation_options(s, gemini_api_key=""):
+    """
+    Returns (options, env) for online translation with settings 's'. 'env' holds the
+    Gemini API key, or is None when translate-shell's Google engine is used; a Gemini
+    engine without a key also falls back to Google.
+    """
+    speak_value = " speak" if s["speak"] else ""
+    options = f" --trans {s['trans_language_code']} {s['output_text']}{speak_value}"
+    if s["engine_model"] == "Google Translate" or not gemini_api_key:
+        return options, None
+    options += f" --gemini-trans {s['engine_model']}"
+    options += f" --gemini-level {s['gemini_level']}"
+    env = os.environ.copy()
+    env["GEMINI_API_KEY"] = gemini_api_key
+    return options, env
+
+
+def read_playlist(filename):
+    """Returns the (name, url) entries of an M3U playlist. Raises OSError if it cannot be read."""
+    with open(filename, "r", encoding='utf-8') as file:
+        lines = file.readlines()
+
+    entries = []
+    for i, line in enumerate(lines):
+        if line.startswith("#EXTINF"):
+            name = line[line.rfind(",") + 1:].strip()
+            url = None
+
+            for j in range(i + 1, len(lines)):
+                url_line = lines[j].strip()
+                if url_line and not url_line.startswith("#"):
+                    url = url_line
+                    break
+
+            if url:
+                entries.append((name, url))
+    return entries
+
+
+def write_playlist(filename, entries):
+    with open(filename, "w") as file:
+        for name, url in entries:
+            file.write(f"#EXTINF:-1,{name}\n{url}\n")
+
+
+# --- Model installation ---
+
+class ModelInventory:
+    """
+    The models present in ./models, from a single os.scandir() of the directory.
+
+    Adding, removing or renaming a file changes the directory's mtime, so 'refresh()'
+    costs one stat() while nothing changed and rescans only when something did
+    (a download in progress writes to a '.part' file and appears when it is renamed).
+    """
+
+    def __init__(self, directory=os.path.dirname(model_path)):
+        self.directory = directory
+        self.stamp = None
+        self.entries = {}  # model -> (size, mtime)
+        self.generation = 0  # incremented on every change, so each menu can tell whether it is stale
+        self.lock = threading.Lock()
+        self.known = set(model_list)
+
+    def refresh(self, force=False):
+        """Rescans if the directory changed. Returns True if the set of models or their files changed."""
+        try:
+            st = os.stat(self.directory)
+            stamp = (st.st_ino, st.st_mtime_ns)
+        except OSError:
+            stamp = None
+        with self.lock:
+            if stamp == self.stamp and not force:
+                return False
+            entries = {}
+            if stamp is not None:
+                with os.scandir(self.directory) as it:
+                    for entry in it:
+                        name = entry.name
+                        if name.startswith("ggml-") and name.endswith(".bin") and name[5:-4] in self.known:
+                            try:
+                                st = entry.stat()
+                            except OSError:
+                                continue
+                            entries[name[5:-4]] = (st.st_size, st.st_mtime)
+            changed = entries != self.entries
+            self.entries, self.stamp = entries, stamp
+            if changed:
+                self.generation += 1
+            return changed
+
+    def installed(self):
+        """Installed models, in 'model_list' order."""
+        self.refresh()
+        with self.lock:
+            return [model for model in model_list if model in self.entries]
+
+    def info(self, model):
+        """(size, mtime) of an installed model, or None."""
+        self.refresh()
+        with self.lock:
+            return self.entries.get(model)
+
+
+model_inventory = ModelInventory()
+
+class DownloadError(Exception):
+    pass
+
+
+def expected_model_sha1(model, manifest_file="./models/manifest.json"):
+    try:
+        with open(manifest_file, "r") as f:
+            manifest = json.load(f)
+        if model in manifest:
+            return manifest[model]
+    except (OSError, ValueError):
+        pass
+    return model_sha1.get(model)
+
+
+def download_model(model, url_template=None, progress=None, cancelled=None, retries=3, chunk_size=1024**2):
+    """
+    Downloads 'ggml-{model}.bin' into ./models.
+
+    Data goes to a '.part' file that later calls resume with an HTTP Range request, so an
+    interrupted download (network error, cancel, closed application) continues where it
+    stopped. The SHA1 is checked against the manifest before the file is moved into place
+    with an atomic rename; a corrupt download is deleted. 'progress(done, total, speed)'
+    receives bytes and bytes per second. 'cancelled' is a threading.Event.
+    """
+    import urllib.error  # Only needed here; keeps the CLI startup fast
+    url = (url_template or model_download_url).format(model)
+    target = model_path.format(model)
+    partial = target + ".part"
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    attempt = 0
+    while True:
+        try:
+            _download_to(url, partial, progress, cancelled, chunk_size)
+            break
+        except (OSError, DownloadError) as e:
+            if cancelled is not None and cancelled.is_set():
+                raise DownloadError("Download cancelled.")
+            attempt += 1
+            if attempt >= retries or (isinstance(e, urllib.error.HTTPError) and e.code < 500):
+                raise DownloadError(f"Download of {model} failed: {e}")
+            time.sleep(2 * attempt)  # Resumes from the partial file
+
+    expected = expected_model_sha1(model)
+    if expected:
+        digest = hashlib.sha1()
+        with open(partial, "rb") as f:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                digest.update(block)
+        if digest.hexdigest() != expected:
+            _remove_partial(partial)
+            raise DownloadError(f"Checksum mismatch for {model}: the download was corrupt and has been removed.")
+    os.replace(partial, target)
+
+
+def _download_to(url, partial, progress, cancelled, chunk_size):
+    import urllib.error
+    import urllib.request
+    offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+    request = urllib.request.Request(url, headers={"User-Agent": "playlist4whisper"})
+    if offset:
+        request.add_header("Range", f"bytes={offset}-")
+    try:
+        response = urllib.request.urlopen(request, timeout=30)
+    except urllib.error.HTTPError as e:
+        if e.code == 416 and offset:
+            return  # Nothing left to fetch, the checksum decides
+        raise
+
+    with response:
+        if response.status != 206:
+            offset = 0  # Server ignored the range, start over
+        length = response.headers.get("Content-Length")
+        total = offset + int(length) if length else None
+        done = offset
+        started, started_bytes = time.time(), done
+        with open(partial, "ab" if offset else "wb") as f:
+            while True:
+                if cancelled is not None and cancelled.is_set():
+                    raise DownloadError("Download cancelled.")
+                block = response.read(chunk_size)
+                if not block:
+                    break
+                f.write(block)
+                done += len(block)
+                if progress:
+                    progress(done, total, (done - started_bytes) / max(time.time() - started, 1e-6))
+            f.flush()
+            os.fsync(f.fileno())
+    if total is not None and done < total:
+        raise DownloadError(f"connection closed at {done} of {total} bytes")
+
+def parse_model_name(model_name):
+    """Splits 'small.en-q5_0' into ('small.en', '-q5_0'); plain models return an empty suffix."""
+    for sfx in suffixes:
+        if model_name.endswith(sfx) and model_name[:-len(sfx)] in models:
+            return model_name[:-len(sfx)], sfx
+    return model_name, ""
+
+
+class InstallJob:
+    """State of one model installation, updated by its worker thread and read by the GUI."""
+
+    def __init__(self, model):
+        self.model = model
+        self.base_model, self.suffix = parse_model_name(model)
+        self.state = "queued"  # queued, downloading, quantizing, done, failed, cancelled
+        self.progress = None   # 0..1, or None while unknown
+        self.message = "Waiting..."
+        self.cancelled = threading.Event()
+        self.process = None
+        self.started_at = time.time()
+        self.elapsed = None        # Seconds the installation took, once finished
+        self.quantize_time = None  # Seconds spent in the quantize executable itself
+        self.size = None           # Size of the installed model file
+
+    def report(self):
+        """One line with the outcome, size and time of the installation."""
+        if self.state != "done":
+            return f"{self.model}: {self.state} - {self.message}"
+        if self.quantize_time is None:
+            return f"{self.model}: {self.size / 1024**2:.1f} MB in {self.elapsed:.1f}s"
+        return f"{self.model}: {self.size / 1024**2:.1f} MB, quantized in {self.quantize_time:.1f}s ({self.elapsed:.1f}s in total)"
+
+    @property
+    def finished(self):
+        return self.state in ("done", "failed", "cancelled")
+
+    def cancel(self):
+        self.cancelled.set()
+        if self.process is not None and self.process.poll() is None:
+            _terminate_process_group(self.process.pid)
+
+
+class ModelInstaller:
+    """
+    Installs models in background threads: downloads the base model ('download_model'),
+    then quantizes it when a suffix (e.g. '-q5_0') is requested. Each 'install()' returns an InstallJob
+    with its state and progress; 'on_done(job)' is called from the worker thread when
+    it ends. Several models install at once; two variants of the same base model share
+    a single download. Nothing here blocks the caller or parses 'ps' output.
+
+    Quantizations run in a bounded pool ('max_quantize', by default one per core as far
+    as memory allows), and the base model is read into the page cache once, before its
+    first quantization, so the variants do not each read it from disk.
+    """
+
+    def __init__(self, quantize_executable=None, url_template=None, max_quantize=0):
+        self.quantize_executable = quantize_executable
+        self.url_template = url_template
+        self.max_quantize = max_quantize  # 0 = automatic
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.base_locks = {}
+        self.prefetched = {}  # base model file -> mtime when it was read into the page cache
+        self.quantize_slots = None
+
+    def install(self, model, on_done=None):
+        with self.lock:
+            job = self.jobs.get(model)
+            if job is not None and not job.finished:
+                return job  # Already installing
+            job = InstallJob(model)
+            self.jobs[model] = job
+        threading.Thread(target=self._run, args=(job, on_done), daemon=True).start()
+        return job
+
+    def install_variants(self, base_model, variant_suffixes, on_done=None):
+        """Quantizes 'base_model' with each suffix in 'variant_suffixes' (e.g. ['-q5_0', '-q8_0'])."""
+        if base_model not in models:
+            raise ValueError(f"Unknown model: {base_model}")
+        unknown = [sfx for sfx in variant_suffixes if sfx not in suffixes]
+        if unknown:
+            raise ValueError(f"Unknown quantization: {', '.join(unknown)}")
+        return [self.install(f"{base_model}{sfx}", on_done) for sfx in dict.fromkeys(variant_suffixes)]
+
+    def quantize_limit(self, base_model):
+        """How many quantizations may run at once: one per core, each holding the base model and its output in memory."""
+        if self.max_quantize > 0:
+            return self.max_quantize
+        memory = available_memory_bytes()
+        if memory is None:
+            return cpu_count()
+        return max(1, min(cpu_count(), memory // (2 * estimate_model_memory(base_model))))
+
+    def active_jobs(self):
+        with self.lock:
+            return [job for job in self.jobs.values() if not job.finished]
+
+    def _run(self, job, on_done):
+        try:
+            if job.suffix and not self.quantize_executable:
+                raise RuntimeError("Quantize executable does not exist.")
+            with self.lock:
+                base_lock = self.base_locks.setdefault(job.base_model, threading.Lock())
+            with base_lock:
+                if not job.cancelled.is_set() and not os.path.exists(model_path.format(job.base_model)):
+                    self._download(job)
+                if job.suffix and not job.cancelled.is_set():
+                    self._prefetch(job)
+            if job.suffix and not job.cancelled.is_set():
+                self._quantize(job)
+            job.elapsed = time.time() - job.started_at
+            if job.cancelled.is_set():
+                job.state, job.message = "cancelled", "Installation cancelled."
+            elif os.path.exists(model_path.format(job.model)):
+                job.size = os.path.getsize(model_path.format(job.model))
+                job.state, job.progress, job.message = "done", 1.0, f"Successfully installed {job.model} model."
+            else:
+                raise RuntimeError(f"The model {job.model} could not be installed.")
+        except Exception as e:
+            job.state, job.message = ("cancelled", "Installation cancelled.") if job.cancelled.is_set() else ("failed", str(e))
+        if on_done:
+            on_done(job)
+
+    def _download(self, job):
+        job.state, job.message = "downloading", f"Downloading {job.base_model}..."
+
+        def progress(done, total, speed):
+            job.progress = done / total if total else None
+            job.message = f"Downloading {job.base_model}: {done / 1024**2:.0f} MB at {speed / 1024**2:.1f} MB/s"
+
+        download_model(job.base_model, self.url_template, progress, job.cancelled)
+
+    def _prefetch(self, job):
+        # Called under the base model lock: the first variant reads the file, the others find it cached
+        path = model_path.format(job.base_model)
+        mtime = os.path.getmtime(path)
+        if self.prefetched.get(path) == mtime:
+            return
+        memory = available_memory_bytes()
+        if memory is not None and memory < 2 * os.path.getsize(path):
+            return  # Reading it would only evict other pages
+        job.message = f"Reading {job.base_model} into memory..."
+        prefetch_file(path, job.cancelled)
+        self.prefetched[path] = mtime
+
+    def _quantize(self, job):
+        target = model_path.format(job.model)
+        with self.lock:
+            if self.quantize_slots is None:
+                self.quantize_slots = threading.BoundedSemaphore(self.quantize_limit(job.base_model))
+        job.message = "Waiting for a quantization slot..."
+        while not self.quantize_slots.acquire(timeout=0.5):
+            if job.cancelled.is_set():
+                return
+        try:
+            job.state, job.message, job.progress = "quantizing", f"Quantizing {job.model}...", None
+            started = time.time()
+            returncode = self._run_step(job, [self.quantize_executable, model_path.format(job.base_model),
+                                              target, job.suffix.lstrip("-")])
+            job.quantize_time = time.time() - started
+        finally:
+            self.quantize_slots.release()
+        if returncode != 0 or job.cancelled.is_set():
+            _remove_partial(target)
+            if not job.cancelled.is_set():
+                raise RuntimeError(f"Quantization of {job.model} failed (exit {returncode}).")
+
+    def _run_step(self, job, command):
+        log_path = os.path.join(tempfile.gettempdir(), f"model-install_{job.model}.log")
+        with open(log_path, "a") as log_file:
+            job.process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=log_file,
+                                           stderr=subprocess.STDOUT, start_new_session=True)
+        return job.process.wait()
+
+
+def _remove_partial(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# --- Model warmup ---
+
+class ModelWarmer:
+    """
+    Reads model files into the page cache in a background thread, so the first chunks of
+    a channel do not wait for the disk: livestream_video.sh loads the model again for every
+    chunk and only the first loads are cold. A model is only read when the memory available
+    can hold the file twice (the cache and the copy whisper.cpp loads) plus 'reserve' bytes,
+    so warming never pushes the system into swap. The same file is not read again within
+    'interval' seconds.
+    """
+
+    def __init__(self, reserve=512 * 1024**2, interval=300):
+        self.reserve = reserve
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.active = set()
+        self.warmed = {}  # path -> (mtime, time when it was read)
+
+    def memory_allows(self, model):
+        memory = available_memory_bytes()
+        if memory is None:
+            return True
+        return memory >= os.path.getsize(model_path.format(model)) + estimate_model_memory(model) + self.reserve
+
+    def warm(self, model, on_done=None):
+        """Starts reading 'model' into the page cache. Returns False if it is not needed or memory is short."""
+        path = model_path.format(model)
+        try:
+            mtime = os.path.getmtime(path)
+            if not self.memory_allows(model):
+                print(f"Model warmup skipped for {model}: not enough free memory.")
+                return False
+        except OSError:
+            return False
+        with self.lock:
+            last = self.warmed.get(path)
+            if path in self.active or (last and last[0] == mtime and time.time() - last[1] < self.interval):
+                return False
+            self.active.add(path)
+        threading.Thread(target=self._run, args=(model, path, mtime, on_done), daemon=True).start()
+        return True
+
+    def _run(self, model, path, mtime, on_done):
+        started = time.time()
+        try:
+            size = prefetch_file(path)
+            with self.lock:
+                self.warmed[path] = (mtime, time.time())
+            print(f"Model warmup: {model} ({size / 1024**2:.0f} MB) read in {time.time() - started:.1f}s")
+        except OSError as e:
+            print(f"Model warmup failed for {model}: {e}")
+        finally:
+            with self.lock:
+                self.active.discard(path)
+        if on_done:
+            on_done(model)
+
+
+# --- Model benchmark ---
+
+benchmark_sample_paths = ["./samples/jfk.wav", "./whisper.cpp/samples/jfk.wav"]
+benchmark_text = ("And so, my fellow Americans, ask not what your country can do for you, "
+                  "ask what you can do for your country. ") * 3
+
+
+def benchmark_clip(seconds, directory=None):
+    """
+    Returns a 16 kHz mono WAV file with 'seconds' of speech, made once and reused: the
+    whisper.cpp sample (samples/jfk.wav) looped to length, or speech synthesized with
+    espeak-ng, espeak or say when the sample is not there. Raises RuntimeError if neither works.
+    """
+    directory = directory or tempfile.gettempdir()
+    target = os.path.join(directory, f"livestream_video-benchmark_{seconds}s.wav")
+    if os.path.exists(target):
+        return target
+
+    source = next((path for path in benchmark_sample_paths if os.path.exists(path)), None)
+    synthesized = None
+    if source is None:
+        synthesized = os.path.join(directory, f"livestream_video-benchmark_{os.getpid()}.aiff")
+        for command in (["espeak-ng", "-w", synthesized, benchmark_text], ["espeak", "-w", synthesized, benchmark_text],
+                        ["say", "-o", synthesized, benchmark_text]):
+            if shutil.which(command[0]) and subprocess.run(command, capture_output=True).returncode == 0:
+                source = synthesized
+                break
+    if source is None:
+        raise RuntimeError("No speech sample found (samples/jfk.wav) and no speech synthesizer (espeak-ng, espeak, say).")
+
+    partial = f"{target}.{os.getpid()}.wav"
+    try:
+        try:
+            result = subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-stream_loop", "-1", "-i", source,
+                                     "-t", str(seconds), "-ar", "16000", "-ac", "1", "-c:a", "pcm_s16le", partial],
+                                    capture_output=True, text=True)
+        except OSError as e:
+            raise RuntimeError(f"ffmpeg could not be run: {e}")
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg could not make the benchmark clip: {result.stderr.strip()}")
+        os.replace(partial, target)
+    finally:
+        _remove_partial(partial)
+        if synthesized:
+            _remove_partial(synthesized)
+    return target
+
+
+def benchmark_model(executable, model, clip, clip_seconds, threads=default_whisper_threads, language="en", timeout=900):
+    """
+    Transcribes 'clip' once with 'model', as livestream_video.sh does for each chunk, and returns
+    a dict with the real-time factor (wall time / audio time, model loading included), the
+    load time reported by whisper.cpp, and the peak resident memory of the process.
+    """
+    model_file = model_path.format(model)
+    if executable == "pwcpp":
+        command = ["pwcpp", "--language", language, "--n_threads", str(threads), "-m", model_file, clip]
+    elif executable in ("./build/bin/whisper-cli", "./main", "whisper-cpp"):
+        command = [executable, "-l", language, "-t", str(threads), "-m", model_file, "-f", clip]
+    else:
+        raise RuntimeError(f"Benchmarks need a whisper.cpp executable, not '{executable}'.")
+
+    with tempfile.TemporaryFile() as err_file:
+        started = time.monotonic()
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=err_file)
+        timer = threading.Timer(timeout, process.kill)
+        timer.start()
+        try:
+            # wait4() gives the resource usage of this child alone
+            _, status, usage = os.wait4(process.pid, 0)
+        finally:
+            timer.cancel()
+        process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        seconds = time.monotonic() - started
+        err_file.seek(0)
+        stderr = err_file.read().decode(errors="replace")
+
+    if process.returncode != 0:
+        raise RuntimeError(f"{model}: {executable} exited with {process.returncode}")
+    load_time = re.search(r"load time\s*=\s*([\d.]+)\s*ms", stderr)
+    return {
+        "rtf": round(seconds / clip_seconds, 3),
+        "seconds": round(seconds, 2),
+        "load_seconds": round(float(load_time.group(1)) / 1000, 2) if load_time else None,
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        "peak_rss": usage.ru_maxrss if platform.system() == "Darwin" else usage.ru_maxrss * 1024,
+        "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 2),
+        "threads": threads,
+        "date": time.strftime("%Y-%m-%d %H:%M"),
+    }
+
+
+def model_quality_rank(model):
+    """Orders models from least to most accurate: by model size, then by less aggressive quantization."""
+    base_model, sfx = parse_model_name(model)
+    return (models.index(base_model) if base_model in models else -1,
+            suffixes.index(sfx) if sfx else len(suffixes))
+
+
+class ModelBenchmarks:
+    """
+    Benchmark results ('benchmark_model') kept in 'model_benchmarks.json', per whisper executable
+    and step size, as {executable: {step: {model: result}}}, and the thread scaling curve of each
+    model as {"thread_scaling": {executable: {model: {"seconds": {threads: seconds}, ...}}}}.
+    """
+
+    scaling_key = "thread_scaling"
+
+    def __init__(self, results_file="model_benchmarks.json"):
+        self.registry = JsonRegistry(results_file)
+
+    def record(self, executable, step, model, result):
+        with self.registry.locked() as data:
+            data.setdefault(executable, {}).setdefault(str(step), {})[model] = result
+
+    def results(self, executable, step):
+        """Results for 'step', or for the nearest step that was measured when 'step' was not."""
+        by_step = self.registry.read().get(executable, {}) if executable != self.scaling_key else {}
+        if not by_step:
+            return {}
+        nearest = min(by_step, key=lambda measured: abs(int(measured) - int(step)))
+        return by_step[nearest]
+
+    def recommend(self, executable, step, target_rtf=0.8, installed=None):
+        """The most accurate measured model whose real-time factor stays under 'target_rtf', or None."""
+        candidates = [model for model, result in self.results(executable, step).items()
+                      if result["rtf"] <= target_rtf and (installed is None or model in installed)]
+        return max(candidates, key=model_quality_rank) if candidates else None
+
+    def faster_model(self, executable, step, model, installed):
+        """
+        A model to fall back on when 'model' does not keep up: the most accurate installed model
+        measured at least a quarter faster, else an installed quantized variant of 'model' (q5_0
+        first). None if there is none.
+        """
+        results = self.results(executable, step)
+        if model in results:
+            faster = [other for other, result in results.items()
+                      if other in installed and result["rtf"] <= results[model]["rtf"] * 0.75]
+            if faster:
+                return max(faster, key=model_quality_rank)
+        base_model, _ = parse_model_name(model)
+        for variant in ("-q5_0", "-q5_1", "-q4_0", "-q4_1", "-q5_k", "-q4_k", "-q8_0"):
+            if base_model + variant in installed and model_quality_rank(base_model + variant) < model_quality_rank(model):
+                return base_model + variant
+        return None
+
+    def record_scaling(self, executable, model, seconds):
+        """Records how long one chunk took with each thread count, {threads: seconds}."""
+        with self.registry.locked() as data:
+            data.setdefault(self.scaling_key, {}).setdefault(executable, {})[model] = {
+                "seconds": {str(threads): value for threads, value in sorted(seconds.items())},
+                "cores": cpu_count(), "date": time.strftime("%Y-%m-%d %H:%M")}
+
+    def scaling(self, executable, model):
+        """The measured {threads: seconds} of a model, or {}."""
+        curve = self.registry.read().get(self.scaling_key, {}).get(executable, {}).get(model)
+        return {int(threads): value for threads, value in curve["seconds"].items()} if curve else {}
+
+    def useful_threads(self, executable, model, min_gain=0.15):
+        """
+        The thread count after which more threads stop paying off: each step up the measured
+        curve (1, 2, 4... threads) must make the chunk at least 'min_gain' faster. None if the
+        model has not been calibrated.
+        """
+        seconds = self.scaling(executable, model)
+        if not seconds:
+            return None
+        counts = sorted(seconds)
+        useful = counts[0]
+        for previous, threads in zip(counts, counts[1:]):
+            if seconds[previous] / seconds[threads] < 1 + min_gain:
+                break
+            useful = threads
+        return useful
+
+    def stamp(self):
+        try:
+            return os.path.getmtime(self.registry.path)
+        except OSError:
+            return None
+
+
+# --- whisper.cpp server ---
+
+class WhisperServerError(Exception):
+    pass
+
+
+class WhisperServer:
+    """
+    A whisper.cpp server (whisper-server) with one model loaded for as long as it runs.
+
+    whisper-cli loads the model again for every chunk; the server loads it once and
+    transcribes each chunk posted to its /inference endpoint over a loopback port taken
+    from the PortAllocator. 'stop()' returns the resource usage of the server process.
+    """
+
+    def __init__(self, model, threads=default_whisper_threads, executable=None, port=None, owner_pid=None,
+                 log_file=None):
+        self.model = model
+        self.threads = threads
+        self.executable = executable or find_whisper_server_executable()
+        self.port = port
+        self.owner_pid = owner_pid or os.getpid()
+        self.log_file = log_file or os.path.join(tempfile.gettempdir(), f"whisper-server_{self.owner_pid}.log")
+        self.process = None
+        self.allocated_port = False
+        self.load_seconds = None
+
+    def start(self, timeout=120):
+        """Starts the server and waits until the model is loaded and it answers."""
+        if not self.executable:
+            raise WhisperServerError("whisper-server executable not found.")
+        if self.port is None:
+            # Held by this Python process (playlist4whisper*.py), unless a session was named
+            match = app_command if self.owner_pid == os.getpid() else session_command
+            self.port = PortAllocator().allocate(self.owner_pid, match=match)
+            self.allocated_port = True
+            if self.port is None:
+                raise WhisperServerError("No free loopback port for whisper-server.")
+        command = [self.executable, "-m", model_path.format(self.model), "-t", str(self.threads),
+                   "--host", "127.0.0.1", "--port", str(self.port)]
+        started = time.monotonic()
+        with open(self.log_file, "a") as log:
+            self.process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                                            start_new_session=True)
+        while time.monotonic() - started < timeout:
+            if self.process.poll() is not None:
+                self._release_port()
+                raise WhisperServerError(f"whisper-server exited with {self.process.returncode}, see {self.log_file}")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=1):
+                    self.load_seconds = time.monotonic() - started
+                    return self
+            except OSError:
+                time.sleep(0.1)
+        self.stop()
+        raise WhisperServerError(f"whisper-server did not start within {timeout}s")
+
+    def transcribe(self, audio, language="auto", translate=False, timeout=300, response_format="json"):
+        """
+        Posts a WAV file (a path, or its bytes) and returns the decoded JSON response
+        ({"text": ...}), or the response text for other formats.
+        """
+        import http.client
+
+        if isinstance(audio, str):
+            with open(audio, "rb") as f:
+                audio = f.read()
+        fields = {"response_format": response_format, "language": language, "temperature": "0.0"}
+        if translate:
+            fields["translate"] = "true"
+        boundary = f"----p4w{random.getrandbits(64):016x}"
+        body = bytearray()
+        for name, value in fields.items():
+            body += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n").encode()
+        body += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"chunk.wav\"\r\n"
+                 f"Content-Type: audio/wav\r\n\r\n").encode()
+        body += audio
+        body += f"\r\n--{boundary}--\r\n".encode()
+
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=timeout)
+        try:
+            connection.request("POST", "/inference", body=bytes(body),
+                               headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+            response = connection.getresponse()
+            payload = response.read().decode("utf-8", errors="replace")
+        except (OSError, http.client.HTTPException) as e:
+            raise WhisperServerError(f"whisper-server request failed: {e}")
+        finally:
+            connection.close()
+        if response.status != 200:
+            raise WhisperServerError(f"whisper-server answered {response.status}: {payload[:200]}")
+        if response_format in ("json", "verbose_json"):
+            try:
+                return json.loads(payload)
+            except ValueError:
+                raise WhisperServerError(f"whisper-server sent invalid JSON: {payload[:200]}")
+        return payload
+
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self):
+        """Stops the server. Returns its resource usage (os.wait4), or None if it was not ours to reap."""
+        usage = None
+        if self.process is not None:
+            if self.process.poll() is None:
+                try:
+                    os.killpg(self.process.pid, signal.SIGTERM)
+                except OSError:
+                    pass
+                try:
+                    _, status, usage = os.wait4(self.process.pid, 0)
+                    self.process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+                except ChildProcessError:
+                    pass
+            self.process = None
+        self._release_port()
+        return usage
+
+    def _release_port(self):
+        if self.allocated_port:
+            PortAllocator().release(port=self.port)
+            self.allocated_port = False
+
+
+def thread_counts(cores=None):
+    """Thread counts to calibrate: 1, 2, 4... and the number of cores."""
+    cores = cores or cpu_count()
+    counts = [1]
+    while counts[-1] * 2 < cores:
+        counts.append(counts[-1] * 2)
+    return counts + [cores] if cores > 1 else counts
+
+
+def calibrate_threads(executable, model, clip, clip_seconds, cores=None, language="auto"):
+    """Transcribes 'clip' with each of 'thread_counts()' and returns {threads: seconds}."""
+    return {threads: benchmark_model(executable, model, clip, clip_seconds, threads=threads, language=language)["seconds"]
+            for threads in thread_counts(cores)}
+
+
+def benchmark_server(model, clip, clip_seconds, chunks=5, threads=default_whisper_threads, language="en",
+                     executable=None):
+    """
+    Transcribes 'clip' 'chunks' times through one WhisperServer. Returns the server start-up
+    (model load) time, the latency of each chunk, and the CPU time of the server process
+    spread over the chunks, to compare with 'benchmark_model' (one process per chunk).
+    """
+    server = WhisperServer(model, threads=threads, executable=executable).start()
+    latencies = []
+    try:
+        for _ in range(chunks):
+            started = time.monotonic()
+            server.transcribe(clip, language=language)
+            latencies.append(time.monotonic() - started)
+    finally:
+        usage = server.stop()
+    cpu = usage.ru_utime + usage.ru_stime if usage else None
+    return {
+        "load_seconds": round(server.load_seconds, 2),
+        "latencies": [round(latency, 3) for latency in latencies],
+        "rtf": round(sum(latencies) / len(latencies) / clip_seconds, 3),
+        "cpu_seconds_per_chunk": round(cpu / chunks, 2) if cpu is not None else None,
+        "peak_rss": (usage.ru_maxrss if platform.system() == "Darwin" else usage.ru_maxrss * 1024) if usage else None,
+    }
+
+
+# --- Batch subtitle generation ---
+
+def subtitle_destination(url, language_code, translate):
+    """Mirrors the name livestream_video.sh gives the Whisper AI subtitle file."""
+    base = os.path.splitext(url)[0]
+    return f"{base}.en.srt" if translate else f"{base}.{language_code}.srt"
+
+
+def subtitle_job_environment(job):
+    """Provides the Gemini API key to a queued job; keys are never stored in the job file."""
+    if "--gemini-trans" not in job["args"]:
+        return {}
+    try:
+        api_key = load_config_file(job["spec"]).get("gemini_api_key", "")
+    except (OSError, ValueError):
+        api_key = ""
+    return {"GEMINI_API_KEY": api_key} if api_key else {}
+
+
+def _format_seconds(seconds):
+    seconds = int(max(0, seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{(seconds % 3600) // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class SubtitleJobQueue:
+    """
+    A persistent, bounded queue of "livestream_video.sh --subtitles" runs.
+
+    Jobs are stored in 'subtitle_jobs.json' (next to the config files), so a batch survives
+    application restarts: queued jobs are picked up again and jobs whose worker process is
+    still alive are adopted. Instead of starting every selected file at once, at most
+    'concurrency_limit()' whisper processes run at the same time; the limit follows the
+    number of cores and the memory left for another model instance. Failed runs are
+    retried up to 'max_attempts' times. Several application instances may share the file:
+    a job is claimed under the registry lock and records the PID of its owner.
+
+    The queue runs in a daemon thread and never touches Tk. The GUI reads 'snapshot()'.
+    """
+
+    states = ("queued", "running", "done", "failed", "cancelled")
+
+    def __init__(self, jobs_file="subtitle_jobs.json", max_attempts=3, max_concurrent=0,
+                 threads_per_job=default_whisper_threads, poll_interval=1.0, env_provider=None,
+                 log_file=os.path.join(tempfile.gettempdir(), "subtitle-job_{}.log")):
+        self.registry = JsonRegistry(jobs_file, default={"jobs": [], "speed": {}, "next_id": 1})
+        self.max_attempts = max_attempts
+        self.max_concurrent = max_concurrent  # 0 = automatic
+        self.threads_per_job = threads_per_job
+        self.poll_interval = poll_interval
+        self.env_provider = env_provider  # callable(job) -> dict of extra environment variables
+        self.log_file = log_file  # {} = job id
+        self.processes = {}  # job id -> subprocess.Popen started by this instance
+        self.lock = threading.Lock()
+        self.snapshot_cache = []
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+
+    # --- Public API ---
+
+    def add(self, url, args, model="base", spec="", destination=None):
+        """Queues a subtitle run. 'args' is the full argument list of the bash script."""
+        with self.registry.locked() as data:
+            job_id = data.get("next_id", 1)
+            data["next_id"] = job_id + 1
+            data["jobs"].append({
+                "id": job_id, "url": url, "args": list(args), "model": model, "spec": spec,
+                "destination": destination, "state": "queued", "attempts": 0,
+                "duration": None, "pid": None, "owner": None, "log": None,
+                "queued_at": time.time(), "started_at": None, "finished_at": None,
+                "returncode": None, "not_before": 0,
+            })
+        self.wake_event.set()
+        return job_id
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self, terminate_running=False):
+        self.stop_event.set()
+        self.wake_event.set()
+        if terminate_running:
+            for job_id in list(self.processes):
+                self.cancel(job_id)
+
+    def cancel(self, job_id):
+        with self.registry.locked() as data:
+            for job in data["jobs"]:
+                if job["id"] == job_id and job["state"] in ("queued", "running"):
+                    if job["state"] == "running" and job.get("pid"):
+                        _terminate_process_group(job["pid"])
+                    job["state"] = "cancelled"
+                    job["finished_at"] = time.time()
+        self.processes.pop(job_id, None)
+        self.wake_event.set()
+
+    def retry(self, job_id):
+        with self.registry.locked() as data:
+            for job in data["jobs"]:
+                if job["id"] == job_id and job["state"] in ("failed", "cancelled"):
+                    job.update(state="queued", attempts=0, not_before=0, returncode=None)
+        self.wake_event.set()
+
+    def clear_finished(self):
+        with self.registry.locked() as data:
+            data["jobs"] = [job for job in data["jobs"] if job["state"] in ("queued", "running")]
+        self.wake_event.set()
+
+    def concurrency_limit(self, model="base", running=None):
+        """
+        How many whisper processes may run at once for 'model': one per 'threads_per_job'
+        cores, and no more than the available memory can hold on top of the 'running' ones.
+        """
+        if self.max_concurrent > 0:
+            return self.max_concurrent
+        by_cores = max(1, cpu_count() // max(1, self.threads_per_job))
+        memory = available_memory_bytes()
+        if memory is None:
+            return by_cores
+        if running is None:
+            running = sum(1 for job in self.snapshot() if job["state"] == "running")
+        by_memory = running + memory // estimate_model_memory(model)
+        return max(1, min(by_cores, by_memory))
+
+    def refresh(self):
+        """Reloads the snapshot from disk, for callers that do not run the scheduler thread."""
+        self._update_snapshot(self.registry.read(), time.time())
+
+    def snapshot(self):
+        """Returns a list of job dicts (with 'eta' and 'progress' filled in) for display."""
+        with self.lock:
+            return [dict(job) for job in self.snapshot_cache]
+
+    def batch_eta(self):
+        """Estimated seconds until every queued and running job has finished, or None."""
+        jobs = self.snapshot()
+        pending = [job for job in jobs if job["state"] in ("queued", "running")]
+        if not pending:
+            return 0
+        remaining = [job.get("eta") for job in pending]
+        if any(value is None for value in remaining):
+            return None
+        slots = self.concurrency_limit(pending[0].get("model", "base"))
+        return max(max(remaining), sum(remaining) / slots)
+
+    def wait(self, timeout=None):
+        """Blocks until no job is queued or running. Returns True if the queue drained."""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            data = self.registry.read()
+            if not any(job["state"] in ("queued", "running") for job in data["jobs"]):
+                return True
+            if deadline is not None and time.time() > deadline:
+                return False
+            time.sleep(self.poll_interval)
+
+    # --- Scheduler ---
+
+    def _run(self):
+        self._resume()
+        while not self.stop_event.is_set():
+            try:
+                self._tick()
+            except Exception as e:
+                print(f"Subtitle job queue error: {e}")
+            self.wake_event.wait(self.poll_interval)
+            self.wake_event.clear()
+
+    def _resume(self):
+        """Requeues jobs orphaned by a previous run whose worker process is gone."""
+        with self.registry.locked() as data:
+            for job in data["jobs"]:
+                if job["state"] != "running":
+                    continue
+                if pid_alive(job.get("owner"), match=app_command) and job.get("owner") != os.getpid():
+                    continue  # Another live instance is supervising it
+                if pid_alive(job.get("pid"), match=session_command):
+                    job["owner"] = os.getpid()  # Adopt the still-running worker
+                else:
+                    job["state"] = "queued"
+                    job["pid"] = None
+
+    def _tick(self):
+        # Media durations feed the ETA; ffprobe runs outside the registry lock.
+        durations = {job["id"]: media_duration(job["url"]) for job in self.registry.read()["jobs"]
+                     if job["state"] == "queued" and job.get("duration") is None}
+
+        finished = []
+        with self.registry.locked() as data:
+            for job in data["jobs"]:
+                if job["id"] in durations and job.get("duration") is None:
+                    job["duration"] = durations[job["id"]] or 0
+            now = time.time()
+            running = [job for job in data["jobs"] if job["state"] == "running"]
+
+            # 1. Reap finished workers (ours, and adopted ones from a previous run)
+            for job in running:
+                if job.get("owner") != os.getpid():
+                    if not pid_alive(job.get("owner"), match=app_command):
+                        job["owner"] = os.getpid()
+                    else:
+                        continue
+                process = self.processes.get(job["id"])
+                if process is not None:
+                    returncode = process.poll()
+                    if returncode is None:
+                        continue
+                    self.processes.pop(job["id"], None)
+                elif pid_alive(job.get("pid"), match=session_command):
+                    continue
+                else:
+                    # Adopted worker: judge by the output file it should have produced
+                    destination = job.get("destination")
+                    produced = destination and os.path.exists(destination) and \
+                        os.path.getmtime(destination) >= (job.get("started_at") or 0)
+                    returncode = 0 if produced else 1
+                finished.append((job, returncode, now))
+
+            for job, returncode, now in finished:
+                job["returncode"] = returncode
+                job["pid"] = None
+                if returncode == 0:
+                    job["state"] = "done"
+                    job["finished_at"] = now
+                    self._record_speed(data, job, now - (job.get("started_at") or now))
+                elif job["attempts"] >= self.max_attempts:
+                    job["state"] = "failed"
+                    job["finished_at"] = now
+                else:
+                    job["state"] = "queued"
+                    job["not_before"] = now + 10 * job["attempts"]
+
+            # 2. Start queued jobs while there is room on this machine. Memory is checked
+            # against what is left after the models of recently started jobs finish loading.
+            running = [job for job in data["jobs"] if job["state"] == "running"]
+            memory = available_memory_bytes()
+            if memory is not None:
+                memory -= sum(estimate_model_memory(job.get("model", "base")) for job in running
+                              if now - (job.get("started_at") or 0) < 30)
+            for job in data["jobs"]:
+                if job["state"] != "queued" or job.get("not_before", 0) > now:
+                    continue
+                if len(running) >= self.concurrency_limit(job.get("model", "base"), len(running)):
+                    break
+                needed = estimate_model_memory(job.get("model", "base"))
+                if running and memory is not None and memory < needed:
+                    break  # Wait for a running job to release its model
+                if self._launch(job):
+                    running.append(job)
+                    if memory is not None:
+                        memory -= needed
+
+            self._update_snapshot(data, now)
+
+    def _launch(self, job):
+        job["attempts"] += 1
+        job["log"] = self.log_file.format(job["id"])
+        env = os.environ.copy()
+        env["TERM"] = "dumb"  # Plain ASCII output, no "press any key" pause
+        if self.env_provider:
+            env.update(self.env_provider(job) or {})
+        try:
+            with open(job["log"], "a") as log_file:
+                log_file.write(f"\n--- Attempt {job['attempts']} at {time.ctime()} ---\n")
+                log_file.flush()
+                process = subprocess.Popen(job["args"], stdin=subprocess.DEVNULL, stdout=log_file,
+                                           stderr=subprocess.STDOUT, env=env, start_new_session=True)
+        except OSError as e:
+            print(f"Could not start subtitle job for {job['url']}: {e}")
+            job["state"] = "failed" if job["attempts"] >= self.max_attempts else "queued"
+            job["not_before"] = time.time() + 10
+            return False
+        self.processes[job["id"]] = process
+        job.update(state="running", pid=process.pid, owner=os.getpid(), started_at=time.time())
+        return True
+
+    def _record_speed(self, data, job, elapsed):
+        # Seconds of processing per second of media, smoothed per model
+        if not job.get("duration"):
+            return
+        ratio = elapsed / job["duration"]
+        speed = data.setdefault("speed", {})
+        previous = speed.get(job["model"])
+        speed[job["model"]] = ratio if previous is None else 0.7 * previous + 0.3 * ratio
+
+    def _update_snapshot(self, data, now):
+        speed = data.get("speed", {})
+        jobs = []
+        for job in data["jobs"]:
+            job = dict(job)
+            job["eta"] = None
+            job["progress"] = 1.0 if job["state"] == "done" else 0.0
+            ratio = speed.get(job["model"])
+            if ratio is not None and job.get("duration"):
+                expected = ratio * job["duration"]
+                if job["state"] == "running" and job.get("started_at"):
+                    elapsed = now - job["started_at"]
+                    job["progress"] = min(0.99, elapsed / expected) if expected else 0.0
+                    job["eta"] = max(0.0, expected - elapsed)
+                elif job["state"] == "queued":
+                    job["eta"] = expected
+            jobs.append(job)
+        with self.lock:
+            self.snapshot_cache = jobs
+
+    def describe(self, job):
+        """Short human readable status used by the GUI list and the CLI."""
+        state = job["state"]
+        if state == "running":
+            text = f"running ({int(job.get('progress', 0) * 100)}%)"
+            if job.get("eta") is not None:
+                text += f", ETA {_format_seconds(job['eta'])}"
+            return text
+        if state == "queued" and job.get("attempts"):
+            return f"queued (retry {job['attempts']}/{self.max_attempts})"
+        if state == "failed" and job.get("returncode") is not None:
+            return f"failed (exit {job['returncode']})"
+        return state
+
+
+def _terminate_process_group(pid):
+    try:
+        os.killpg(int(pid), signal.SIGTERM)
+    except (OSError, ValueError):
+        try:
+            os.kill(int(pid), signal.SIGTERM)
+        except (OSError, ValueError):
+            pass
@@ -0,0 +1,2270 @@
+#!/usr/bin/env python3
+"""
+playlist4whisper_live - Live transcription engine used by "livestream_video.sh --live-engine".
+
+The bash loop re-runs "ffmpeg -ss <cursor> -t <step>" on the ever-growing capture file for
+every chunk, then transcribes, translates and speaks it before it extracts the next one.
+Here a single ffmpeg process follows the capture file and decodes it once to 16 kHz mono
+s16le into a ring buffer in memory. Chunks are sliced from that buffer and go through a
+pipeline of stages (speech recognition, translation, display, text-to-speech), each in its
+own thread with a bounded queue in front of it, so chunk N is translated and spoken while
+chunk N+1 is transcribed. The time each chunk waits for and spends in every stage, and its
+lag behind the audio, are reported when the engine stops.
+
+With --vad, the end of each chunk is moved to the nearest pause, found in the audio in
+memory rather than with ffmpeg, ffprobe and whisper-vad-speech-segments for every chunk.
+
+It is started through "playlist4whisper_cli.py live" and needs only the standard library;
+the silence search needs NumPy.
+
+Author: Antonio R. Version: 5.34 License: GPL 3.0
+
+Copyright (c) 2023 Antonio R.
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+https://github.com/antor44/livestream_video
+
+--------------------------------------------------------------------------------
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import math
+import time
+import wave
+import queue
+import shutil
+import signal
+import socket
+import fnmatch
+import textwrap
+import resource
+import tempfile
+import threading
+import subprocess
+import collections
+
+from playlist4whisper_core import (
+    default_whisper_threads, model_path, media_duration, WhisperServer, WhisperServerError, SessionGovernor,
+    ModelBenchmarks, model_inventory, session_metrics_file, CaptureBroker
+)
+
+# NumPy (optional) is used for the silence search on the decoded audio
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+sample_rate = 16000
+sample_width = 2  # s16le
+engine_executables = ["./build/bin/whisper-cli", "./main", "whisper-cpp", "pwcpp"]
+
+
+def pcm_to_wav(pcm):
+    """Wraps raw 16 kHz mono s16le samples in a WAV header, in memory."""
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return output.getvalue()
+
+
+def clean_transcript(text):
+    """The same clean-up as livestream_video.sh: one line, without the characters whisper uses for markup."""
+    return re.sub(r"[<>^*_]", "", " ".join(text.split()))
+
+
+def segment(start, end, text, confidence=None):
+    """
+    A transcribed segment: times in seconds from the start of the chunk, cleaned-up text and,
+    when whisper gave it, the mean probability of its tokens.
+    """
+    item = {"start": round(start, 3), "end": round(end, 3), "text": clean_transcript(text)}
+    if confidence is not None:
+        item["confidence"] = round(confidence, 3)
+    return item
+
+
+def segment_confidence(item):
+    """Mean token probability of a segment of whisper-cli -ojf (or exp(avg_logprob) of whisper-server), or None."""
+    if "avg_logprob" in item:
+        return math.exp(item["avg_logprob"])
+    # Special tokens ([_BEG_], [_TT_150]...) are not words
+    probabilities = [token.get("p", token.get("probability")) for token in item.get("tokens", [])
+                     if isinstance(token, dict) and not str(token.get("text", "")).startswith("[_")]
+    probabilities = [p for p in probabilities if p is not None]
+    return sum(probabilities) / len(probabilities) if probabilities else None
+
+
+def chunk_confidence(segments):
+    """Mean confidence of the segments of a chunk, weighted by their length, or None."""
+    weighted = [(item["confidence"], max(item["end"] - item["start"], 0.01)) for item in segments if "confidence" in item]
+    if not weighted:
+        return None
+    return sum(confidence * length for confidence, length in weighted) / sum(length for _, length in weighted)
+
+
+def parse_whisper_output(output):
+    """Segments from the '[00:00:00.000 --> 00:00:02.000]  text' lines printed by whisper-cli or pwcpp."""
+    segments = []
+    for line in output.replace("\r", "\n").split("\n"):
+        match = re.match(r"\[(\d+):(\d+):(\d+[.,]\d+) --> (\d+):(\d+):(\d+[.,]\d+)\] *(.*)", line)
+        if match:
+            h1, m1, s1, h2, m2, s2, text = match.groups()
+            segments.append(segment(int(h1) * 3600 + int(m1) * 60 + float(s1.replace(",", ".")),
+                                    int(h2) * 3600 + int(m2) * 60 + float(s2.replace(",", ".")), text))
+    return segments
+
+
+def parse_whisper_json(document):
+    """Segments and language from the JSON file of 'whisper-cli -oj', or the verbose_json answer of whisper-server."""
+    if "transcription" in document:
+        segments = [segment(item["offsets"]["from"] / 1000, item["offsets"]["to"] / 1000, item["text"],
+                            segment_confidence(item)) for item in document["transcription"]]
+        return segments, document.get("result", {}).get("language")
+    segments = [segment(item["start"], item["end"], item["text"], segment_confidence(item))
+                for item in document.get("segments", [])]
+    return segments, document.get("language")
+
+
+# --- Audio ingestion ---
+
+class PcmRingBuffer:
+    """
+    A bounded buffer of 16 kHz mono s16le audio addressed by absolute sample position.
+
+    The decoder appends at the end; once 'seconds' of audio are stored, the oldest samples
+    are overwritten. 'read()' copies a range of samples out, 'wait_for()' blocks until a
+    position has been decoded and 'decoded_at()' tells when it was.
+    """
+
+    def __init__(self, seconds=300):
+        self.capacity = seconds * sample_rate * sample_width
+        self.buffer = bytearray(self.capacity)
+        self.written = 0  # Bytes appended since the start
+        self.closed = False
+        self.condition = threading.Condition()
+        self.writes = collections.deque(maxlen=4096)  # (end position, monotonic time) of recent writes
+
+    def write(self, data):
+        with self.condition:
+            if len(data) > self.capacity:
+                self.written += len(data) - self.capacity
+                data = data[-self.capacity:]
+            offset = self.written % self.capacity
+            first = min(len(data), self.capacity - offset)
+            self.buffer[offset:offset + first] = data[:first]
+            self.buffer[:len(data) - first] = data[first:]
+            self.written += len(data)
+            self.writes.append((self.end, time.monotonic()))
+            self.condition.notify_all()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    @property
+    def end(self):
+        """Position (in samples) after the last decoded sample."""
+        return self.written // sample_width
+
+    @property
+    def start(self):
+        """Oldest position still stored."""
+        return max(0, self.written - self.capacity) // sample_width
+
+    def wait_for(self, position, timeout=None):
+        """Waits until 'position' has been decoded. Returns False on timeout or when the decoder has ended."""
+        with self.condition:
+            return self.condition.wait_for(lambda: self.end >= position or self.closed, timeout) and self.end >= position
+
+    def decoded_at(self, position):
+        """Monotonic time at which 'position' was decoded (the first write that reached it), or None."""
+        with self.condition:
+            for end, when in self.writes:
+                if end >= position:
+                    return when
+            return None
+
+    def read(self, start, end):
+        """Returns the samples from 'start' to 'end' as bytes; positions already overwritten are skipped."""
+        with self.condition:
+            start = max(start, self.start) * sample_width
+            end = min(end, self.end) * sample_width
+            if end <= start:
+                return b""
+            first, last = start % self.capacity, end % self.capacity
+            if first < last:
+                return bytes(self.buffer[first:last])
+            return bytes(self.buffer[first:]) + bytes(self.buffer[:last])
+
+
+class PcmDecoder:
+    """
+    One ffmpeg process decoding 'source' to s16le on its stdout, fed into a PcmRingBuffer by a
+    reader thread. With 'follow', ffmpeg keeps reading a file that is still being written
+    (the capture file of livestream_video.sh); 'realtime' reads it no faster than it plays.
+    A "capture:SOCKET" source is a capture shared with other sessions (CaptureFanout), whose
+    audio comes already decoded, from the moment of connecting.
+    """
+
+    def __init__(self, source, ring, follow=True, realtime=True, block_size=64 * 1024):
+        self.source = source
+        self.ring = ring
+        self.follow = follow
+        self.realtime = realtime
+        self.block_size = block_size
+        self.process = None
+        self.connection = None
+        self.thread = None
+
+    def command(self):
+        command = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+        if self.follow:
+            command += ["-follow", "1"]
+        if self.realtime:
+            command += ["-re"]
+        source = f"file:{self.source}" if self.follow and os.path.exists(self.source) else self.source
+        return command + ["-i", source, "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "pipe:1"]
+
+    def start(self):
+        if self.source.startswith("capture:"):
+            self.connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                self.connection.connect(self.source[len("capture:"):])
+            except OSError:
+                self.connection.close()
+                raise
+            fd = self.connection.fileno()
+        else:
+            self.process = subprocess.Popen(self.command(), stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL)
+            fd = self.process.stdout.fileno()
+        self.thread = threading.Thread(target=self._read, args=(fd,), daemon=True)
+        self.thread.start()
+        return self
+
+    def _read(self, fd):
+        while True:
+            try:
+                data = os.read(fd, self.block_size)
+            except OSError:
+                break
+            if not data:
+                break
+            self.ring.write(data)
+        self.ring.close()
+
+    def stop(self):
+        if self.connection is not None:
+            try:
+                self.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+        if self.connection is not None:
+            self.connection.close()
+
+
+class FanoutClient:
+    """
+    A session connected to a shared capture: the blocks waiting to be sent to it, at most 'limit'
+    bytes; when it does not keep up, its oldest blocks are dropped so that the others are not
+    held back.
+    """
+
+    def __init__(self, connection, limit):
+        self.connection = connection
+        self.limit = limit
+        self.blocks = collections.deque()
+        self.queued = self.dropped = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def put(self, data):
+        with self.condition:
+            self.blocks.append(data)
+            self.queued += len(data)
+            while self.queued > self.limit and len(self.blocks) > 1:
+                old = self.blocks.popleft()
+                self.queued -= len(old)
+                self.dropped += len(old)
+            self.condition.notify()
+
+    def send(self):
+        """Sends the blocks as they come, until closed or the session disconnects."""
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.blocks or self.closed)
+                if not self.blocks:
+                    break
+                data = self.blocks.popleft()
+                self.queued -= len(data)
+            try:
+                self.connection.sendall(data)
+            except OSError:
+                break
+        self.closed = True
+        self.connection.close()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.blocks.clear()
+            self.condition.notify()
+
+
+class CaptureFanout:
+    """
+    The ingestion of a capture shared through the CaptureBroker: one ffmpeg (after streamlink or
+    yt-dlp, as in livestream_video.sh) decodes the stream to 16 kHz mono s16le, and every block
+    goes to each session connected to its Unix socket (PcmDecoder with a "capture:" source),
+    through a queue of 'queue_seconds' of audio per session (FanoutClient). With segments, the
+    same ffmpeg also writes the timeshift segment files, numbered on without wrapping, since
+    every timeshift session links its own playlist to them; the newest 'segments' + 1 (the
+    most any subscriber asked for, and the one being written) are kept. It stops when the
+    stream ends or the capture has had no subscriber for the broker's 'linger' seconds, and
+    removes its files.
+    """
+
+    def __init__(self, key, broker=None, queue_seconds=30, block_size=64 * 1024):
+        self.key = key
+        self.broker = broker or CaptureBroker()
+        self.capture = self.broker.captures()[key]
+        self.limit = queue_seconds * sample_rate * sample_width
+        self.block_size = block_size
+        self.clients = []
+        self.lock = threading.Lock()
+        self.ended = threading.Event()
+        self.decoded = 0
+        self.processes = []
+
+    def command(self):
+        """The ffmpeg command, and the command feeding its stdin (streamlink) or None."""
+        url, method = self.capture["url"], self.capture["method"]
+        video = bool(self.capture["segment_files"])
+        feeder = None
+        if method == "streamlink" or "twitch" in url:
+            feeder = ["streamlink", url, "best" if video else "worst", "-O"]
+            source = "pipe:0"
+        elif method == "yt-dlp" or "youtube" in url or "youtu.be" in url:
+            result = subprocess.run(["yt-dlp", "-i", "-f", "b" if video else "worst", "-g", url], stdin=subprocess.DEVNULL,
+                                    capture_output=True, text=True, timeout=120)
+            if not result.stdout.split():
+                raise OSError(f"yt-dlp found no stream in {url}")
+            source = result.stdout.split()[0]
+        else:
+            source = url
+        command = ["ffmpeg", "-loglevel", "error", "-probesize", "32", "-i", source,
+                   "-map", "0:a:0", "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "pipe:1"]
+        if video:
+            # As the timeshift capture of livestream_video.sh
+            command += ["-map", "0:v:0?", "-map", "0:a:0", "-acodec", "mp3", "-vcodec", "libx264", "-preset", "ultrafast",
+                        "-threads", "2", "-vsync", "2", "-f", "segment", "-segment_time", str(self.capture["segment_time"]),
+                        "-reset_timestamps", "1", self.capture["segment_files"]]
+        return command, feeder
+
+    def run(self):
+        path = self.capture["socket"]
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        try:
+            server.bind(path)
+            os.chmod(path, 0o666)  # Sessions of other users share it too
+            server.listen(16)
+            command, feeder = self.command()
+            stdin = subprocess.DEVNULL
+            if feeder is not None:
+                self.processes.append(subprocess.Popen(feeder, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                                       stderr=subprocess.DEVNULL))
+                stdin = self.processes[-1].stdout
+            self.processes.append(subprocess.Popen(command, stdin=stdin, stdout=subprocess.PIPE))
+            if feeder is not None:
+                stdin.close()  # ffmpeg has it; streamlink ends with it
+            self.broker.attach(self.key, os.getpid())
+            threading.Thread(target=self._accept, args=(server,), daemon=True).start()
+            threading.Thread(target=self._read, args=(self.processes[-1].stdout.fileno(),), daemon=True).start()
+            idle = 0
+            while not self.ended.wait(1):
+                subscribers = self.broker.subscribers(self.key)
+                idle = idle + 1 if not subscribers else 0
+                if subscribers is None or idle >= self.broker.linger and self.broker.release_if_idle(self.key):
+                    break
+                if self.capture["segment_files"]:
+                    capture = self.broker.captures().get(self.key)
+                    if capture is not None:
+                        self._prune_segments(capture["segments"] + 1)
+                with self.lock:
+                    clients = [client for client in self.clients if not client.closed]
+                self.broker.update(self.key, clients=len(clients),
+                                   audio_seconds=round(self.decoded / sample_width / sample_rate, 1),
+                                   dropped_seconds=round(sum(client.dropped for client in clients) / sample_width / sample_rate, 1))
+        finally:
+            server.close()
+            self._stop()
+            self.broker.remove(self.key)
+        return 0
+
+    def _accept(self, server):
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                break
+            client = FanoutClient(connection, self.limit)
+            with self.lock:
+                self.clients = [other for other in self.clients if not other.closed] + [client]
+            threading.Thread(target=client.send, daemon=True).start()
+
+    def _read(self, fd):
+        rest = b""
+        while True:
+            data = os.read(fd, self.block_size)
+            if not data:
+                break
+            # Whole samples only, so that a block dropped for a slow session never splits one
+            data, rest = rest + data, b""
+            if len(data) % sample_width:
+                data, rest = data[:-1], data[-1:]
+            self.decoded += len(data)
+            with self.lock:
+                clients = list(self.clients)
+            for client in clients:
+                if not client.closed:
+                    client.put(data)
+        self.ended.set()
+
+    def _stop(self):
+        for process in reversed(self.processes):
+            if process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+        with self.lock:
+            for client in self.clients:
+                client.close()
+        for name in [self.capture["socket"]] + self._segment_files():
+            try:
+                os.remove(name)
+            except OSError:
+                pass
+
+    def _segment_files(self):
+        """The timeshift segment files written so far, oldest first."""
+        if not self.capture["segment_files"]:
+            return []
+        directory, pattern = os.path.split(self.capture["segment_files"])
+        prefix, suffix = pattern.split("%03d")
+        numbered = []
+        for name in fnmatch.filter(os.listdir(directory), pattern.replace("%03d", "*")):
+            number = name[len(prefix):-len(suffix)]
+            if number.isdigit():
+                numbered.append((int(number), os.path.join(directory, name)))
+        return [path for _, path in sorted(numbered)]
+
+    def _prune_segments(self, keep):
+        for path in self._segment_files()[:-keep]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# --- Speech recognition backends ---
+
+class ProcessBackend:
+    """
+    Starts the whisper.cpp executable for each chunk, as livestream_video.sh does, and reads the
+    segments from its JSON output file (from its printed lines with pwcpp, or when that file is
+    missing). 'cpu_seconds' adds up the CPU time of those processes. With 'full_json', the JSON
+    has the probability of every token (-ojf), for the confidence of each segment; builds
+    without -ojf are detected and go back to -oj.
+    """
+
+    def __init__(self, executable, model, wav_file):
+        self.executable = executable
+        self.model = model
+        self.wav_file = wav_file
+        self.json_base = os.path.splitext(wav_file)[0]
+        self.cpu_seconds = 0.0
+        self.full_json = False
+
+    def transcribe(self, pcm, language, translate, threads):
+        """Returns the segments of 'pcm' and the language whisper detected (None if not known)."""
+        # A copy of samples already in memory; nothing is decoded again
+        with open(self.wav_file, "wb") as f:
+            f.write(pcm_to_wav(pcm))
+        model_file = model_path.format(self.model)
+        if self.executable == "pwcpp":
+            command = ["pwcpp", "--language", language, "--n_threads", str(threads), "-m", model_file]
+            command += (["--translate", "translate"] if translate else []) + [self.wav_file]
+        else:
+            command = [self.executable, "-l", language, "-t", str(threads), "-m", model_file, "-f", self.wav_file,
+                       "-ojf" if self.full_json else "-oj", "-of", self.json_base]
+            command += ["--translate"] if translate else []
+        try:
+            os.remove(self.json_base + ".json")
+        except OSError:
+            pass
+        with tempfile.TemporaryFile() as output:
+            process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=output, stderr=subprocess.DEVNULL)
+            # wait4() gives the resource usage of this child alone
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            self.cpu_seconds += usage.ru_utime + usage.ru_stime
+            output.seek(0)
+            printed = output.read().decode("utf-8", errors="replace")
+        if (self.full_json and command[0] != "pwcpp" and not os.path.exists(self.json_base + ".json")
+                and not parse_whisper_output(printed)):
+            # An older build that does not know -ojf: no file and nothing transcribed
+            self.full_json = False
+            return self.transcribe(pcm, language, translate, threads)
+        if process.returncode != 0:
+            # A crash (bad model, out of memory) is not a silent chunk
+            raise OSError(f"{self.executable} exited with status {process.returncode}")
+        try:
+            with open(self.json_base + ".json", encoding="utf-8", errors="replace") as f:
+                return parse_whisper_json(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return parse_whisper_output(printed), None
+
+    def close(self):
+        for path in (self.wav_file, self.json_base + ".json"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class ServerBackend:
+    """
+    Posts each chunk, as an in-memory WAV, to a whisper-server that keeps the model loaded. Its
+    CPU time is not known here ('cpu_seconds' is None).
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.cpu_seconds = None
+
+    def transcribe(self, pcm, language, translate, threads):
+        result = self.server.transcribe(pcm_to_wav(pcm), language=language, translate=translate,
+                                        response_format="verbose_json")
+        try:
+            return parse_whisper_json(result)
+        except (KeyError, TypeError):
+            return [segment(0, len(pcm) / sample_width / sample_rate, result.get("text", ""))], None
+
+    def close(self):
+        pass
+
+
+class SyntheticBackend:
+    """
+    Stands in for whisper in benchmarks: every chunk takes 'overhead' seconds (loading the model)
+    plus 'rtf' times its length, and gives no text.
+    """
+
+    def __init__(self, overhead=1.0, rtf=0.5):
+        self.overhead = overhead
+        self.rtf = rtf
+        self.cpu_seconds = None
+
+    def transcribe(self, pcm, language, translate, threads):
+        time.sleep(self.overhead + self.rtf * len(pcm) / sample_width / sample_rate)
+        return [], None
+
+    def close(self):
+        pass
+
+
+# --- Voice activity detection ---
+
+class SileroSegments:
+    """
+    Speech segments found by whisper-vad-speech-segments (the Silero model) in the stream, by
+    absolute sample position. A background thread runs it once on each new block of decoded
+    audio, so overlapping search windows reuse the results instead of analyzing the same audio
+    again; 'analyzed' holds the stretches it ran on successfully. Blocks skipped when it falls
+    behind, or on which it failed, are not analyzed: there the callers go back to energy.
+    """
+
+    def __init__(self, ring, executable, model, wav_file, block_seconds=3):
+        self.ring = ring
+        self.executable = executable
+        self.model = model
+        self.wav_file = wav_file
+        self.block = block_seconds * sample_rate
+        self.segments = []  # [start, end] sample positions, in order
+        self.analyzed = []  # [start, end] sample positions, in order
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._analyze, daemon=True)
+        self.thread.start()
+        return self
+
+    def _analyze(self):
+        position = 0
+        while not self.stopped.is_set():
+            if not self.ring.wait_for(position + self.block, timeout=0.5):
+                if self.ring.closed:
+                    break
+                continue
+            # Analysis that falls behind skips ahead; the energy search covers the gap
+            position = max(position, self.ring.end - 2 * self.block, self.ring.start)
+            with open(self.wav_file, "wb") as f:
+                f.write(pcm_to_wav(self.ring.read(position, position + self.block)))
+            try:
+                result = subprocess.run([self.executable, "-t", "2", "-vm", self.model, "-f", self.wav_file, "-np"],
+                                        stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=30)
+            except (OSError, subprocess.SubprocessError):
+                result = None
+            if result is None or result.returncode != 0:
+                position += self.block
+                continue
+            found = re.findall(r"Speech segment.*start = ([0-9.]+),.*end = ([0-9.]+)", result.stdout + result.stderr)
+            with self.lock:
+                for start, end in found:
+                    start = position + int(float(start) * sample_rate)
+                    end = position + int(float(end) * sample_rate)
+                    if self.segments and start - self.segments[-1][1] < sample_rate // 10:
+                        # A segment cut by the block boundary
+                        self.segments[-1][1] = max(self.segments[-1][1], end)
+                    else:
+                        self.segments.append([start, end])
+                if self.analyzed and self.analyzed[-1][1] >= position:
+                    self.analyzed[-1][1] = position + self.block
+                else:
+                    self.analyzed.append([position, position + self.block])
+                # Keep only what the ring buffer still holds
+                while self.segments and self.segments[0][1] < self.ring.start:
+                    self.segments.pop(0)
+                while self.analyzed and self.analyzed[0][1] < self.ring.start:
+                    self.analyzed.pop(0)
+            position += self.block
+        try:
+            os.remove(self.wav_file)
+        except OSError:
+            pass
+
+    def speech(self, start, end):
+        """The segments overlapping 'start'..'end', or None if not all of that audio was analyzed."""
+        with self.lock:
+            if not any(first <= start and end <= last for first, last in self.analyzed):
+                return None
+            return [segment for segment in self.segments if segment[1] > start and segment[0] < end]
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+
+class LevelMeter:
+    """
+    Levels of the 20 ms frames of some audio in dBFS, computed with NumPy, and the noise floor of
+    the stream: it follows the quietest audio at once (down to -90 dBFS, so that digital silence
+    does not hold it down) and rises slowly when the noise does.
+    """
+
+    frame = sample_rate // 50
+
+    def __init__(self):
+        self.floor = None
+
+    def levels(self, pcm):
+        samples = np.frombuffer(pcm, dtype="<i2")
+        frames = samples[:len(samples) // self.frame * self.frame].reshape(-1, self.frame).astype(np.float32)
+        levels = 20 * np.log10(np.sqrt(np.mean(frames * frames, axis=1)) / 32768 + 1e-10)
+        if len(levels):
+            quiet = max(-90.0, float(np.percentile(levels, 10)))
+            self.floor = quiet if self.floor is None else min(quiet, self.floor + 1.0)
+        return levels
+
+
+class VadCutter:
+    """
+    Chooses where to end a chunk, as find_vad_cut_point in livestream_video.sh: at the start of
+    the pause nearest to the target, within 'window' seconds before it. The search runs on the
+    samples already in memory, vectorized with NumPy. Frame energy is the fast path: a run of
+    frames at least 'min_gap' long and less than 'margin' dB above the noise floor is a pause.
+    When the window has none (music, crowd noise), the Silero segments are used if they cover
+    it. 'cuts' counts the decisions by method.
+    """
+
+    def __init__(self, ring, meter, silero=None, window=3, min_gap=0.25, margin=10.0):
+        self.ring = ring
+        self.meter = meter
+        self.frame = meter.frame
+        self.silero = silero
+        self.window = window
+        self.min_gap = min_gap
+        self.margin = margin
+        self.cuts = {"energy": 0, "silero": 0, "none": 0}
+
+    def energy_pauses(self, pcm):
+        """Start and end frame of every pause of at least 'min_gap' in 'pcm'."""
+        levels = self.meter.levels(pcm)
+        if not len(levels):
+            return np.empty(0, dtype=int), np.empty(0, dtype=int)
+        silent = np.concatenate(([False], levels < self.meter.floor + self.margin, [False]))
+        edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+        starts, ends = edges[0::2], edges[1::2]
+        long_enough = (ends - starts) * self.frame >= self.min_gap * sample_rate
+        return starts[long_enough], ends[long_enough]
+
+    def silero_pauses(self, start, end):
+        """Pause starts (samples from 'start') between the Silero segments of 'start'..'end', or None."""
+        speech = self.silero.speech(start, end) if self.silero is not None else None
+        if not speech:
+            return None
+        segments = np.array(speech) - start
+        # Silence before the first segment, between segments and after the last one
+        pause_starts = np.concatenate(([0] if segments[0, 0] > 0 else [], segments[:-1, 1],
+                                       [segments[-1, 1]] if segments[-1, 1] < end - start else []))
+        if segments[-1, 1] < end - start:
+            pause_starts = np.append(pause_starts, end - start)  # The step itself ends in a pause
+        return pause_starts[(pause_starts >= 0) & (pause_starts <= end - start)]
+
+    def cut(self, start, target):
+        """The position to end the chunk that begins at 'start' and should end at 'target', and how it was chosen."""
+        search_start = max(start, target - self.window * sample_rate)
+        pause_starts, method = None, "none"
+        pcm = self.ring.read(search_start, target)
+        starts, ends = self.energy_pauses(pcm)
+        if len(starts):
+            pause_starts, method = starts * self.frame, "energy"
+            if ends[-1] * self.frame >= len(pcm) // sample_width - self.frame:
+                pause_starts = np.append(pause_starts, target - search_start)  # The step itself ends in a pause
+        else:
+            pause_starts = self.silero_pauses(search_start, target)
+            if pause_starts is not None and len(pause_starts):
+                method = "silero"
+        if method == "none":
+            self.cuts["none"] += 1
+            return target, method
+        best = int(pause_starts[np.argmin(np.abs(pause_starts - (target - search_start)))]) + search_start
+        if best == target:
+            self.cuts[method] += 1
+            return target, method
+        if best - start <= sample_rate or best >= target:
+            # Too short a chunk, or the pause is at the very end: cut at the step as usual
+            self.cuts["none"] += 1
+            return target, "none"
+        self.cuts[method] += 1
+        return best, method
+
+
+class SilenceGate:
+    """
+    Decides whether a chunk is worth transcribing. Its speech probability is the share of the
+    chunk covered by Silero speech segments when they are available, and otherwise the share of
+    frames more than 'margin' dB above the noise floor (and above -60 dBFS), or louder than
+    'loud' dBFS whatever the floor: the floor comes partly from the chunk itself, and speech
+    over a steady background would otherwise count as silence. Chunks below 'threshold' skip
+    speech recognition: quiet stretches cost CPU and make whisper invent text.
+    """
+
+    def __init__(self, meter, silero=None, threshold=0.1, margin=10.0, loud=-40.0):
+        self.meter = meter
+        self.silero = silero
+        self.threshold = threshold
+        self.margin = margin
+        self.loud = loud
+
+    def speech_probability(self, start, end, pcm):
+        speech = self.silero.speech(start, end) if self.silero is not None else None
+        if speech is not None:
+            covered = sum(min(segment[1], end) - max(segment[0], start) for segment in speech)
+            return covered / max(1, end - start)
+        levels = self.meter.levels(pcm)
+        if not len(levels):
+            return 0.0
+        return float(np.mean((levels > max(self.meter.floor + self.margin, -60.0)) | (levels > self.loud)))
+
+    def passes(self, probability):
+        return probability >= self.threshold
+
+
+# --- Translation and presentation (present_transcript in livestream_video.sh) ---
+
+gemini_url = "https://generativelanguage.googleapis.com/v1beta/models/{}:generateContent?key={}"
+gemini_thinking = [  # (model pattern, thinkingConfig), the first match is used
+    ("gemini-3*pro*", {"thinkingLevel": "low"}),
+    ("gemini-3*flash*", {"thinkingLevel": "minimal"}),
+    ("gemini-2.5*flash*", {"thinkingBudget": 0}),
+    ("gemini-2.5*pro*", {"thinkingBudget": 128}),
+]
+gemini_safety = [{"category": category, "threshold": "BLOCK_NONE"} for category in
+                 ("HARM_CATEGORY_HARASSMENT", "HARM_CATEGORY_HATE_SPEECH",
+                  "HARM_CATEGORY_SEXUALLY_EXPLICIT", "HARM_CATEGORY_DANGEROUS_CONTENT")]
+
+
+class Translator:
+    """
+    Translates each transcript with Gemini ('gemini_model', with the key in 'api_key'), falling
+    back to 'trans' when Gemini is not set up or does not answer in time. When the target
+    language is the spoken language, Gemini corrects the text instead. The last translations
+    are kept as context for the next prompt, as many as 'context_level' asks for.
+    """
+
+    def __init__(self, language, source_language="auto", gemini_model=None, api_key=None, context_level=2,
+                 trans=False, keep_context=True, timeout=2.5):
+        self.language = language
+        self.source_language = source_language
+        self.gemini_model = gemini_model
+        self.api_key = api_key
+        self.context_level = context_level
+        self.trans = trans
+        self.keep_context = keep_context
+        self.timeout = timeout
+        self.context = []
+        self.requests = self.failures = self.fallbacks = 0
+        self.record = None  # Pipeline.record, for the time of each Gemini request and 'trans' run
+
+    def prompt(self, text):
+        level = self.context_level
+        context = self.context[-1] if level == 1 and self.context else " ".join(self.context) if level != 0 else ""
+        if self.language == self.source_language:
+            instructions = {
+                0: "You are an expert text editor. Correct the grammar and fix broken words in the 'New source text fragment'. Your output must be ONLY the corrected text.",
+                1: "You are an expert text editor. Your goal is to correct the grammar of the 'New source text fragment' so that it logically continues the 'Translated Context'. Your output must be ONLY the corrected text.",
+                3: "You are an expert text editor. Your goal is to correct the 'New source text fragment'. Based on the 'Translated Context', you have creative freedom to rephrase, complete sentences, or fix cut-off words to ensure coherence. Your output must be ONLY the corrected text.",
+            }.get(level, "You are an expert text editor. Your goal is to correct the grammar of the 'New source text fragment' so that it logically continues the 'Translated Context'. Your output must be ONLY the corrected text.")
+        else:
+            instructions = {
+                0: f"You are an expert real-time translator. Your goal is to provide a literal and fluid translation of the 'New source text fragment' into {self.language}. Your output must be ONLY the new translation.",
+                1: f"You are an expert real-time translator. Your goal is to provide a fluid and natural translation of the 'New source text fragment' into {self.language} that logically continues the 'Translated Context'. Your output must be ONLY the new translation.",
+                3: f"You are an expert real-time translator. Your goal is to provide a fluid and natural translation of the 'New source text fragment' into {self.language}. Based on the 'Translated Context', you have the creative freedom to rephrase, complete sentences, or fix cut-off words in the 'New source text fragment' to ensure the final output is coherent and flows naturally. Your output must be ONLY the new, improved translation.",
+            }.get(level, f"You are an expert real-time translator. Your goal is to provide a fluid and natural translation of the 'New source text fragment' into {self.language} that logically continues the 'Translated Context'. It is crucial that you translate the full meaning without omitting any information from the original fragment. Your output must be ONLY the new translation.")
+        if level == 0:
+            return f"{instructions}\n\nNew source text fragment:\n{text}"
+        return f"{instructions}\n\nTranslated Context:\n{context}\n\nNew source text fragment:\n{text}"
+
+    def gemini(self, text):
+        """The Gemini translation of 'text', or "" on any error or timeout."""
+        import urllib.request
+        import urllib.error
+
+        payload = {"contents": [{"parts": [{"text": self.prompt(text)}]}], "safetySettings": gemini_safety}
+        if "gemma" not in self.gemini_model:
+            payload["generationConfig"] = {"temperature": 0.2, "maxOutputTokens": 1024}
+            for pattern, thinking in gemini_thinking:
+                if fnmatch.fnmatchcase(self.gemini_model, pattern):
+                    payload["generationConfig"]["thinkingConfig"] = thinking
+                    break
+        request = urllib.request.Request(gemini_url.format(self.gemini_model, self.api_key),
+                                         data=json.dumps(payload).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"})
+        self.requests += 1
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                answer = json.loads(response.read().decode("utf-8"))
+            translation = answer["candidates"][0]["content"]["parts"][0].get("text") or ""
+        except (OSError, ValueError, KeyError, IndexError, TypeError, urllib.error.URLError):
+            translation = ""
+        if not translation:
+            self.failures += 1
+        return translation.replace("\r", "").replace("\n", "")
+
+    def translate(self, chunk):
+        """Pipeline stage: sets chunk.translation (and chunk.fallback when 'trans' stood in for Gemini)."""
+        if len(chunk.text) < 3:
+            return
+        translation = ""
+        if self.gemini_model and self.api_key:
+            started = time.monotonic()
+            translation = self.gemini(chunk.text)
+            if self.record:
+                self.record("gemini", started, chunk.ready)
+        if not translation and self.trans:
+            chunk.fallback = bool(self.gemini_model)
+            self.fallbacks += chunk.fallback
+            started = time.monotonic()
+            try:
+                result = subprocess.run(["trans", "-no-warn", "-b", f":{self.language}"], input=chunk.text,
+                                        capture_output=True, text=True)
+                translation = result.stdout.strip()
+            except OSError:
+                translation = ""
+            if self.record:
+                self.record("trans", started, chunk.ready)
+        chunk.translation = translation
+        if translation and self.keep_context:
+            # Only the cleaned text goes into the context of the next prompt
+            context = re.sub(r"[$*#]", "", re.sub(r"\[[^]]*\]", "", re.sub(r"\([^)]*\)", "", translation)))
+            if context:
+                self.context = (self.context + [context])[-2:]
+
+
+class Presenter:
+    """
+    Displays each transcript and/or its translation ('output_text': original, translation, both
+    or none), wrapped to the terminal width. For a livestream_video.sh session ('pid'), they are
+    also appended to its transcription and translation files in /tmp. With VAD, 'marker' is
+    shown before the text of chunks that were cut at the step rather than at a pause. On a
+    terminal, provisional text is shown dimmed on the last line until the final text replaces it.
+    """
+
+    def __init__(self, output_text="original", pid=None, output=sys.stdout, marker=""):
+        self.output_text = output_text
+        self.output = output
+        self.marker = marker + " " if marker else ""
+        self.transcription_file = f"/tmp/transcription-whisper-live_{pid}.txt" if pid else None
+        self.translation_file = f"/tmp/translation-whisper-live_{pid}.txt" if pid else None
+        self.tty = hasattr(output, "isatty") and output.isatty()
+        self.reverse, self.normal = ("\033[7m", "\033[0m") if self.tty else ("", "")
+        self.shown = False  # Whether the last line holds provisional text
+        self.lock = threading.Lock()
+
+    def wrapped(self, text):
+        # The terminal width is read every time, so a resized window is followed
+        width = shutil.get_terminal_size((80, 24)).columns
+        return textwrap.fill(text, width, break_on_hyphens=False) + "\n"
+
+    def provisional(self, text):
+        """Shows 'text' in place of the provisional text before it, cut from the left to one line."""
+        if not self.tty or self.output_text not in ("original", "both"):
+            return
+        width = shutil.get_terminal_size((80, 24)).columns - 1
+        line = text if len(text) <= width else "..." + text[-(width - 3):]
+        with self.lock:
+            self.output.write("\r\033[K" + ("\033[2m" + line + self.normal if line else ""))
+            self.output.flush()
+            self.shown = bool(line)
+
+    def display(self, chunk):
+        """Pipeline stage."""
+        with self.lock:
+            if self.shown:
+                self.output.write("\r\033[K")
+                self.shown = False
+            self._display(chunk)
+
+    def _display(self, chunk):
+        if chunk.gap is not None:
+            gap = f"[... {chunk.gap[1] - chunk.gap[0]:.0f}s skipped to catch up ...]"
+            if self.transcription_file:
+                with open(self.transcription_file, "a") as f:
+                    f.write(gap + "\n")
+            if self.output_text != "none":
+                self.output.write(self.wrapped(gap))
+                self.output.flush()
+        if len(chunk.text) < 3:
+            return
+        if self.transcription_file:
+            with open(self.transcription_file, "a") as f:
+                f.write(chunk.text + "\n")
+        marker = self.marker if chunk.vad_cut is False else ""
+        if self.output_text in ("original", "both"):
+            self.output.write(self.wrapped(marker + chunk.text))
+        if chunk.translation and self.output_text in ("translation", "both"):
+            translated = ("(*) " if chunk.fallback else "") + chunk.translation
+            if self.output_text == "both":
+                self.output.write(self.reverse + self.wrapped(marker + translated) + self.normal)
+            else:
+                self.output.write(self.wrapped(marker + translated))
+            if self.translation_file:
+                with open(self.translation_file, "a") as f:
+                    f.write(translated + "\n")
+        self.output.flush()
+
+
+class TranscriptLog:
+    """
+    Appends the segments of every chunk to a JSON Lines file, one segment per line with its
+    times in seconds from the start of the stream, so that other programs can follow the
+    session with 'tail -f' and a JSON parser. Each line is written and flushed in one piece.
+    Provisional text, replaced later by the segments of its chunk, is flagged as such.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+        self.lock = threading.Lock()  # Provisional text comes from a thread of its own
+
+    def write(self, chunk):
+        lines = [json.dumps(dict({"chunk": chunk.index, "start": item["start"], "end": item["end"], "text": item["text"],
+                                  "language": chunk.language, "time": round(time.time(), 3)},
+                                 **({"confidence": item["confidence"]} if "confidence" in item else {})),
+                            ensure_ascii=False)
+                 for item in chunk.segments if item["text"]]
+        if lines:
+            self._append("\n".join(lines) + "\n")
+
+    def provisional(self, start, end, text):
+        self._append(json.dumps({"start": round(start, 3), "end": round(end, 3), "text": text, "provisional": True,
+                                 "time": round(time.time(), 3)}, ensure_ascii=False) + "\n")
+
+    def gap(self, chunk):
+        """Flags audio before 'chunk' (or the chunk itself) that was not transcribed to catch up."""
+        self._append(json.dumps({"chunk": chunk.index, "start": chunk.gap[0], "end": chunk.gap[1], "gap": True,
+                                 "time": round(time.time(), 3)}) + "\n")
+
+    def _append(self, lines):
+        with self.lock:
+            self.file.write(lines)
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class Speaker:
+    """
+    Speaks each translation: 'trans' downloads the speech, ffmpeg speeds it up (at least 1.5x,
+    more when it would not fit in the step) and mpv plays it in the background.
+    """
+
+    def __init__(self, language, step, pid=None):
+        self.language = language
+        self.step = step
+        self.files = os.path.join(tempfile.gettempdir(), f"whisper-live_{pid or os.getpid()}_{{}}.mp3")
+        self.count = 0
+
+    def speak(self, chunk):
+        """Pipeline stage."""
+        if not chunk.translation:
+            return
+        audio_file = self.files.format(self.count % 2)
+        accelerated_file = self.files.format(f"{self.count % 2}_accel")
+        self.count += 1
+        try:
+            subprocess.run(["trans", "-b", f":{self.language}", "-download-audio-as", audio_file],
+                           input=chunk.translation, capture_output=True, text=True)
+            duration = media_duration(audio_file) if os.path.exists(audio_file) else None
+            if not duration:
+                return
+            acceleration_factor = max(1.5, duration / (self.step - self.step / 8))
+            subprocess.run(["ffmpeg", "-y", "-i", audio_file, "-filter:a", f"atempo={acceleration_factor:.2f}",
+                            accelerated_file], stdin=subprocess.DEVNULL, capture_output=True)
+            subprocess.Popen(["mpv", accelerated_file], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL, start_new_session=True)
+        except OSError:
+            pass
+
+
+# --- Pipeline ---
+
+class Chunk:
+    """A step of audio on its way through the pipeline, and what the stages made of it."""
+
+    def __init__(self, index, start, end, pcm, ready):
+        self.index = index
+        self.start = start  # Sample positions in the stream
+        self.end = end
+        self.pcm = pcm
+        self.ready = ready  # When its last sample was decoded (monotonic)
+        self.queued = ready
+        self.vad_cut = None  # With VAD: whether the chunk ends at a pause
+        self.speech = None  # With the silence gate: speech probability
+        self.skipped = False
+        self.gap = None  # Seconds (start, end) of the stream dropped to catch up, up to the end of this chunk
+        self.segments = []  # Times in seconds from the start of the stream
+        self.language = None
+        self.text = ""
+        self.translation = ""
+        self.fallback = False
+        self.overlap = 0  # Samples before 'start' read again from the chunk before
+
+
+class Histogram:
+    """
+    Durations counted in buckets 10% wider than the one before, from 1 ms: adding one costs a
+    logarithm and a dict update, and percentiles are read within 5% however long the session.
+    """
+
+    base = 0.001
+    growth = 1.1
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+
+    def add(self, seconds):
+        bucket = 0 if seconds <= self.base else int(math.log(seconds / self.base, self.growth)) + 1
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+
+    def percentile(self, percent):
+        """The duration under which 'percent' of them fall (the middle of its bucket), or 0."""
+        rank = math.ceil(self.count * percent / 100)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return self.base * self.growth ** (bucket - 0.5) if bucket else self.base
+        return 0.0
+
+
+class Timing:
+    """Count, mean, maximum, last value and percentiles of a series of durations in seconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.histogram = Histogram()
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+        self.histogram.add(seconds)
+
+    def report(self):
+        mean = self.total / self.count if self.count else 0.0
+        report = {"count": self.count, "mean": round(mean, 3), "max": round(self.max, 3), "last": round(self.last, 3)}
+        for percent in (50, 95, 99):
+            report[f"p{percent}"] = round(min(self.histogram.percentile(percent), self.max), 3)
+        return report
+
+
+class Pipeline:
+    """
+    Passes chunks through 'stages', a list of (name, function(chunk)). With 'pipelined', every
+    stage runs in its own thread behind a queue of at most 'depth' chunks, so a slow stage holds
+    back the ones before it (down to the segmenter, which leaves the audio in the ring buffer)
+    instead of piling up chunks. Otherwise one thread runs the stages in turn, as
+    process_audio_chunk in livestream_video.sh does.
+
+    For every stage it records how long chunks waited in its queue, how long the stage took and
+    the lag when it was done: the time since the chunk's last sample was decoded. "segment" is
+    the hand-over of new chunks, whose wait is the time the segmenter was held back; steps of
+    the segmenter named in 'timed' are recorded with 'record()', as are the steps within a
+    stage given in 'substeps' ({stage: names}).
+    """
+
+    def __init__(self, stages, depth=2, pipelined=True, timed=(), substeps=None):
+        names = list(timed) + ["segment"]
+        for name, _ in stages:
+            names += [name] + list((substeps or {}).get(name, ()))
+        self.stats = {name: {"wait": Timing(), "busy": Timing(), "lag": Timing()} for name in names}
+        groups = [[stage] for stage in stages] if pipelined else [stages]
+        self.queues = [queue.Queue(depth) for _ in groups]
+        self.threads = [threading.Thread(target=self._run, args=(index, group), daemon=True)
+                        for index, group in enumerate(groups)]
+        self.abandoned = False
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def record(self, name, started, ready):
+        """Records a step of the segmenter or a stage that began at 'started' for audio decoded at 'ready'."""
+        finished = time.monotonic()
+        self.stats[name]["busy"].add(finished - started)
+        self.stats[name]["lag"].add(finished - ready)
+
+    def put(self, chunk):
+        """Hands a new chunk to the first stage; blocks while its queue is full."""
+        started = time.monotonic()
+        chunk.queued = started
+        self.queues[0].put(chunk)
+        stats = self.stats["segment"]
+        stats["wait"].add(time.monotonic() - started)
+        stats["lag"].add(time.monotonic() - chunk.ready)
+
+    def _run(self, index, group):
+        inbox = self.queues[index]
+        outbox = self.queues[index + 1] if index + 1 < len(self.queues) else None
+        while True:
+            chunk = inbox.get()
+            if chunk is None:
+                break
+            for name, function in group:
+                if self.abandoned:
+                    break
+                started = time.monotonic()
+                try:
+                    function(chunk)
+                except Exception as e:
+                    print(f"Live engine: {name} failed: {e}", file=sys.stderr)
+                finished = time.monotonic()
+                stats = self.stats[name]
+                stats["wait"].add(started - chunk.queued)
+                stats["busy"].add(finished - started)
+                stats["lag"].add(finished - chunk.ready)
+                chunk.queued = finished
+            if outbox is not None:
+                outbox.put(chunk)
+        if outbox is not None:
+            outbox.put(None)
+
+    def close(self, abandon=False, timeout=30):
+        """Lets the queued chunks through (with 'abandon', skips what is left of their stages) and ends the threads."""
+        self.abandoned = abandon
+        self.queues[0].put(None)
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def report(self):
+        return {name: {key: timing.report() for key, timing in stats.items()} for name, stats in self.stats.items()}
+
+
+def format_stages(report):
+    """The stage timings of Pipeline.report() as a table."""
+    lines = [f"{'stage':<10} {'chunks':>6} {'wait':>7} {'time':>7} {'max':>7} {'lag':>7} {'max lag':>8} {'last lag':>9}"]
+    for name, stats in report.items():
+        if not stats["lag"]["count"]:
+            continue
+        lines.append(f"{name:<10} {stats['lag']['count']:>6} {stats['wait']['mean']:>6.2f}s {stats['busy']['mean']:>6.2f}s "
+                     f"{stats['busy']['max']:>6.2f}s {stats['lag']['mean']:>6.2f}s {stats['lag']['max']:>7.2f}s "
+                     f"{stats['lag']['last']:>8.2f}s")
+    return "\n".join(lines)
+
+
+def format_latency(report):
+    """The percentiles of the time and lag of each stage of Pipeline.report() as a table."""
+    lines = [f"{'stage':<10} {'chunks':>6} {'time p50':>9} {'p95':>7} {'p99':>7} {'lag p50':>8} {'p95':>7} {'p99':>7}"]
+    for name, stats in report.items():
+        busy, lag = stats["busy"], stats["lag"]
+        if not lag["count"]:
+            continue
+        times = [f"{busy[key]:.2f}s" if busy["count"] else "-" for key in ("p50", "p95", "p99")]
+        lines.append(f"{name:<10} {lag['count']:>6} {times[0]:>9} {times[1]:>7} {times[2]:>7} "
+                     f"{lag['p50']:>7.2f}s {lag['p95']:>6.2f}s {lag['p99']:>6.2f}s")
+    return "\n".join(lines)
+
+
+# --- Step control ---
+
+class StepController:
+    """
+    Adjusts the step between 'min_step' and 'max_step' from the time speech recognition takes per
+    chunk. Each process loads the model again, so part of that time does not depend on the
+    length of the chunk and a longer step lowers the real-time factor (processing time / audio
+    time). The step grows by a quarter when the RTF, averaged over the chunks at the current
+    step, is above 'target' or the lag of a chunk is longer than the step (chunks are piling
+    up), and shrinks by a fifth when even the RTF it would have if the time per chunk did not
+    change is well below 'target', to get the text sooner. After a change, 'settle' chunks at
+    the new step are measured before the next.
+    """
+
+    def __init__(self, step, min_step, max_step, target=0.8, settle=2, smoothing=0.5):
+        self.min_step = min_step
+        self.max_step = max(min_step, max_step)
+        self.step = min(max(step, self.min_step), self.max_step)
+        self.target = target
+        self.settle = settle
+        self.smoothing = smoothing
+        self.rtf = None
+        self.measured = 0
+        self.adjustments = []
+
+    def _bounded(self, step):
+        return min(max(round(step * 2) / 2, self.min_step), self.max_step)
+
+    def observe(self, audio_seconds, asr_seconds, lag):
+        """Takes the measures of a chunk; returns the new step when it changes, else None."""
+        if audio_seconds <= 0:
+            return None
+        rtf = asr_seconds / audio_seconds
+        self.rtf = rtf if self.rtf is None else self.smoothing * rtf + (1 - self.smoothing) * self.rtf
+        self.measured += 1
+        if self.measured < self.settle:
+            return None
+        if self.rtf > self.target or lag > self.step:
+            step = self._bounded(self.step * 1.25)
+        elif self.rtf * 1.25 < self.target * 0.75 and lag < self.step / 2:
+            step = self._bounded(self.step / 1.25)
+        else:
+            return None
+        if step == self.step:
+            return None
+        self.adjustments.append({"from": self.step, "to": step, "rtf": round(self.rtf, 2), "lag": round(lag, 2)})
+        self.step = step
+        self.rtf = None
+        self.measured = 0
+        return step
+
+
+class CatchUp:
+    """
+    What the engine does when speech recognition falls behind. Past 'max_lag' seconds of audio
+    waiting to be transcribed, it takes one more of 'actions', in their order, every 'settle'
+    chunks while it stays behind, and gives them up again in reverse order once the lag is under
+    half of 'max_lag':
+      - "model": chunks are transcribed by 'fast_backend', a faster (e.g. quantized) model,
+      - "merge": the audio waiting in the buffer is cut as one chunk of up to 'merge_seconds',
+        so the model is loaded once for all of it,
+      - "drop": the oldest audio is skipped, down to the last step, and the gap is flagged in
+        the transcript and on screen.
+    """
+
+    def __init__(self, max_lag, actions=("model", "merge", "drop"), fast_backend=None, merge_seconds=30, settle=2):
+        self.max_lag = max_lag
+        self.actions = [action for action in actions if action != "model" or fast_backend is not None]
+        self.fast_backend = fast_backend
+        self.merge_seconds = merge_seconds
+        self.settle = settle
+        self.level = 0
+        self.chunks = settle  # Since the last change
+        self.events = []
+        self.fast_chunks = self.merged_chunks = 0
+        self.dropped_seconds = 0.0
+
+    @property
+    def active(self):
+        return self.actions[:self.level]
+
+    def update(self, lag):
+        """Takes the lag before a chunk is cut; returns (action, taken) when an action is taken or given up, else None."""
+        self.chunks += 1
+        if self.chunks < self.settle:
+            return None
+        if lag > self.max_lag and self.level < len(self.actions):
+            self.level += 1
+            change = (self.actions[self.level - 1], True)
+        elif lag < self.max_lag / 2 and self.level > 0:
+            self.level -= 1
+            change = (self.actions[self.level], False)
+        else:
+            return None
+        self.chunks = 0
+        self.events.append({"time": round(time.time(), 3), "lag": round(lag, 1), "action": change[0], "taken": change[1]})
+        return change
+
+
+# --- Language pinning ---
+
+class LanguagePin:
+    """
+    With language "auto", whisper detects the language of every chunk, an extra pass of the
+    encoder that can also flip the language mid-stream. Once 'agree' chunks in a row are in the
+    same language (and not transcribed with low confidence), it is pinned and passed with -l.
+    When 'unpin_after' chunks in a row are transcribed with a confidence (mean token
+    probability) under 'min_confidence', e.g. because the channel changed language, detection is
+    back on. The time speech recognition takes per second of audio is measured with and without
+    the pin.
+    """
+
+    def __init__(self, agree=3, min_confidence=0.4, unpin_after=3):
+        self.agree = agree
+        self.min_confidence = min_confidence
+        self.unpin_after = unpin_after
+        self.pinned = None
+        self.candidate, self.streak = None, 0
+        self.low = 0
+        self.events = []
+        self.rtf = {"auto": Timing(), "pinned": Timing()}
+
+    def language(self):
+        return self.pinned or "auto"
+
+    def observe(self, language, confidence, audio_seconds, asr_seconds):
+        """Takes what a chunk gave; returns the language when it is pinned, "auto" when unpinned, else None."""
+        if audio_seconds > 0:
+            self.rtf["pinned" if self.pinned else "auto"].add(asr_seconds / audio_seconds)
+        if self.pinned:
+            self.low = self.low + 1 if confidence is not None and confidence < self.min_confidence else 0
+            if self.low < self.unpin_after:
+                return None
+            self.events.append({"time": round(time.time(), 3), "unpinned": self.pinned, "confidence": round(confidence, 2)})
+            self.pinned, self.candidate, self.streak, self.low = None, None, 0, 0
+            return "auto"
+        if not language or language == "auto" or confidence is not None and confidence < self.min_confidence:
+            self.candidate, self.streak = None, 0
+            return None
+        self.streak = self.streak + 1 if language == self.candidate else 1
+        self.candidate = language
+        if self.streak < self.agree:
+            return None
+        self.pinned, self.low = language, 0
+        self.events.append({"time": round(time.time(), 3), "pinned": language})
+        return language
+
+    def report(self):
+        report = {"pinned": self.pinned, "events": self.events}
+        for name, timing in self.rtf.items():
+            if timing.count:
+                report[f"rtf_{name}"] = timing.report()
+        return report
+
+
+# --- Overlapping chunks ---
+
+class OverlapStitcher:
+    """
+    With overlapping chunks, each one also holds the last 'overlap' seconds of the one before,
+    so that the words cut at the boundary are heard whole once, but the words of the overlap
+    come twice. The longest run of words shared by the last 'window' words of the chunk before
+    and the first 'window' words of the chunk (compared in lower case and without punctuation)
+    marks them: what is before the end of that run is removed, before translation and display.
+    When no run of 'min_match' words ends near the end of the chunk before, the segments that
+    end within the overlap are removed instead.
+    """
+
+    def __init__(self, window=16, min_match=2, slack=2):
+        self.window = window
+        self.min_match = min_match
+        self.slack = slack  # Last words of the chunk before that may be missing from the run (cut, misheard)
+        self.previous = []
+        self.chunks = self.aligned = self.by_time = self.removed_words = 0
+
+    @staticmethod
+    def normalize(word):
+        return re.sub(r"[^\w']", "", word.lower())
+
+    def align(self, previous, words):
+        """Number of leading 'words' that repeat the end of 'previous', or None when they do not line up."""
+        best = (0, 0)  # (run length, end of the run in 'words')
+        run = [0] * (len(words) + 1)
+        for i, word in enumerate(previous):
+            reaches_end = i >= len(previous) - 1 - self.slack
+            for j in range(len(words), 0, -1):
+                run[j] = run[j - 1] + 1 if word and word == words[j - 1] else 0
+                if reaches_end and run[j] >= best[0]:
+                    best = (run[j], j)
+        return best[1] if best[0] >= self.min_match else None
+
+    def reset(self):
+        """The chunk before was not transcribed: nothing to remove from the next one."""
+        self.previous = []
+
+    def stitch(self, segments, overlap):
+        """Returns 'segments' (times from the start of the chunk) without the words of the first 'overlap' seconds already given."""
+        words = [(index, word) for index, item in enumerate(segments) for word in item["text"].split()]
+        normalized = [self.normalize(word) for _, word in words]
+        cut = 0
+        if overlap > 0 and self.previous:
+            self.chunks += 1
+            cut = self.align(self.previous, normalized[:self.window])
+            if cut is not None:
+                self.aligned += 1
+            else:
+                self.by_time += 1
+                cut = 0
+                while cut < len(words) and segments[words[cut][0]]["end"] <= overlap:
+                    cut += 1
+        self.previous = normalized[-self.window:]
+        if not cut:
+            return segments
+        self.removed_words += cut
+        kept = collections.OrderedDict()
+        for index, word in words[cut:]:
+            kept.setdefault(index, []).append(word)
+        first = words[cut][0] if cut < len(words) else None
+        return [dict(segments[index], text=" ".join(kept[index]),
+                     **({"start": round(max(segments[index]["start"], min(overlap, segments[index]["end"])), 3)}
+                        if index == first else {}))
+                for index in kept]
+
+    def report(self):
+        return {"chunks": self.chunks, "aligned": self.aligned, "by_time": self.by_time, "removed_words": self.removed_words}
+
+
+# --- Provisional text ---
+
+class ProvisionalTranscriber:
+    """
+    The fast tier of two-tier transcription: in a thread of its own, every 'interval' seconds of
+    new audio are transcribed as soon as they are decoded, with a small or quantized model
+    ('backend'), and shown as provisional text (Presenter.provisional) until the final text of
+    the chunk they belong to replaces them. Each sub-window is transcribed once; when it falls
+    behind, all the audio waiting is taken at once, and audio whose final text came first is
+    passed over. Sub-windows with text are also written to 'transcript', flagged as provisional.
+    """
+
+    def __init__(self, ring, backend, presenter, interval=2, transcript=None):
+        self.ring = ring
+        self.backend = backend
+        self.presenter = presenter
+        self.interval = interval
+        self.transcript = transcript
+        self.language = "auto"  # Follows the language of the final tier
+        self.threads = lambda: default_whisper_threads
+        self.windows = []  # (start, end, text) not replaced by a final text yet
+        self.first_text = collections.deque(maxlen=256)  # (start, monotonic time) of sub-windows with text
+        self.final_to = 0
+        self.timing = Timing()
+        self.passed_over = 0.0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._transcribe, daemon=True)
+        self.thread.start()
+        return self
+
+    def _transcribe(self):
+        cursor = 0
+        while not self.stopped.is_set():
+            if not self.ring.wait_for(cursor + int(self.interval * sample_rate), timeout=0.5):
+                if self.ring.closed:
+                    break
+                continue
+            with self.lock:
+                covered = max(self.final_to, self.ring.start)
+            if cursor < covered:
+                self.passed_over += (covered - cursor) / sample_rate
+                cursor = covered
+                continue
+            end = self.ring.end
+            started = time.monotonic()
+            try:
+                segments, _ = self.backend.transcribe(self.ring.read(cursor, end), self.language, False, self.threads())
+            except Exception as e:
+                print(f"Live engine: provisional text failed: {e}", file=sys.stderr)
+                segments = []
+            ready = time.monotonic()
+            self.timing.add(ready - started)
+            text = clean_transcript(" ".join(item["text"] for item in segments))
+            with self.lock:
+                if end > self.final_to:
+                    self.windows.append((cursor, end, text))
+                    if text:
+                        self.first_text.append((cursor, ready))
+                    self._show()
+            if text and self.transcript is not None:
+                self.transcript.provisional(cursor / sample_rate, end / sample_rate, text)
+            cursor = end
+
+    def _show(self):
+        self.presenter.provisional(" ".join(text for _, _, text in self.windows if text))
+
+    def finalize(self, end):
+        """The final text of the audio up to 'end' is shown: its provisional text goes."""
+        with self.lock:
+            self.final_to = max(self.final_to, end)
+            self.windows = [window for window in self.windows if window[1] > end]
+            self._show()
+
+    def first_words(self, start, end):
+        """When the first provisional words of the audio from 'start' to 'end' were ready, or None."""
+        with self.lock:
+            times = [ready for window_start, ready in self.first_text if start <= window_start < end]
+        return min(times) if times else None
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout=10)
+        self.backend.close()
+
+    def report(self):
+        return {"interval": self.interval, "windows": self.timing.report(), "passed_over": round(self.passed_over, 1)}
+
+
+# --- Engine ---
+
+def process_io():
+    """Bytes read and written by this process and its reaped children (Linux /proc/self/io), or None."""
+    try:
+        with open("/proc/self/io") as f:
+            return {key: int(value) for key, value in (line.split(": ") for line in f.read().splitlines())}
+    except (OSError, ValueError):
+        return None
+
+
+def cpu_seconds():
+    """CPU time of this process plus its reaped children (decoder, whisper processes)."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+class LiveEngine:
+    """
+    Transcribes the audio of 'source' in chunks of 'step' seconds and passes each through the
+    pipeline: speech recognition, translation ('translator'), display ('presenter', by default
+    one line of text per chunk on 'output') and text-to-speech ('speaker'). The thread count
+    follows the budget the resource governor assigns to 'pid', like refresh_thread_budget in
+    livestream_video.sh. Segments are appended to 'transcript' (a TranscriptLog) when given.
+    With 'vad', chunks end at the nearest pause (VadCutter), helped by the Silero model when
+    'vad_executable' and 'vad_model' are given. With 'gate', chunks whose speech probability is
+    below it are not transcribed (SilenceGate). With 'step_range' (min, max), the step follows
+    the speed of speech recognition (StepController). With 'catch_up' (CatchUp), a faster model,
+    longer chunks or dropped audio bring the lag back when it grows too long. The lag and the
+    catch-up actions taken are reported to the resource governor for the GUI. With 'pin'
+    (LanguagePin) and language "auto", the language is pinned once chunks agree on it. With
+    'overlap' seconds, each chunk starts that much before the end of the one before and the
+    repeated words are removed (OverlapStitcher). With 'provisional_backend', a small or
+    quantized model transcribes every 'provisional_interval' seconds of new audio at once, shown
+    until the final text replaces it (ProvisionalTranscriber); the time from the first sample of
+    each chunk to its first words shown is measured with and without it. The timings of every
+    stage, with their percentiles, are written to 'metrics' (a JSON file) every
+    'metrics_interval' seconds and when the engine stops.
+    """
+
+    def __init__(self, source, backend, step=9, language="auto", translate=False, pid=None,
+                 buffer_seconds=300, follow=True, realtime=True, output=sys.stdout,
+                 translator=None, presenter=None, speaker=None, pipelined=True, depth=2,
+                 vad=False, vad_executable=None, vad_model=None, gate=None, transcript=None,
+                 step_range=None, catch_up=None, metrics=None, metrics_interval=5, pin=None, overlap=0,
+                 provisional_backend=None, provisional_interval=2):
+        self.ring = PcmRingBuffer(buffer_seconds)
+        self.decoder = PcmDecoder(source, self.ring, follow=follow, realtime=realtime)
+        self.silero = self.vad = self.gate = None
+        if vad and vad_executable and vad_model:
+            wav_file = os.path.join(tempfile.gettempdir(), f"whisper-live_{pid or os.getpid()}_vad_probe.wav")
+            self.silero = SileroSegments(self.ring, vad_executable, vad_model, wav_file)
+        meter = LevelMeter() if vad or gate else None
+        if vad:
+            self.vad = VadCutter(self.ring, meter, self.silero)
+        if gate:
+            self.gate = SilenceGate(meter, self.silero, threshold=gate)
+        self.backend = backend
+        self.step = step
+        self.controller = StepController(step, *step_range) if step_range else None
+        if self.controller is not None:
+            self.step = self.controller.step
+        self.language = language
+        self.translate = translate
+        self.pid = pid
+        self.transcript = transcript
+        self.speaker = speaker
+        self.catch_up = catch_up
+        self.transcribed_to = 0  # End of the last chunk through speech recognition
+        self.metrics = metrics
+        self.metrics_interval = metrics_interval
+        self.metrics_written = 0.0
+        self.translator = translator
+        self.pin = pin if language == "auto" else None
+        self.overlap = overlap
+        self.stitcher = OverlapStitcher() if overlap else None
+        if self.pin is not None and hasattr(backend, "full_json"):
+            backend.full_json = True
+        self.stopped = threading.Event()
+        self.chunks = 0
+        self.skipped_seconds = 0.0
+        self.transcribed = self.silent_chunks = 0
+        self.asr_seconds = self.silent_seconds = self.transcribed_seconds = self.overlap_seconds = 0.0
+        stages = [("asr", self._transcribe)]
+        if translator is not None:
+            stages.append(("translate", translator.translate))
+        self.presenter = presenter or Presenter(output=output)
+        self.provisional = None
+        if provisional_backend is not None:
+            self.provisional = ProvisionalTranscriber(self.ring, provisional_backend, self.presenter,
+                                                      provisional_interval, transcript)
+            self.provisional.language = language
+            # The two tiers run at the same time: they share the thread budget
+            self.provisional.threads = lambda: self._split_threads()[1]
+        self.first_words = {"final": Timing(), "provisional": Timing()}
+        stages.append(("display", self._display))
+        if speaker is not None:
+            stages.append(("tts", speaker.speak))
+        timed = (("vad",) if vad else ()) + ("extract",) + (("gate",) if gate else ())
+        self.pipeline = Pipeline(stages, depth=depth, pipelined=pipelined, timed=timed,
+                                 substeps={"translate": ("gemini", "trans")})
+        if translator is not None:
+            translator.record = self.pipeline.record
+
+    def threads(self):
+        if self.pid is None:
+            return default_whisper_threads
+        try:
+            with open(SessionGovernor().threads_file.format(self.pid)) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return default_whisper_threads
+
+    def _split_threads(self):
+        """The threads of the final tier and of the provisional tier, half of the budget each (at least one)."""
+        budget = self.threads()
+        if self.provisional is None:
+            return budget, 0
+        provisional = max(1, budget // 2)
+        return max(1, budget - provisional), provisional
+
+    def run(self):
+        self.started = time.monotonic()
+        self.cpu_start, self.io_start = cpu_seconds(), process_io()
+        self.decoder.start()
+        self.pipeline.start()
+        if self.silero is not None:
+            self.silero.start()
+        if self.provisional is not None:
+            self.provisional.start()
+        cursor = 0
+        try:
+            while not self.stopped.is_set():
+                # Read again for every chunk: the step controller changes it
+                chunk_samples = int(self.step * sample_rate)
+                if not self.ring.wait_for(cursor + chunk_samples, timeout=0.5):
+                    if self.ring.closed:
+                        # The decoder ended (end of a file): transcribe what is left
+                        if self.ring.end - cursor >= sample_rate:
+                            self._segment(cursor, self.ring.end)
+                        break
+                    continue
+                if cursor < self.ring.start:
+                    # Transcription fell behind by more than the buffer holds
+                    self.skipped_seconds += (self.ring.start - cursor) / sample_rate
+                    cursor = self.ring.start
+                start, end, gap = self._check_lag(cursor, cursor + chunk_samples)
+                cursor = self._segment(start, end, gap)
+        except KeyboardInterrupt:
+            self.stop()
+            raise
+        finally:
+            # On Ctrl+C or SIGTERM the chunks still queued are dropped; at the end of a file they finish
+            self.pipeline.close(abandon=self.stopped.is_set())
+            if self.silero is not None:
+                self.silero.stop()
+            if self.provisional is not None:
+                self.provisional.stop()
+            self.decoder.stop()
+            self.backend.close()
+            if self.catch_up is not None and self.catch_up.fast_backend is not None:
+                self.catch_up.fast_backend.close()
+            if self.transcript is not None:
+                self.transcript.close()
+            self._write_metrics(force=True)
+
+    def _check_lag(self, start, end):
+        """
+        Before each chunk: reports the lag to the resource governor and, with catch-up, takes or
+        gives up its actions. Returns the chunk's start and end, moved by "drop" or "merge", and
+        the gap (start, end) dropped in front of it, or None.
+        """
+        lag = (self.ring.end - self.transcribed_to) / sample_rate
+        gap = None
+        if self.catch_up is not None:
+            change = self.catch_up.update(lag)
+            if change is not None:
+                action, taken = change
+                described = {"model": "transcribing with the faster model", "merge": "merging the waiting audio",
+                             "drop": "dropping the oldest audio"}[action]
+                print(f"[+] {lag:.0f}s behind live: {'' if taken else 'no longer '}{described}", file=sys.stderr, flush=True)
+            active = self.catch_up.active
+            chunk_samples = end - start
+            if "drop" in active and self.ring.end - start > 2 * chunk_samples:
+                gap = (round(start / sample_rate, 3), round((self.ring.end - chunk_samples) / sample_rate, 3))
+                self.catch_up.dropped_seconds += gap[1] - gap[0]
+                start = self.ring.end - chunk_samples
+                end = self.ring.end
+            elif "merge" in active and self.ring.end - start > chunk_samples:
+                end = min(self.ring.end, start + int(self.catch_up.merge_seconds * sample_rate))
+                self.catch_up.merged_chunks += 1
+        if self.pid is not None:
+            state = {"lag": round(lag, 1), "step": self.step}
+            if self.catch_up is not None:
+                state["catch_up"] = self.catch_up.active
+            try:
+                SessionGovernor().report(self.pid, state)
+            except OSError:
+                pass
+        self._write_metrics(lag=lag)
+        return start, end, gap
+
+    def _write_metrics(self, force=False, lag=None):
+        """Replaces the metrics file, at most every 'metrics_interval' seconds unless 'force'."""
+        if self.metrics is None or not force and time.monotonic() - self.metrics_written < self.metrics_interval:
+            return
+        self.metrics_written = time.monotonic()
+        metrics = {"pid": self.pid, "time": round(time.time(), 1), "audio_seconds": round(self.ring.end / sample_rate, 1),
+                   "chunks": self.chunks, "transcribed": self.transcribed, "silent_chunks": self.silent_chunks,
+                   "asr_seconds": round(self.asr_seconds, 2), "transcribed_seconds": round(self.transcribed_seconds, 1),
+                   "step": self.step,
+                   "lag": round(lag if lag is not None else (self.ring.end - self.transcribed_to) / sample_rate, 1),
+                   "cpu_seconds": round(cpu_seconds() - self.cpu_start, 2), "stages": self.pipeline.report()}
+        if self.translator is not None:
+            metrics["translation"] = {"requests": self.translator.requests, "failures": self.translator.failures,
+                                      "fallbacks": self.translator.fallbacks}
+        if self.catch_up is not None:
+            metrics["catch_up"] = self.catch_up.active
+        if self.pin is not None:
+            metrics["language"] = self.pin.language()
+        # Written aside and renamed, so that readers never see half a file
+        partial = self.metrics + ".part"
+        try:
+            with open(partial, "w") as f:
+                json.dump(metrics, f)
+            os.replace(partial, self.metrics)
+        except OSError:
+            pass
+
+    def _segment(self, start, end, gap=None):
+        """Queues the chunk from 'start' to 'end' (or to the pause before it, with VAD); returns where it ended."""
+        ready = self.ring.decoded_at(end) or time.monotonic()
+        method = None
+        if self.vad is not None:
+            started = time.monotonic()
+            end, method = self.vad.cut(start, end)
+            self.pipeline.record("vad", started, ready)
+        started = time.monotonic()
+        # The overlap is read again from the end of the chunk before, unless audio was dropped in between
+        overlap = max(0, min(int(self.overlap * sample_rate), start - self.ring.start)) if gap is None else 0
+        chunk = Chunk(self.chunks, start, end, self.ring.read(start - overlap, end), ready)
+        self.pipeline.record("extract", started, ready)
+        chunk.overlap = overlap
+        chunk.gap = gap
+        if method is not None:
+            chunk.vad_cut = method != "none"
+        if self.gate is not None:
+            started = time.monotonic()
+            chunk.speech = self.gate.speech_probability(start, end, chunk.pcm[overlap * sample_width:])
+            chunk.skipped = not self.gate.passes(chunk.speech)
+            self.pipeline.record("gate", started, ready)
+        self.pipeline.put(chunk)
+        self.chunks += 1
+        return end
+
+    def _transcribe(self, chunk):
+        """Pipeline stage."""
+        try:
+            backend, dropped = self.backend, False
+            if self.catch_up is not None:
+                active = self.catch_up.active
+                if "drop" in active and (self.ring.end - chunk.end) / sample_rate > self.catch_up.max_lag:
+                    # Queued before the drop began, and already too old
+                    chunk.gap = (chunk.gap[0] if chunk.gap else round(chunk.start / sample_rate, 3),
+                                 round(chunk.end / sample_rate, 3))
+                    self.catch_up.dropped_seconds += (chunk.end - chunk.start) / sample_rate
+                    dropped = True
+                elif "model" in active:
+                    backend = self.catch_up.fast_backend
+                    self.catch_up.fast_chunks += 1
+            if chunk.gap is not None and self.transcript is not None:
+                self.transcript.gap(chunk)
+            if (dropped or chunk.skipped) and self.stitcher is not None:
+                self.stitcher.reset()
+            if dropped:
+                chunk.skipped = True
+            elif chunk.skipped:
+                self.silent_chunks += 1
+                self.silent_seconds += (chunk.end - chunk.start) / sample_rate
+            else:
+                language = self.pin.language() if self.pin is not None else self.language
+                if self.provisional is not None:
+                    self.provisional.language = language
+                started = time.monotonic()
+                segments, chunk.language = backend.transcribe(chunk.pcm, language, self.translate,
+                                                                  self._split_threads()[0])
+                finished = time.monotonic()
+                # The audio whisper ran on, the overlap with the previous chunk included
+                seconds = (chunk.end - chunk.start + chunk.overlap) / sample_rate
+                self.asr_seconds += finished - started
+                self.transcribed_seconds += seconds
+                self.overlap_seconds += chunk.overlap / sample_rate
+                self.transcribed += 1
+                if self.controller is not None:
+                    step = self.controller.observe(seconds, finished - started, finished - chunk.ready)
+                    if step is not None:
+                        change = self.controller.adjustments[-1]
+                        print(f"[+] Step {change['from']:g}s -> {step:g}s (RTF {change['rtf']:.2f}, lag {change['lag']:.1f}s)",
+                              file=sys.stderr, flush=True)
+                        self.step = step
+                        if self.speaker is not None:
+                            self.speaker.step = step
+                if self.pin is not None:
+                    confidence = chunk_confidence(segments)
+                    change = self.pin.observe(chunk.language, confidence, seconds, finished - started)
+                    if change == "auto":
+                        print(f"[+] Language detection back on (confidence {confidence:.2f} for {self.pin.unpin_after} chunks)",
+                              file=sys.stderr, flush=True)
+                    elif change is not None:
+                        print(f"[+] Language pinned to '{change}' after {self.pin.agree} chunks", file=sys.stderr, flush=True)
+                if self.stitcher is not None:
+                    segments = self.stitcher.stitch(segments, chunk.overlap / sample_rate)
+                offset = (chunk.start - chunk.overlap) / sample_rate
+                chunk.segments = [dict(item, start=round(item["start"] + offset, 3), end=round(item["end"] + offset, 3))
+                                  for item in segments]
+                chunk.text = clean_transcript(" ".join(item["text"] for item in segments))
+                if self.transcript is not None:
+                    self.transcript.write(chunk)
+        finally:
+            # A failed chunk still counts as done, as the bash loop moves on after whisper errors
+            chunk.pcm = None
+            self.transcribed_to = chunk.end
+
+    def _display(self, chunk):
+        """Pipeline stage: shows the final text, in place of the provisional text of the same audio."""
+        self.presenter.display(chunk)
+        if len(chunk.text) >= 3:
+            shown = time.monotonic()
+            decoded = self.ring.decoded_at(chunk.start + 1)
+            if decoded is not None:
+                self.first_words["final"].add(shown - decoded)
+                if self.provisional is not None:
+                    first = self.provisional.first_words(chunk.start, chunk.end)
+                    self.first_words["provisional"].add(min(first or shown, shown) - decoded)
+        if self.provisional is not None:
+            self.provisional.finalize(chunk.end)
+
+    def stop(self, *args):
+        self.stopped.set()
+
+    def usage_report(self):
+        """CPU time and disk I/O of the engine and its children, per hour of audio."""
+        audio_hours = self.ring.end / sample_rate / 3600
+        report = {"audio_seconds": round(self.ring.end / sample_rate, 1), "chunks": self.chunks,
+                  "cpu_seconds": round(cpu_seconds() - self.cpu_start, 2),
+                  "skipped_seconds": round(self.skipped_seconds, 1), "stages": self.pipeline.report()}
+        if self.vad is not None:
+            report["vad_cuts"] = dict(self.vad.cuts)
+        if self.pin is not None:
+            report["language"] = self.pin.report()
+        if self.catch_up is not None:
+            report["catch_up"] = {"events": self.catch_up.events, "fast_chunks": self.catch_up.fast_chunks,
+                                  "merged_chunks": self.catch_up.merged_chunks,
+                                  "dropped_seconds": round(self.catch_up.dropped_seconds, 1)}
+        if self.provisional is not None:
+            report["provisional"] = self.provisional.report()
+        report["first_words"] = {name: timing.report() for name, timing in self.first_words.items() if timing.count}
+        if self.stitcher is not None:
+            report["overlap"] = dict(self.stitcher.report(), seconds=self.overlap)
+        if self.controller is not None:
+            report["step"] = self.step
+            report["step_adjustments"] = self.controller.adjustments
+        if self.gate is not None:
+            # What the skipped chunks would have cost, at the average of the transcribed ones
+            report["silent_chunks"] = self.silent_chunks
+            report["silent_seconds"] = round(self.silent_seconds, 1)
+            if self.transcribed:
+                report["asr_seconds_saved"] = round(self.asr_seconds / self.transcribed * self.silent_chunks, 1)
+                if self.backend.cpu_seconds is not None:
+                    report["cpu_seconds_saved"] = round(self.backend.cpu_seconds / self.transcribed * self.silent_chunks, 1)
+        io_end = process_io()
+        if io_end and self.io_start:
+            for key in ("rchar", "wchar", "read_bytes", "write_bytes"):
+                report[key] = io_end[key] - self.io_start[key]
+        if audio_hours > 0:
+            report["per_hour"] = {key: round(value / audio_hours) for key, value in report.items()
+                                  if key in ("cpu_seconds", "rchar", "wchar", "read_bytes", "write_bytes")}
+        return report
+
+
+def format_usage(report):
+    line = f"{report['audio_seconds'] / 60:.1f} min of audio in {report['chunks']} chunks, CPU {report['cpu_seconds']:.1f}s"
+    per_hour = report.get("per_hour", {})
+    if per_hour:
+        line += f" ({per_hour['cpu_seconds']:.0f}s per hour of audio"
+        if "wchar" in per_hour:
+            line += f", {per_hour['rchar'] / 1024**2:.0f} MB read and {per_hour['wchar'] / 1024**2:.0f} MB written per hour"
+        line += ")"
+    if report["skipped_seconds"]:
+        line += f", {report['skipped_seconds']:.0f}s of audio skipped"
+    if "silent_chunks" in report:
+        line += f", {report['silent_chunks']} silent chunks ({report['silent_seconds']:.0f}s) not transcribed"
+        if "cpu_seconds_saved" in report:
+            line += f", about {report['cpu_seconds_saved']:.1f}s of CPU saved"
+        elif "asr_seconds_saved" in report:
+            line += f", about {report['asr_seconds_saved']:.1f}s of transcription saved"
+    if report.get("catch_up", {}).get("events"):
+        catch_up = report["catch_up"]
+        line += (f", caught up {sum(event['taken'] for event in catch_up['events'])} times "
+                 f"({catch_up['fast_chunks']} chunks with the faster model, {catch_up['merged_chunks']} merged, "
+                 f"{catch_up['dropped_seconds']:.0f}s dropped)")
+    if "language" in report:
+        language = report["language"]
+        line += f", language {'pinned to ' + language['pinned'] if language['pinned'] else 'not pinned'}"
+        if "rtf_auto" in language and "rtf_pinned" in language:
+            detecting, pinned = language["rtf_auto"]["mean"], language["rtf_pinned"]["mean"]
+            line += f" (RTF {pinned:.2f} pinned, {detecting:.2f} detecting"
+            if detecting:
+                saving = (1 - pinned / detecting) * 100
+                line += f", {abs(saving):.0f}% {'less' if saving >= 0 else 'more'} per chunk"
+            line += ")"
+    if "provisional" in report and "provisional" in report["first_words"]:
+        first_words = report["first_words"]
+        line += (f", first words after {first_words['provisional']['p50']:.1f}s with provisional text "
+                 f"({first_words['final']['p50']:.1f}s for the final text, medians)")
+    if "overlap" in report:
+        overlap = report["overlap"]
+        line += (f", {overlap['seconds']:g}s overlap ({overlap['removed_words']} repeated words removed, "
+                 f"{overlap['aligned']} chunks aligned and {overlap['by_time']} by time)")
+    if "step_adjustments" in report:
+        line += f", step {report['step']:g}s after {len(report['step_adjustments'])} adjustments"
+    if "vad_cuts" in report:
+        line += ", cuts at pauses: " + ", ".join(f"{count} {method}" for method, count in report["vad_cuts"].items())
+    return line
+
+
+def benchmark_ingest(source, step=9, wav_file=None):
+    """
+    Extracts every chunk of a recorded file in both ways: as livestream_video.sh does (one
+    "ffmpeg -ss -t" per chunk writing a WAV file) and with one decoder into the ring buffer
+    (also writing the WAV that a whisper-cli per chunk needs). Returns the CPU time and I/O
+    of each, per hour of audio.
+    """
+    wav_file = wav_file or os.path.join(tempfile.gettempdir(), f"whisper-ingest_{os.getpid()}.wav")
+    duration = media_duration(source)
+    if not duration:
+        raise RuntimeError(f"Cannot read the duration of {source}")
+    results = {}
+    try:
+        cpu_start, io_start = cpu_seconds(), process_io()
+        cursor = 0
+        while cursor < duration:
+            subprocess.run(["ffmpeg", "-loglevel", "quiet", "-v", "error", "-noaccurate_seek", "-i", source, "-y",
+                            "-ar", "16000", "-ac", "1", "-c:a", "pcm_s16le", "-ss", str(cursor), "-t", str(step), wav_file],
+                           stdin=subprocess.DEVNULL, capture_output=True)
+            cursor += step
+        results["ffmpeg per chunk"] = _usage_since(cpu_start, io_start, duration)
+
+        cpu_start, io_start = cpu_seconds(), process_io()
+        ring = PcmRingBuffer()
+        decoder = PcmDecoder(source, ring, follow=False, realtime=False).start()
+        cursor = 0
+        while ring.wait_for(cursor + step * sample_rate) or ring.end > cursor:
+            with open(wav_file, "wb") as f:
+                f.write(pcm_to_wav(ring.read(cursor, cursor + step * sample_rate)))
+            cursor += step * sample_rate
+        decoder.stop()
+        results["ring buffer"] = _usage_since(cpu_start, io_start, duration)
+    finally:
+        try:
+            os.remove(wav_file)
+        except OSError:
+            pass
+    return results
+
+
+def _usage_since(cpu_start, io_start, audio_seconds):
+    hours = audio_seconds / 3600
+    usage = {"cpu_seconds": round((cpu_seconds() - cpu_start) / hours, 1)}
+    io_end = process_io()
+    if io_end and io_start:
+        for key in ("rchar", "wchar", "read_bytes", "write_bytes"):
+            usage[key] = round((io_end[key] - io_start[key]) / hours)
+    return usage
+
+
+def engine_backend(executable, model, server_port=None, pid=None, name=""):
+    """
+    The speech recognition backend of the engine: a running whisper-server, or 'executable' once
+    per chunk; 'name' keeps the WAV file of a backend used at the same time as another apart.
+    """
+    if server_port:
+        return ServerBackend(WhisperServer(model, port=server_port))
+    if executable not in engine_executables:
+        raise ValueError(f"The live engine needs a whisper.cpp executable, not '{executable}'.")
+    return ProcessBackend(executable, model,
+                          os.path.join(tempfile.gettempdir(), f"whisper-live_{pid or os.getpid()}{name}.wav"))
+
+
+def engine_translator(args):
+    """The Translator for the translation options of 'live' and 'benchmark pipeline', or None."""
+    gemini_model = getattr(args, "gemini_model", None)
+    if not (args.trans or gemini_model):
+        return None
+    return Translator(args.trans_language, args.language, gemini_model=gemini_model,
+                      api_key=os.environ.get("GEMINI_API_KEY"), context_level=getattr(args, "gemini_level", 2),
+                      trans=args.trans, keep_context=getattr(args, "output_text", "both") in ("translation", "both"))
+
+
+def play_recording(source, backend, seconds=None, **options):
+    """Runs the engine on a recording played in real time, with display to /dev/null; 'seconds' ends it early."""
+    with open(os.devnull, "w") as output:
+        engine = LiveEngine(source, backend, follow=False, realtime=True, output=output, **options)
+        timer = threading.Timer(seconds, engine.stop) if seconds else None
+        if timer:
+            timer.start()
+        engine.run()
+        if timer:
+            timer.cancel()
+    return engine
+
+
+def benchmark_pipeline(source, backend, step=9, language="auto", seconds=None, translator=None, depth=2):
+    """
+    Plays a recording into the engine as if it were live, with the stages one after another (as
+    livestream_video.sh) and pipelined, and returns the stage timings of both.
+    """
+    results = {}
+    for name, pipelined in (("in turn", False), ("pipelined", True)):
+        if translator is not None:
+            translator.context = []
+        engine = play_recording(source, backend, seconds, step=step, language=language, translator=translator,
+                                pipelined=pipelined, depth=depth)
+        results[name] = engine.pipeline.report()
+    return results
+
+
+def benchmark_step(source, backend, step=9, min_step=3, max_step=30, seconds=None):
+    """
+    Plays a recording into the engine as if it were live, with the step fixed and with the
+    step controller, and returns the lag of speech recognition and the step adjustments of
+    each run.
+    """
+    results = {}
+    for name, step_range in (("fixed", None), ("adaptive", (min_step, max_step))):
+        engine = play_recording(source, backend, seconds, step=step, step_range=step_range)
+        results[name] = {"lag": engine.pipeline.report()["asr"]["lag"], "step": engine.step,
+                         "adjustments": engine.controller.adjustments if engine.controller else []}
+    return results
+
+
+def benchmark_language(source, backend, step=9, agree=3, seconds=None):
+    """
+    Plays a recording into the engine as if it were live, detecting the language of every chunk
+    and pinning it, and returns the time speech recognition took per second of audio in each
+    run (and, for the second, before and after the pin).
+    """
+    results = {}
+    for name, pin in (("detecting", None), ("pinned", LanguagePin(agree))):
+        engine = play_recording(source, backend, seconds, step=step, pin=pin)
+        audio = engine.transcribed_seconds
+        results[name] = {"chunks": engine.transcribed, "rtf": round(engine.asr_seconds / audio, 3) if audio else None,
+                         "asr": engine.pipeline.report()["asr"]["busy"]}
+        if pin is not None:
+            results[name]["language"] = pin.report()
+    return results
+
+
+def benchmark_overlap(source, backend, step=9, overlaps=(1, 2), seconds=None):
+    """
+    Plays a recording into the engine as if it were live, without overlap and with each of
+    'overlaps' seconds, and returns the time speech recognition took per second of audio it
+    ran on (the RTF), the increase of its time per second of the stream over no overlap next
+    to the most it should be (overlap / step, as if all of its time grew with the audio), and
+    what the stitcher removed.
+    """
+    results, costs = {}, {}
+    for overlap in (0,) + tuple(overlaps):
+        engine = play_recording(source, backend, seconds, step=step, overlap=overlap)
+        audio = engine.transcribed_seconds
+        stream = audio - engine.overlap_seconds
+        result = {"chunks": engine.transcribed, "rtf": round(engine.asr_seconds / audio, 3) if audio else None,
+                  "asr": engine.pipeline.report()["asr"]["busy"]}
+        costs[overlap] = engine.asr_seconds / stream if stream else None
+        if overlap:
+            result.update(engine.stitcher.report(), expected=round(overlap / step, 3))
+            if costs[overlap] and costs[0]:
+                result["increase"] = round(costs[overlap] / costs[0] - 1, 3)
+        results[overlap] = result
+    return results
+
+
+def benchmark_provisional(source, backend, provisional_backend, step=9, interval=2, seconds=None):
+    """
+    Plays a recording into the engine as if it were live, with the final text only and with
+    provisional text from 'provisional_backend' every 'interval' seconds, and returns the time
+    from the first sample of each chunk to its first words shown, and the lag of the final text,
+    in each run.
+    """
+    results = {}
+    for name, fast in (("final only", None), ("two-tier", provisional_backend)):
+        engine = play_recording(source, backend, seconds, step=step, provisional_backend=fast,
+                                provisional_interval=interval)
+        report = engine.usage_report()
+        results[name] = {"first_words": report["first_words"].get("provisional" if fast else "final"),
+                         "final": report["first_words"].get("final"), "lag": report["stages"]["asr"]["lag"]}
+        if fast is not None:
+            results[name]["windows"] = report["provisional"]["windows"]
+    return results
+
+
+def run_live(args):
+    """Entry point of 'playlist4whisper_cli.py live'."""
+    try:
+        backend = engine_backend(args.executable, args.model, args.server_port, args.pid)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    speaker = Speaker(args.trans_language, args.step, args.pid) if args.speak else None
+    if args.vad and not NUMPY_AVAILABLE:
+        print("VAD in the live engine needs NumPy (pip install numpy); cutting at fixed steps.", file=sys.stderr)
+        args.vad = False
+    transcript_file = args.transcript or (f"/tmp/transcript-whisper-live_{args.pid}.jsonl" if args.pid else None)
+    metrics_file = args.metrics or (session_metrics_file.format(args.pid) if args.pid else None)
+    if args.overlap >= (args.min_step or args.step):
+        print("The overlap must be shorter than the step.", file=sys.stderr)
+        return 2
+    if args.gate and not NUMPY_AVAILABLE:
+        print("The silence gate needs NumPy (pip install numpy); transcribing every chunk.", file=sys.stderr)
+        args.gate = 0
+
+    catch_up = None
+    if args.max_lag:
+        actions = [action.strip() for action in args.catch_up.split(",") if action.strip()]
+        unknown = [action for action in actions if action not in ("model", "merge", "drop")]
+        if unknown:
+            print(f"Unknown catch-up action: {', '.join(unknown)} (model, merge or drop)", file=sys.stderr)
+            return 2
+        fast_backend = None
+        if "model" in actions:
+            fast_model = args.fast_model or ModelBenchmarks().faster_model(args.executable, args.step, args.model,
+                                                                           model_inventory.installed())
+            try:
+                fast_backend = engine_backend(args.executable, fast_model, pid=args.pid) if fast_model else None
+            except ValueError:
+                fast_backend = None
+            if fast_backend is None:
+                print("No faster model installed to catch up with (e.g. a quantized one); "
+                      "merging chunks or dropping audio instead.", file=sys.stderr)
+            else:
+                print(f"[+] Catching up past {args.max_lag:g}s of lag with {fast_model}", file=sys.stderr)
+        catch_up = CatchUp(args.max_lag, actions, fast_backend)
+
+    provisional_backend = None
+    if args.provisional:
+        provisional_model = args.provisional_model or ModelBenchmarks().faster_model(
+            args.executable, args.step, args.model, model_inventory.installed()) or args.model
+        try:
+            provisional_backend = engine_backend(args.executable, provisional_model, pid=args.pid, name="_provisional")
+        except ValueError as e:
+            print(f"{e} No provisional text.", file=sys.stderr)
+        else:
+            print(f"[+] Provisional text every {args.provisional:g}s with {provisional_model}", file=sys.stderr)
+
+    engine = LiveEngine(args.source, backend, step=args.step, language=args.language, translate=args.translate,
+                        pid=args.pid, buffer_seconds=args.buffer, follow=not args.no_follow,
+                        realtime=not args.no_follow, translator=engine_translator(args),
+                        presenter=Presenter(args.output_text, args.pid, marker=args.vad_marker), speaker=speaker,
+                        pipelined=not args.sequential, depth=args.queue,
+                        vad=args.vad, vad_executable=args.vad_executable, vad_model=args.vad_model, gate=args.gate,
+                        transcript=TranscriptLog(transcript_file) if transcript_file else None,
+                        step_range=(args.min_step or args.step, args.max_step or args.step)
+                        if args.min_step or args.max_step else None, catch_up=catch_up, metrics=metrics_file,
+                        pin=LanguagePin(args.pin_language) if args.pin_language else None, overlap=args.overlap,
+                        provisional_backend=provisional_backend, provisional_interval=args.provisional or 2)
+    signal.signal(signal.SIGTERM, engine.stop)
+    try:
+        engine.run()
+    except KeyboardInterrupt:
+        pass
+    except (OSError, WhisperServerError) as e:
+        print(f"Live engine error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        report = engine.usage_report()
+        print(f"[+] Live engine: {format_usage(report)}", file=sys.stderr)
+        print(format_stages(report["stages"]), file=sys.stderr)
+        print(format_latency(report["stages"]), file=sys.stderr)
+    return 0